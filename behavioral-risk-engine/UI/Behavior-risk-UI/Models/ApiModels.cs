@@ -61,3 +61,18 @@ public class ApiSummary
     [JsonPropertyName("queue_review")]
     public int QueueReview { get; set; }
 }
+
+public class PagedResult<T>
+{
+    [JsonPropertyName("total")]
+    public int Total { get; set; }
+
+    [JsonPropertyName("offset")]
+    public int Offset { get; set; }
+
+    [JsonPropertyName("limit")]
+    public int Limit { get; set; }
+
+    [JsonPropertyName("items")]
+    public List<T> Items { get; set; } = new();
+}
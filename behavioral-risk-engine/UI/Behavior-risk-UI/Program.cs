@@ -39,6 +39,11 @@ builder.Services.AddHttpClient<ApiClient>(client =>
 {
     client.BaseAddress = new Uri("http://localhost:8000"); // FastAPI URL
     client.Timeout = TimeSpan.FromSeconds(25);
+})
+.ConfigurePrimaryHttpMessageHandler(() => new HttpClientHandler
+{
+    // Sends Accept-Encoding and inflates gzip / brotli responses
+    AutomaticDecompression = System.Net.DecompressionMethods.GZip | System.Net.DecompressionMethods.Brotli
 });
 
 /* ============================
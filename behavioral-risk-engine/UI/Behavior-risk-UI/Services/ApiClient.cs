@@ -6,6 +6,11 @@ public class ApiClient
 {
     private readonly HttpClient _http;
 
+    // Last dashboard payload + its ETag, shared by all typed-client instances
+    private static readonly object _cacheLock = new();
+    private static ApiPayload? _cachedPayload;
+    private static string? _cachedEtag;
+
     public ApiClient(HttpClient http)
     {
         _http = http;
@@ -13,7 +18,27 @@ public class ApiClient
 
     public async Task<ApiPayload> GetDashboardAsync()
     {
-        var response = await _http.GetAsync("/api/dashboard");
+        string? etag;
+        ApiPayload? cached;
+        lock (_cacheLock)
+        {
+            etag = _cachedEtag;
+            cached = _cachedPayload;
+        }
+
+        using var request = new HttpRequestMessage(HttpMethod.Get, "/api/dashboard");
+        if (etag != null && cached != null)
+        {
+            request.Headers.TryAddWithoutValidation("If-None-Match", etag);
+        }
+
+        var response = await _http.SendAsync(request);
+
+        // Unchanged on the server: reuse the payload we already have
+        if (response.StatusCode == System.Net.HttpStatusCode.NotModified && cached != null)
+        {
+            return cached;
+        }
 
         if (!response.IsSuccessStatusCode)
         {
@@ -22,6 +47,82 @@ public class ApiClient
 
         var payload = await response.Content.ReadFromJsonAsync<ApiPayload>();
 
+        lock (_cacheLock)
+        {
+            _cachedPayload = payload;
+            _cachedEtag = response.Headers.ETag?.ToString();
+        }
+
         return payload!;
     }
+
+    // Server-side paged views: only one page crosses the wire per request
+    public Task<PagedResult<PostDto>> GetPostsPageAsync(
+        int offset = 0,
+        int limit = 50,
+        string sort = "risk_score",
+        string order = "desc",
+        string? decision = null,
+        string? reasonCategory = null,
+        string? narrative = null,
+        string? accountId = null,
+        string? fields = null)
+    {
+        var query = BuildQuery(new Dictionary<string, string?>
+        {
+            ["offset"] = offset.ToString(),
+            ["limit"] = limit.ToString(),
+            ["sort"] = sort,
+            ["order"] = order,
+            ["decision"] = decision,
+            ["reason_category"] = reasonCategory,
+            ["narrative"] = narrative,
+            ["account_id"] = accountId,
+            ["fields"] = fields,
+        });
+
+        return GetPageAsync<PostDto>($"/api/posts{query}");
+    }
+
+    public Task<PagedResult<AccountDto>> GetAccountsPageAsync(
+        int offset = 0,
+        int limit = 50,
+        string sort = "max_risk",
+        string order = "desc",
+        string? accountId = null)
+    {
+        var query = BuildQuery(new Dictionary<string, string?>
+        {
+            ["offset"] = offset.ToString(),
+            ["limit"] = limit.ToString(),
+            ["sort"] = sort,
+            ["order"] = order,
+            ["account_id"] = accountId,
+        });
+
+        return GetPageAsync<AccountDto>($"/api/accounts{query}");
+    }
+
+    private async Task<PagedResult<T>> GetPageAsync<T>(string url)
+    {
+        var response = await _http.GetAsync(url);
+
+        if (!response.IsSuccessStatusCode)
+        {
+            throw new Exception("Risk API unavailable");
+        }
+
+        var page = await response.Content.ReadFromJsonAsync<PagedResult<T>>();
+
+        return page!;
+    }
+
+    private static string BuildQuery(Dictionary<string, string?> values)
+    {
+        var parts = values
+            .Where(kv => !string.IsNullOrEmpty(kv.Value))
+            .Select(kv => $"{kv.Key}={Uri.EscapeDataString(kv.Value!)}");
+
+        return "?" + string.Join("&", parts);
+    }
 }
\ No newline at end of file
@@ -1,9 +1,26 @@
-from fastapi import FastAPI
+from fastapi import Body, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from engine.pipeline.run_mvp_pipeline import run_mvp_pipeline
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from engine.pipeline.run_mvp_pipeline import TOP_INDEXES, build_mvp_views, encode_mvp_payload
+from engine.utils.functions import posts_frame, accounts_frame
+from engine.utils.encoding import dumps, encode_records, encode_payload, iter_ndjson
+from engine.utils.query import MAX_PAGE_SIZE, parse_list, filter_frame, page_frame, paged_response
+from engine.utils.warmup import WARMUP_STATE, start_background_warmup
+from engine.analysis.what_if import WhatIfScorer
+from engine.store.datasets import DatasetRegistry, DatasetTooLarge
+from engine.store.events import EventStore
+from engine.store.topk import TopKStore
 from fastapi import UploadFile, File
-import shutil
 import os
+import gzip
+import pandas as pd
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 
 
 app = FastAPI(
@@ -20,27 +37,483 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def warm_models():
+    # Load encoder / clusterer deps off the request path (WARMUP_ON_STARTUP=0 to skip)
+    if os.environ.get("WARMUP_ON_STARTUP", "1") != "0":
+        start_background_warmup(PIPELINE_CONFIG)
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
 
-LAST_UPLOADED_FILE = "data/sample_posts.csv" 
+@app.get("/api/ready")
+def ready():
+    # 503 until models are warm, so orchestrators can hold traffic back
+    status_code = 200 if WARMUP_STATE["status"] == "ready" else 503
+    return JSONResponse(WARMUP_STATE, status_code=status_code)
+
+SAMPLE_FILE = "data/sample_posts.csv"
+
+# Account EWMA trends and feature scaling references persist across
+# uploads / restarts
+PIPELINE_CONFIG = {
+    "account_state_path": "data/state/account_state.sqlite",
+    "artifact_path": "data/state/artifacts",
+    "normalizer_path": "data/state/feature_sketches.json",
+    "campaign_path": "data/state/campaigns.npz",
+    "event_store_path": "data/state/events.sqlite",
+    "account_feature_path": "data/state/account_features.sqlite",
+    "topk_path": "data/state/topk.pkl",
+}
+
+# --------------------------------------------------
+# Datasets: each upload is stored and scored once, shared by all workers
+# --------------------------------------------------
+
+DATASETS = DatasetRegistry(
+    os.environ.get("DATASET_PATH", "data/datasets"),
+    max_age_days=float(os.environ.get("DATASET_MAX_AGE_DAYS", "7")),
+    max_bytes=int(float(os.environ.get("DATASET_MAX_GB", "5")) * 1024 ** 3),
+)
+
+# Coordination bursts of every scored dataset (scope=all timeline queries)
+EVENTS = EventStore(PIPELINE_CONFIG["event_store_path"])
+
+# Highest-risk posts / accounts over every scored dataset (scope=all)
+TOPK = TopKStore(PIPELINE_CONFIG["topk_path"])
+
+def resolve_dataset(dataset_id: str | None = None) -> str:
+    """Requested dataset, else the latest upload, else the bundled sample."""
+    if dataset_id is None:
+        return DATASETS.latest() or DATASETS.register_path(SAMPLE_FILE, pinned=True)
+    try:
+        DATASETS.info(dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset_id}")
+    return dataset_id
+
+def current_views(dataset_id: str | None = None) -> dict:
+    dataset_id = resolve_dataset(dataset_id)
+    try:
+        return DATASETS.views(dataset_id, lambda df: build_mvp_views(df, PIPELINE_CONFIG, dataset_id=dataset_id))
+    except KeyError:  # evicted meanwhile
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def json_response(content: bytes, headers: dict | None = None) -> Response:
+    # Pre-encoded bytes: skips FastAPI's jsonable_encoder pass
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# --------------------------------------------------
+# Conditional GET (ETag / 304) + negotiated compression
+# --------------------------------------------------
+
+COMPRESS_MIN_BYTES = 1024
+
+_BODY_CACHE: dict = {}
+
+def result_etag(dataset_id: str, *parts) -> str:
+    """Weak ETag over the dataset (a content hash) + pipeline config (+ query parts)."""
+    h = hashlib.sha256()
+    h.update(dataset_id.encode())
+    h.update(json.dumps(PIPELINE_CONFIG, sort_keys=True, default=str).encode())
+    for part in parts:
+        h.update(str(part).encode())
+    return f'W/"{h.hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == bare for t in header.split(","))
+
+def negotiate_encoding(request: Request) -> str | None:
+    """Pick br / gzip from Accept-Encoding (q=0 means refused)."""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+def conditional_json(request: Request, etag: str, build) -> Response:
+    """
+    304 without calling `build` when the client already has `etag`;
+    otherwise the (possibly compressed) body, memoised per etag+encoding.
+    """
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate_encoding(request)
+    key = (etag, encoding)
+    if key not in _BODY_CACHE:
+        body = build()
+        if encoding and len(body) >= COMPRESS_MIN_BYTES:
+            body = compress(body, encoding)
+        else:
+            encoding = None
+        if len(_BODY_CACHE) >= 32:
+            _BODY_CACHE.clear()
+        _BODY_CACHE[key] = (body, encoding)
+
+    body, encoding = _BODY_CACHE[key]
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/api/upload-cv")
-async def upload_cv(file: UploadFile = File(...)):
-    global LAST_UPLOADED_FILE
-    temp_path = f"data/uploads/temp_{file.filename}"
-    
-    # Save file
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Update state to use this file for subsequent requests
-    LAST_UPLOADED_FILE = temp_path
-    return run_mvp_pipeline(temp_path)
+def upload_cv(file: UploadFile = File(...)):
+    # Stored under its content hash; becomes the default dataset
+    try:
+        dataset_id = DATASETS.register_file(file.file, file.filename or "upload.csv")
+    except DatasetTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(
+        encode_mvp_payload(current_views(dataset_id)),
+        headers={"X-Dataset-Id": dataset_id},
+    )
+
+@app.get("/api/datasets")
+def list_datasets():
+    return json_response(dumps({"latest": DATASETS.latest(), "datasets": DATASETS.entries()}))
+
+@app.get("/api/datasets/{dataset_id}")
+def get_dataset(dataset_id: str):
+    return json_response(dumps(DATASETS.info(resolve_dataset(dataset_id))))
+
+@app.delete("/api/datasets/{dataset_id}")
+def delete_dataset(dataset_id: str):
+    DATASETS.delete(resolve_dataset(dataset_id))
+    return Response(status_code=204)
 
 @app.get("/api/dashboard")
-def get_current_data():
-    # Uses the newest temp_file if it exists, otherwise defaults to sample
-    target_file = LAST_UPLOADED_FILE if os.path.exists(LAST_UPLOADED_FILE) else "data/sample_posts.csv"
-    return run_mvp_pipeline(target_file)
\ No newline at end of file
+def get_current_data(request: Request, dataset_id: str | None = None):
+    dataset_id = resolve_dataset(dataset_id)
+    return conditional_json(
+        request,
+        result_etag(dataset_id, "dashboard"),
+        lambda: encode_mvp_payload(current_views(dataset_id)),
+    )
+
+# --------------------------------------------------
+# Paged views
+# --------------------------------------------------
+
+def query_view(df, filters: dict, sort, order, offset, limit, index=None):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    filters = {col: parse_list(v) for col, v in filters.items()}
+    # top-k index first: O(page) for the default "riskiest first" views
+    if index is not None and limit is not None:
+        hit = index.lookup(filters, sort, order == "desc", offset, limit)
+        if hit is not None:
+            return hit
+    try:
+        df = filter_frame(df, filters)
+        page = page_frame(df, sort, order == "desc", offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return len(df), page
+
+def query_etag(request: Request, dataset_id: str) -> str:
+    return result_etag(dataset_id, request.url.path, sorted(request.query_params.multi_items()))
+
+@app.get("/api/posts")
+def get_posts(
+    request: Request,
+    offset: int = 0,
+    limit: int = 50,
+    sort: str | None = "risk_score",
+    order: str = "desc",
+    decision: str | None = None,
+    reason_category: str | None = None,
+    narrative: str | None = None,
+    account_id: str | None = None,
+    fields: str | None = None,
+    dataset_id: str | None = None,
+):
+    dataset_id = resolve_dataset(dataset_id)
+
+    def build() -> bytes:
+        views = current_views(dataset_id)
+        total, page = query_view(
+            views["posts"],
+            {
+                "decision": decision,
+                "reason_category": reason_category,
+                "narrative": narrative,
+                "account_id": account_id,
+            },
+            sort, order, offset, limit,
+            index=views["top"]["posts"],
+        )
+        items = encode_records(posts_frame(page, explainer=views["explainer"], fields=parse_list(fields)))
+        return encode_payload(paged_response(total, offset, limit, items))
+
+    return conditional_json(request, query_etag(request, dataset_id), build)
+
+@app.get("/api/accounts")
+def get_accounts(
+    request: Request,
+    offset: int = 0,
+    limit: int = 50,
+    sort: str | None = "max_risk",
+    order: str = "desc",
+    account_id: str | None = None,
+    fields: str | None = None,
+    dataset_id: str | None = None,
+):
+    dataset_id = resolve_dataset(dataset_id)
+
+    def build() -> bytes:
+        views = current_views(dataset_id)
+        total, page = query_view(
+            views["accounts"],
+            {"account_id": account_id},
+            sort, order, offset, limit,
+            index=views["top"]["accounts"],
+        )
+        items = encode_records(accounts_frame(page, fields=parse_list(fields)))
+        return encode_payload(paged_response(total, offset, limit, items))
+
+    return conditional_json(request, query_etag(request, dataset_id), build)
+
+@app.get("/api/clusters")
+def get_clusters(
+    request: Request,
+    offset: int = 0,
+    limit: int = 50,
+    sort: str | None = "avg_risk",
+    order: str = "desc",
+    behavior_cluster: str | None = None,
+    fields: str | None = None,
+    dataset_id: str | None = None,
+):
+    dataset_id = resolve_dataset(dataset_id)
+
+    def build() -> bytes:
+        views = current_views(dataset_id)
+        total, page = query_view(
+            views["clusters"],
+            {"behavior_cluster": behavior_cluster},
+            sort, order, offset, limit,
+            index=views["top"]["clusters"],
+        )
+        items = encode_records(accounts_frame(page, fields=parse_list(fields)))
+        return encode_payload(paged_response(total, offset, limit, items))
+
+    return conditional_json(request, query_etag(request, dataset_id), build)
+
+@app.get("/api/events")
+def get_events(
+    request: Request,
+    start: str | None = None,
+    end: str | None = None,
+    narrative: str | None = None,
+    post_id: str | None = None,
+    scope: str = "dataset",
+    offset: int = 0,
+    limit: int = 50,
+    order: str = "asc",
+    dataset_id: str | None = None,
+):
+    """
+    Coordination bursts for timeline views: those overlapping [start, end)
+    (optionally of one narrative), or those containing `post_id`.
+    scope=dataset queries one dataset's events, scope=all the persisted
+    history of every run.
+    """
+    if scope not in ("dataset", "all"):
+        raise HTTPException(status_code=400, detail="scope must be 'dataset' or 'all'")
+    try:
+        start_ts = pd.Timestamp(start) if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {e}")
+
+    if scope == "all":
+        if post_id is not None:
+            events = EVENTS.containing(post_id)
+        else:
+            events = EVENTS.overlapping(start_ts, end_ts, narrative)
+        total, page = query_view(events, {}, "window_start", order, offset, limit)
+        return json_response(encode_payload(paged_response(total, offset, limit, encode_records(page))))
+
+    dataset_id = resolve_dataset(dataset_id)
+
+    def build() -> bytes:
+        index = current_views(dataset_id)["events"]
+        if post_id is not None:
+            events = index.containing(post_id)
+        else:
+            events = index.overlapping(start_ts, end_ts, narrative)
+        total, page = query_view(events, {}, "window_start", order, offset, limit)
+        page = page.assign(post_ids=[index.members(e) for e in page["event_id"]])
+        return encode_payload(paged_response(total, offset, limit, encode_records(page)))
+
+    return conditional_json(request, query_etag(request, dataset_id), build)
+
+@app.get("/api/top")
+def get_top(
+    request: Request,
+    entity: str = "accounts",
+    metric: str | None = None,
+    offset: int = 0,
+    limit: int = 100,
+    narrative: str | None = None,
+    decision: str | None = None,
+    scope: str = "dataset",
+    fields: str | None = None,
+    dataset_id: str | None = None,
+):
+    """
+    Highest-scoring posts / accounts / clusters from the bounded top-k
+    indexes, optionally of one narrative or decision (posts). The page
+    must lie within the indexed top `top_k_index` rows. scope=all reads
+    the posts / accounts index merged over every scored dataset.
+    """
+    if scope not in ("dataset", "all"):
+        raise HTTPException(status_code=400, detail="scope must be 'dataset' or 'all'")
+    if entity not in TOP_INDEXES or (scope == "all" and "key" not in TOP_INDEXES[entity]):
+        raise HTTPException(status_code=400, detail=f"Unknown entity for scope={scope}: {entity}")
+    if narrative is not None and decision is not None:
+        raise HTTPException(status_code=400, detail="Filter on narrative or decision, not both")
+    metric = metric or TOP_INDEXES[entity]["metrics"][0]
+    limit = min(limit, MAX_PAGE_SIZE)
+    partition = ("narrative", narrative) if narrative is not None else (
+        ("decision", decision) if decision is not None else None
+    )
+
+    def page_of(index) -> tuple[int | None, pd.DataFrame]:
+        try:
+            page = index.page(metric, offset, limit, partition)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # totals are exact within one dataset; across datasets rows are merged
+        return (index.total(partition) if index.key is None else None), page
+
+    if scope == "all":
+        indexes = TOPK.load()
+        if entity not in indexes:
+            return json_response(encode_payload(paged_response(None, offset, limit, [])))
+        total, page = page_of(indexes[entity])
+        items = encode_records(accounts_frame(page, fields=parse_list(fields)))
+        return json_response(encode_payload(paged_response(total, offset, limit, items)))
+
+    dataset_id = resolve_dataset(dataset_id)
+
+    def build() -> bytes:
+        views = current_views(dataset_id)
+        total, page = page_of(views["top"][entity])
+        if entity == "posts":
+            items = encode_records(posts_frame(page, explainer=views["explainer"], fields=parse_list(fields)))
+        else:
+            items = encode_records(accounts_frame(page, fields=parse_list(fields)))
+        return encode_payload(paged_response(total, offset, limit, items))
+
+    return conditional_json(request, query_etag(request, dataset_id), build)
+
+@app.get("/api/posts/stream")
+def stream_posts(
+    sort: str | None = "risk_score",
+    order: str = "desc",
+    decision: str | None = None,
+    reason_category: str | None = None,
+    narrative: str | None = None,
+    account_id: str | None = None,
+    fields: str | None = None,
+    dataset_id: str | None = None,
+):
+    """All matching posts as NDJSON, encoded and sent chunk by chunk."""
+    views = current_views(dataset_id)
+    total, posts = query_view(
+        views["posts"],
+        {
+            "decision": decision,
+            "reason_category": reason_category,
+            "narrative": narrative,
+            "account_id": account_id,
+        },
+        sort, order, 0, None,
+    )
+    frames = (
+        posts_frame(posts.iloc[i:i + 10_000], explainer=views["explainer"], fields=parse_list(fields))
+        for i in range(0, total, 10_000)
+    )
+    return StreamingResponse(
+        (chunk for frame in frames for chunk in iter_ndjson(frame)),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Count": str(total)},
+    )
+
+# --------------------------------------------------
+# What-if re-scoring (weights / thresholds over cached features)
+# --------------------------------------------------
+
+def what_if_scorer(dataset_id: str | None = None) -> WhatIfScorer:
+    views = current_views(dataset_id)
+    if "what_if" not in views:
+        views["what_if"] = WhatIfScorer(views["posts"], views["weights"], views["decision_tiers"])
+    return views["what_if"]
+
+@app.post("/api/what-if")
+def what_if(body: dict = Body(default={}), dataset_id: str | None = None):
+    """
+    Body: {"weights": {...}, "thresholds": {"risk_auto": .., "conf_auto": ..,
+    "risk_review": .., "conf_review": ..}, "signal_thresholds": {...}}; all optional.
+    """
+    scorer = what_if_scorer(dataset_id)
+    try:
+        result = scorer.score(
+            weights=body.get("weights"),
+            thresholds=body.get("thresholds"),
+            signal_thresholds=body.get("signal_thresholds"),
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(dumps(result))
+
+@app.post("/api/what-if/sweep")
+def what_if_sweep(body: dict = Body(...), dataset_id: str | None = None):
+    """Body: {"grid": {"risk_auto": [..], "conf_auto": [..], ...}, "weights": {...}}."""
+    if not isinstance(body.get("grid"), dict):
+        raise HTTPException(status_code=400, detail="grid must be an object of threshold lists")
+    scorer = what_if_scorer(dataset_id)
+    try:
+        result = scorer.sweep(
+            body["grid"],
+            weights=body.get("weights"),
+            signal_thresholds=body.get("signal_thresholds"),
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(dumps(result))
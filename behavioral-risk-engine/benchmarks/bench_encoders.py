@@ -0,0 +1,134 @@
+"""
+Encoder backends: throughput vs. duplicate-pair recall at the 0.85 threshold.
+
+    python benchmarks/bench_encoders.py --posts 5000
+    python benchmarks/bench_encoders.py --onnx-path data/models/all-MiniLM-L6-v2-onnx
+
+The reference is the default backend (PyTorch SentenceTransformer, float32).
+For each candidate the pairs with cosine >= 0.85 are compared with the
+reference pairs (recall / precision), next to texts/sec. Build the ONNX
+model first with engine.encoders.backends.export_onnx(). The lexical
+hashed_ngram backend is timed including its blocked neighbour search.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.detectors.copy_paste import sparse_neighbours
+from engine.encoders.backends import get_encoder
+from engine.utils.functions import preprocess
+
+THRESHOLD = 0.85
+
+TEMPLATES = [
+    "Seeing strong momentum on Dogecoin today",
+    "Dogecoin might be the next big move",
+    "Bitcoin is about to break out, get in now",
+    "Ethereum gas fees are finally dropping this week",
+    "Huge news for $BTC holders, do not miss this",
+]
+FILLER = (
+    "coffee book code bug weekend rain train lunch music garden movie city "
+    "project meeting walk dinner team game weather friend school"
+).split()
+
+
+def synthetic_corpus(n: int, dup_share: float = 0.3, seed: int = 0) -> list[str]:
+    """Copy-paste variants of a few templates mixed with unrelated posts."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n):
+        if rng.random() < dup_share:
+            t = TEMPLATES[rng.integers(len(TEMPLATES))]
+            if rng.random() < 0.5:
+                t += " " + rng.choice(["!!", "#crypto", "🚀", "for real"])
+        else:
+            t = " ".join(rng.choice(FILLER, size=rng.integers(5, 25)))
+        texts.append(preprocess(t))
+    return texts
+
+
+def duplicate_pairs(vecs, block: int = 2048) -> set[tuple[int, int]]:
+    if hasattr(vecs, "tocsr"):
+        graph = sparse_neighbours(vecs, THRESHOLD, block)[0].tocoo()
+        keep = graph.row < graph.col
+        return set(zip(graph.row[keep].tolist(), graph.col[keep].tolist()))
+
+    v = vecs.astype(np.float32)
+    v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    pairs = set()
+    for start in range(0, len(v), block):
+        sims = v[start:start + block] @ v.T
+        rows, cols = np.nonzero(sims >= THRESHOLD)
+        rows += start
+        keep = rows < cols
+        pairs.update(zip(rows[keep].tolist(), cols[keep].tolist()))
+    return pairs
+
+
+def run(name, config, texts, reference):
+    encoder = get_encoder(config)
+    encoder.encode(texts[:8])  # load / warm
+
+    t0 = time.perf_counter()
+    vecs = encoder.encode(texts)
+    sparse = hasattr(vecs, "tocsr")
+    if sparse:
+        pairs = duplicate_pairs(vecs)
+    elapsed = time.perf_counter() - t0
+
+    if not sparse:
+        pairs = duplicate_pairs(vecs)
+    nbytes = vecs.data.nbytes + vecs.indices.nbytes if sparse else vecs.nbytes
+    if reference is None:
+        reference = pairs
+    hit = len(pairs & reference)
+    recall = hit / len(reference) if reference else 1.0
+    precision = hit / len(pairs) if pairs else 1.0
+
+    print(
+        f"{name:<22} {len(texts) / elapsed:9.0f} texts/s  "
+        f"{nbytes / len(texts):6.0f} B/vec  "
+        f"pairs={len(pairs):<8} recall={recall:.4f} precision={precision:.4f}"
+    )
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--onnx-path", default="data/models/all-MiniLM-L6-v2-onnx")
+    args = parser.parse_args()
+
+    texts = synthetic_corpus(args.posts)
+    print(f"posts={len(texts)} threshold={THRESHOLD}\n")
+
+    candidates = [
+        ("torch float32 (ref)", {"backend": "sentence_transformers"}),
+        ("torch float16", {"backend": "sentence_transformers", "output_dtype": "float16"}),
+        ("torch int8", {"backend": "sentence_transformers", "output_dtype": "int8"}),
+    ]
+    if os.path.isdir(args.onnx_path):
+        candidates += [
+            ("onnx fp32", {"backend": "onnx", "onnx_path": args.onnx_path,
+                           "quantized": False, "output_dtype": "float32"}),
+            ("onnx int8 model+vecs", {"backend": "onnx", "onnx_path": args.onnx_path,
+                                      "quantized": True, "output_dtype": "int8"}),
+        ]
+    else:
+        print(f"(no ONNX model at {args.onnx_path}: skipping onnx backends)\n")
+    candidates.append(("hashed char n-grams", {"backend": "hashed_ngram"}))
+
+    reference = None
+    for name, config in candidates:
+        pairs = run(name, config, texts, reference)
+        reference = reference if reference is not None else pairs
+
+
+if __name__ == "__main__":
+    main()
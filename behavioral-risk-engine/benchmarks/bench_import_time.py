@@ -0,0 +1,72 @@
+"""
+Cold-import cost of the API process (python -X importtime).
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --module api.main --max-ms 2000
+
+Runs the import in a fresh interpreter, prints the total and the slowest
+modules by cumulative time, and exits non-zero when --max-ms is exceeded
+(startup regression check), or when a --forbid module gets imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must stay lazy: importing these at API start costs seconds
+HEAVY = ["torch", "sentence_transformers", "sklearn", "hdbscan", "matplotlib"]
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every import, in order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--forbid", nargs="*", default=HEAVY)
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total_ms = next(cum for name, _, cum in reversed(rows) if name == args.module) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms ({len(rows)} modules)")
+    print(f"\n{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{cum_us / 1000:14.1f}  {self_us / 1000:8.1f}  {name}")
+
+    failed = False
+    leaked = sorted({n.split(".")[0] for n, _, _ in rows} & set(args.forbid))
+    if leaked:
+        print(f"\nFAIL: heavy modules imported at start-up: {', '.join(leaked)}")
+        failed = True
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"\nFAIL: {total_ms:.0f} ms > budget {args.max_ms:.0f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
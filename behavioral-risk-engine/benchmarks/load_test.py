@@ -0,0 +1,376 @@
+"""
+Load test of the FastAPI service: closed-loop asyncio users against a
+locally launched uvicorn, throughput / latency percentiles / error rate per
+request type and the server's RSS over time.
+
+    python benchmarks/load_test.py --scenario dashboard_storm
+    python benchmarks/load_test.py --scenario concurrent_uploads --users 8 --upload-rows 5000
+    python benchmarks/load_test.py --scenario dashboard_storm --url http://127.0.0.1:8000
+
+Scenarios are JSON files in benchmarks/scenarios/ (or any path):
+
+    {
+      "users": 50, "duration_s": 30, "think_ms": 100, "workers": 1,
+      "setup": [{"upload_rows": 2000}],
+      "requests": [
+        {"name": "dashboard", "path": "/api/dashboard", "weight": 9, "revalidate": true},
+        {"name": "upload", "upload_rows": 2000, "weight": 1}
+      ]
+    }
+
+Each user picks a request by weight, waits for the answer, then sleeps
+`think_ms`. `revalidate` sends the user's last ETag as If-None-Match (a
+polling dashboard); `upload_rows` posts a synthetic CSV that is unique per
+request, so every upload is scored. Everything runs offline: the server
+gets a throw-away working directory (state, datasets) and
+HF_HUB_OFFLINE=1, so the sentence encoder must already be in the local
+cache. Without --url the server is started here and stopped afterwards.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # /proc fallback (Linux)
+    psutil = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIO_DIR = os.path.join(ROOT, "benchmarks", "scenarios")
+
+TEMPLATES = [
+    "Bitcoin is about to break out, get in now",
+    "Huge news for $BTC holders, do not miss this",
+    "Ethereum gas fees are finally dropping this week",
+    "Dogecoin might be the next big move",
+]
+FILLER = (
+    "coffee book code bug weekend rain train lunch music garden movie city "
+    "project meeting walk dinner team game weather friend school"
+).split()
+
+
+# --------------------------------------------------
+# Synthetic uploads
+# --------------------------------------------------
+def synthetic_csv(rows: int, seed: int, dup_share: float = 0.3) -> bytes:
+    """A posts export: copy-paste bursts on a few narratives plus noise."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    dup = rng.random(rows) < dup_share
+    texts = np.where(
+        dup,
+        np.array(TEMPLATES)[rng.integers(len(TEMPLATES), size=rows)],
+        [" ".join(rng.choice(FILLER, size=rng.integers(5, 20))) for _ in range(rows)],
+    )
+    start = pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(seed % 365))
+    seconds = np.where(dup, rng.integers(0, 3600, rows), rng.integers(0, 86400, rows))
+    df = pd.DataFrame({
+        "post_id": np.arange(rows) + seed * rows,
+        "text": texts,
+        "timestamp": (start + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%d %H:%M:%S"),
+        "account_id": [f"user_{i:05d}" for i in rng.integers(0, max(rows // 5, 1), rows)],
+        "account_age_days": rng.integers(1, 2000, rows),
+    })
+    return df.to_csv(index=False).encode("utf-8")
+
+
+# --------------------------------------------------
+# Server
+# --------------------------------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, workdir: str) -> subprocess.Popen:
+    """uvicorn on 127.0.0.1 with its relative data paths inside `workdir`."""
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    shutil.copy(os.path.join(ROOT, "data", "sample_posts.csv"), os.path.join(workdir, "data"))
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(p for p in (ROOT, os.environ.get("PYTHONPATH")) if p),
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+
+
+async def wait_until(client, url: str, timeout: float, accept=(200,)) -> None:
+    """Poll `url` until it answers with an accepted status."""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            r = await client.get(url)
+        except httpx.TransportError:
+            r = None  # not listening yet
+        if r is not None and r.status_code in accept:
+            return
+        if r is not None and r.status_code == 503 and r.json().get("status") == "failed":
+            raise SystemExit(f"Server warm-up failed: {r.text}")
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Timed out waiting for {url}")
+        await asyncio.sleep(0.25)
+
+
+def process_rss(pid: int) -> int | None:
+    """RSS bytes of a process and its children (uvicorn workers)."""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc, *proc.children(recursive=True)]
+            return sum(p.memory_info().rss for p in procs if p.is_running())
+        except psutil.Error:
+            return None
+
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                stack += [int(c) for c in f.read().split()]
+        except (OSError, StopIteration):
+            continue
+    return total or None
+
+
+# --------------------------------------------------
+# Load generation
+# --------------------------------------------------
+class Recorder:
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.samples = []   # (start_s, name, status, latency_s)
+        self.rss = []       # (t_s, rss_mb)
+
+    def add(self, name: str, status: int, started: float, latency: float) -> None:
+        self.samples.append((started - self.t0, name, status, latency))
+
+
+async def prepare(spec: dict, seq: int) -> bytes | None:
+    """Upload body, generated off the event loop (and outside the timing)."""
+    if "upload_rows" not in spec:
+        return None
+    return await asyncio.to_thread(synthetic_csv, spec["upload_rows"], seq)
+
+
+async def send(client, spec: dict, state: dict, seq: int, body: bytes | None = None):
+    if body is not None:
+        files = {"file": (f"load_{seq}.csv", io.BytesIO(body), "text/csv")}
+        return await client.post(spec.get("path", "/api/upload-cv"), files=files)
+
+    headers = {}
+    if spec.get("revalidate") and spec["name"] in state:
+        headers["If-None-Match"] = state[spec["name"]]
+    r = await client.request(
+        spec.get("method", "GET"), spec["path"], params=spec.get("params"), headers=headers
+    )
+    if "etag" in r.headers:
+        state[spec["name"]] = r.headers["etag"]
+    return r
+
+
+async def user(client, scenario: dict, recorder: Recorder, deadline: float, seed: int, counter):
+    rng = np.random.default_rng(seed)
+    specs = scenario["requests"]
+    weights = np.array([s.get("weight", 1) for s in specs], dtype=float)
+    weights /= weights.sum()
+    think = scenario.get("think_ms", 0) / 1000
+    state = {}  # this user's ETags
+
+    while time.monotonic() < deadline:
+        spec = specs[rng.choice(len(specs), p=weights)]
+        seq = next(counter)
+        body = await prepare(spec, seq)
+        started = time.monotonic()
+        try:
+            r = await send(client, spec, state, seq, body)
+            status = r.status_code
+        except Exception:
+            status = 0  # connection error / timeout
+        recorder.add(spec["name"], status, started, time.monotonic() - started)
+        if think:
+            await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+
+
+async def sample_rss(pid: int | None, recorder: Recorder, interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        rss = process_rss(pid) if pid else None
+        if rss is not None:
+            recorder.rss.append((round(time.monotonic() - recorder.t0, 2), round(rss / 1024 ** 2, 1)))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_scenario(base_url: str, scenario: dict, pid: int | None, args) -> Recorder:
+    import httpx
+    from itertools import count
+
+    limits = httpx.Limits(max_connections=scenario["users"] + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_until(client, "/api/health", 60)
+        if args.wait_ready:
+            await wait_until(client, "/api/ready", args.ready_timeout)
+
+        counter = count(1)
+        for i, step in enumerate(scenario.get("setup", [])):
+            seq = next(counter)
+            r = await send(client, {"name": f"setup_{i}", **step}, {}, seq, await prepare(step, seq))
+            if r.status_code >= 400:
+                raise SystemExit(f"Setup step {step} failed: {r.status_code} {r.text[:200]}")
+
+        recorder = Recorder()
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_rss(pid, recorder, args.rss_interval, stop))
+        deadline = time.monotonic() + scenario["duration_s"]
+        await asyncio.gather(*[
+            user(client, scenario, recorder, deadline, seed, counter)
+            for seed in range(scenario["users"])
+        ])
+        stop.set()
+        await sampler
+    return recorder
+
+
+# --------------------------------------------------
+# Report
+# --------------------------------------------------
+def summarize(recorder: Recorder, duration: float) -> dict:
+    by_name = {}
+    for name in sorted({s[1] for s in recorder.samples}) + ["TOTAL"]:
+        rows = [s for s in recorder.samples if name == "TOTAL" or s[1] == name]
+        lat = np.array([s[3] for s in rows]) * 1000
+        statuses = np.array([s[2] for s in rows])
+        errors = int(((statuses == 0) | (statuses >= 400)).sum())
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (np.nan,) * 3
+        by_name[name] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / duration, 2),
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "status": {str(k): int(v) for k, v in zip(*np.unique(statuses, return_counts=True))},
+        }
+
+    rss = [mb for _, mb in recorder.rss]
+    per_second = np.bincount(np.array([int(s[0]) for s in recorder.samples], dtype=int)) if recorder.samples else []
+    return {
+        "duration_s": duration,
+        "requests": by_name,
+        "rss_mb": {
+            "start": rss[0] if rss else None,
+            "peak": max(rss) if rss else None,
+            "end": rss[-1] if rss else None,
+            "series": recorder.rss,
+        },
+        "throughput_per_s": [int(c) for c in per_second],
+    }
+
+
+def print_report(name: str, report: dict) -> None:
+    print(f"\n=== {name}: {report['duration_s']:.0f}s ===")
+    print(f"{'request':<16}{'n':>8}{'rps':>9}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  status")
+    for req, s in report["requests"].items():
+        print(
+            f"{req:<16}{s['requests']:>8}{s['rps']:>9.1f}{s['error_rate'] * 100:>7.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}  {s['status']}"
+        )
+    rss = report["rss_mb"]
+    if rss["peak"] is not None:
+        print(f"\nserver RSS MB: start {rss['start']}, peak {rss['peak']}, end {rss['end']}")
+
+
+def load_scenario(name: str) -> dict:
+    path = name if os.path.exists(name) else os.path.join(SCENARIO_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        raise SystemExit(f"Unknown scenario: {name}")
+    with open(path, encoding="utf-8") as f:
+        scenario = json.load(f)
+    if not scenario.get("requests"):
+        raise SystemExit(f"Scenario {name} has no requests")
+    return scenario
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", default="dashboard_storm")
+    parser.add_argument("--url", default=None, help="target a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, default=None, help="RSS of this process with --url")
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--upload-rows", type=int, default=None, help="rows of every synthetic upload")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--no-wait-ready", dest="wait_ready", action="store_false")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--rss-interval", type=float, default=0.5)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    for key, value in (("users", args.users), ("duration_s", args.duration), ("workers", args.workers)):
+        if value is not None:
+            scenario[key] = value
+    scenario.setdefault("users", 10)
+    scenario.setdefault("duration_s", 30)
+    if args.upload_rows is not None:
+        for spec in scenario["requests"] + scenario.get("setup", []):
+            if "upload_rows" in spec:
+                spec["upload_rows"] = args.upload_rows
+
+    server, workdir, pid = None, None, args.server_pid
+    base_url = args.url
+    if base_url is None:
+        workdir = tempfile.mkdtemp(prefix="load_test_")
+        port = free_port()
+        server = start_server(port, scenario.get("workers", 1), workdir)
+        base_url, pid = f"http://127.0.0.1:{port}", server.pid
+
+    try:
+        recorder = asyncio.run(run_scenario(base_url, scenario, pid, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = summarize(recorder, scenario["duration_s"])
+    report["scenario"] = {k: v for k, v in scenario.items() if k != "description"}
+    print_report(args.scenario, report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
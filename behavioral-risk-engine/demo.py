@@ -1,15 +1,10 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
 import json
 from datetime import datetime, timedelta
 
 from engine.pipeline.risk_pipeline import RiskPipeline
-from engine.visualization.functions import (
-    plot_similarity_vs_coordination,
-    plot_cluster_size_vs_account_age,
-    plot_similarity_vs_cluster_size,
-)
+from engine.visualization.functions import submit_behavior_maps
 from engine.analysis.functions import (
     print_risk_summary,
     risk_conf_matrix,
@@ -289,19 +284,9 @@ def main():
     risk_conf_matrix(posts)
 
     # --------------------------------------------------
-    # Visualizations (saved for web)
+    # Visualizations (saved for web, rendered in the background)
     # --------------------------------------------------
-    plot_similarity_vs_coordination(
-        posts, f"{OUTPUT_DIR}/01_similarity_vs_coordination.png"
-    )
-    plot_cluster_size_vs_account_age(
-        posts, f"{OUTPUT_DIR}/02_cluster_size_vs_account_age.png"
-    )
-    plot_similarity_vs_cluster_size(
-        posts, f"{OUTPUT_DIR}/03_similarity_vs_cluster_size.png"
-    )
-
-    print("\nBehavior maps saved to ./outputs/")
+    behavior_maps = submit_behavior_maps(posts, OUTPUT_DIR)
 
     # --------------------------------------------------
     # FINAL WEB PAYLOAD (MVP)
@@ -321,6 +306,9 @@ def main():
         json.dump(web_payload, f, indent=2, ensure_ascii=False)
 
     print("\n✅ MVP payload exported to outputs/mvp_payload.json")
+
+    maps_dir = os.path.dirname(next(iter(behavior_maps.result().values())))
+    print(f"Behavior maps saved to ./{maps_dir}/")
     print("\n=== NEXT STEPS ===")
     print("• Plug this payload into a web UI")
     print("• Wrap main() in FastAPI endpoint")
@@ -1,55 +1,64 @@
 import pandas as pd
+
+from engine.analysis.reports import ReportEngine
 # --------------------------------------------------
 # ANALYSIS HELPERS (NO TOP-K BIAS)
 # --------------------------------------------------
+#
+# Each helper prints from a ReportEngine; pass `report` to reuse one built
+# over the same posts instead of rescanning the frame.
+
+def _report(df, report: ReportEngine | None) -> ReportEngine:
+    return report if report is not None else ReportEngine().update(df)
 
-def print_risk_summary(df, name="ALL POSTS"):
+
+def print_risk_summary(df, name="ALL POSTS", report: ReportEngine | None = None):
+    report = _report(df, report)
     print(f"\n=== RISK DISTRIBUTION: {name} ===")
-    print(df["risk_score"].describe(percentiles=[0.1, 0.25, 0.5, 0.75, 0.9, 0.95]))
+    print(pd.Series(report.risk_distribution(), name="risk_score"))
 
     print("\nConfidence distribution:")
-    print(df["confidence"].describe(percentiles=[0.25, 0.5, 0.75, 0.9]))
+    print(pd.Series(report.confidence_distribution(), name="confidence"))
 
     print("\nReason categories:")
-    print(df["reason_category"].value_counts(normalize=True))
-
+    print(pd.Series(report.reason_shares(), name="proportion"))
+    return report
 
-def risk_conf_matrix(df, risk_thr=70, conf_thr=0.7):
-    high_risk = df["risk_score"] >= risk_thr
-    high_conf = df["confidence"] >= conf_thr
 
-    table = pd.crosstab(
-        high_risk,
-        high_conf,
-        rownames=["High risk"],
-        colnames=["High confidence"]
-    )
+def risk_conf_matrix(df, risk_thr=70, conf_thr=0.7, report: ReportEngine | None = None):
+    table = _report(df, report).risk_conf_matrix(risk_thr, conf_thr)
 
     print("\n=== RISK × CONFIDENCE MATRIX ===")
     print(table)
+    return table
 
 
-def scenario_report(df):
+def scenario_report(df, report: ReportEngine | None = None):
     if "scenario" not in df.columns:
         print("\n(no scenario column found — skipping scenario report)")
-        return
+        return []
 
+    scenarios = _report(df, report).scenarios()
     print("\n=== SCENARIO REPORT ===")
-    for name, g in df.groupby("scenario"):
-        print(f"\n--- {name.upper()} ---")
-        print(f"Avg risk: {g['risk_score'].mean():.2f}")
-        print(f"High risk %: {(g['risk_score'] >= 70).mean():.2%}")
-        print(f"High confidence %: {(g['confidence'] >= 0.7).mean():.2%}")
+    for s in scenarios:
+        print(f"\n--- {str(s['scenario']).upper()} ---")
+        print(f"Avg risk: {s['avg_risk']:.2f}")
+        print(f"High risk %: {s['high_risk_rate']:.2%}")
+        print(f"High confidence %: {s['high_conf_rate']:.2%}")
         print("Reason categories:")
-        print(g["reason_category"].value_counts(normalize=True))
+        print(pd.Series(s["reason_categories"], name="proportion"))
+    return scenarios
 
 
-def inspect_band(df, low, high, max_rows=8):
-    band = df[(df["risk_score"] >= low) & (df["risk_score"] < high)]
-    print(f"\n=== POSTS WITH RISK IN [{low}, {high}) (n={len(band)}) ===")
-    if band.empty:
+def inspect_band(df, low, high, max_rows=8, report: ReportEngine | None = None):
+    summary = _report(df, report).band(low, high)
+    print(f"\n=== POSTS WITH RISK IN [{low}, {high}) (n={summary['count']}) ===")
+    if summary["count"] == 0:
         print("None")
-        return
+        return summary
 
+    # only the example rows need the posts themselves
     cols = ["post_id", "text", "risk_score", "confidence", "reason_category"]
-    print(band[cols].head(max_rows))
\ No newline at end of file
+    risk = df["risk_score"]
+    print(df.loc[(risk >= low) & (risk < high), cols].head(max_rows))
+    return summary
@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Single-pass report engine
+# --------------------------------------------------
+#
+# Every summary the analysis helpers, the pipeline aggregations and the
+# dashboard views need is derived from mergeable state built in one pass
+# per posts frame:
+#   * per-group sums / maxima / counts of precomputed boolean columns for
+#     accounts, narratives, behaviour clusters and scenarios,
+#   * a sparse joint (risk, confidence) histogram at 0.01 resolution, which
+#     answers distributions, quantiles, bands and any risk x confidence
+#     threshold matrix without touching the posts again,
+#   * reason-category counts (overall and per scenario).
+# update() merges a new batch of posts into that state, so a report can
+# follow a growing dataset without rescanning what it has already seen.
+
+HIGH_RISK = 70
+HIGH_CONF = 0.7
+
+DIMENSIONS = {
+    "accounts": "account_id",
+    "narratives": "narrative",
+    "clusters": "behavior_cluster",
+    "scenarios": "scenario",
+}
+
+# scores are fused with 2 decimals: 0..100 and 0..1 in 0.01 steps
+_RISK_STEPS = 10_001
+_CONF_STEPS = 101
+
+# state column -> (source column, aggregation, merge aggregation)
+_STATE = {
+    "n_posts": ("post_id", "count", "sum"),
+    "n_risk": ("risk_score", "count", "sum"),
+    "risk_sum": ("_risk64", "sum", "sum"),
+    "risk_max": ("risk_score", "max", "max"),
+    "n_conf": ("confidence", "count", "sum"),
+    "conf_sum": ("_conf64", "sum", "sum"),
+    "high_risk": ("_high_risk", "sum", "sum"),
+    "high_conf": ("_high_conf", "sum", "sum"),
+    "auto_actions": ("_auto", "sum", "sum"),
+    "queue_review": ("_queue", "sum", "sum"),
+    "risk_trend": ("risk_ewma", "last", "last"),
+    "coactivity_group": ("coactivity_group", "first", "first"),
+    "coactivity_group_size": ("coactivity_group_size", "first", "first"),
+}
+
+
+def _add_counts(total: pd.Series, batch: pd.Series) -> pd.Series:
+    if total.empty:
+        return batch.astype(np.int64)
+    return total.add(batch, fill_value=0).astype(np.int64)
+
+
+class ReportEngine:
+    """
+    Account / narrative / cluster / scenario / band summaries of scored
+    posts, returned as DataFrames and dicts (the print helpers in
+    engine.analysis.functions only format them).
+
+    Quantiles, bands and threshold matrices are exact for pipeline output
+    (2-decimal scores); other inputs are binned to 0.01.
+    """
+
+    def __init__(self, high_risk: float = HIGH_RISK, high_conf: float = HIGH_CONF):
+        self.high_risk = high_risk
+        self.high_conf = high_conf
+        self.groups: dict[str, pd.DataFrame] = {}
+        self.joint = pd.Series(dtype=np.int64)
+        self.reasons = pd.Series(dtype=np.int64)
+        self.scenario_reasons = pd.Series(dtype=np.int64)
+        self.risk_sq_sum = 0.0
+        self.conf_sq_sum = 0.0
+        self.risk_dtype = None
+        self.conf_dtype = None
+
+    # --------------------------------------------------
+    # Ingest
+    # --------------------------------------------------
+    def update(self, posts: pd.DataFrame) -> "ReportEngine":
+        """Fold a batch of scored posts into the report; returns self."""
+        if posts.empty:
+            return self
+
+        if self.risk_dtype is None:
+            self.risk_dtype = posts["risk_score"].dtype
+            self.conf_dtype = posts["confidence"].dtype
+
+        risk = posts["risk_score"].to_numpy(np.float64)
+        conf = posts["confidence"].to_numpy(np.float64)
+        flags = {
+            "_risk64": risk,
+            "_conf64": conf,
+            "_high_risk": risk >= self.high_risk,
+            "_high_conf": conf >= self.high_conf,
+        }
+        if "decision" in posts.columns:
+            flags["_auto"] = (posts["decision"] == "AUTO_ACTION").to_numpy()
+            flags["_queue"] = (posts["decision"] == "QUEUE_REVIEW").to_numpy()
+        frame = posts.assign(**flags)
+
+        for name, key in DIMENSIONS.items():
+            if key in frame.columns:
+                batch = self._aggregate(frame.groupby(key, observed=True))
+                self.groups[name] = self._merge_groups(self.groups.get(name), batch)
+
+        # joint histogram on (risk, confidence) 0.01 steps, stored sparse
+        valid = ~(np.isnan(risk) | np.isnan(conf))
+        ri = np.clip(np.rint(risk[valid] * 100), 0, _RISK_STEPS - 1).astype(np.int64)
+        ci = np.clip(np.rint(conf[valid] * 100), 0, _CONF_STEPS - 1).astype(np.int64)
+        codes, counts = np.unique(ri * _CONF_STEPS + ci, return_counts=True)
+        self.joint = _add_counts(self.joint, pd.Series(counts, index=codes))
+        self.risk_sq_sum += float(np.square(risk[valid]).sum())
+        self.conf_sq_sum += float(np.square(conf[valid]).sum())
+
+        if "reason_category" in posts.columns:
+            reasons = posts["reason_category"].astype(str).value_counts()
+            self.reasons = _add_counts(self.reasons, reasons)
+            if "scenario" in posts.columns:
+                pairs = posts.groupby(
+                    [posts["scenario"], posts["reason_category"].astype(str)], observed=True
+                ).size()
+                self.scenario_reasons = _add_counts(self.scenario_reasons, pairs)
+        return self
+
+    @staticmethod
+    def _aggregate(grouped) -> pd.DataFrame:
+        # one cython reduction per aggregation kind over all its columns
+        # (the grouper is computed once and shared)
+        columns = grouped.obj.columns
+        parts = []
+        for agg in ("count", "sum", "max", "first", "last"):
+            states = {
+                state: src for state, (src, how, _) in _STATE.items()
+                if how == agg and src in columns
+            }
+            if not states:
+                continue
+            # a source may feed several states (risk_score: count and max)
+            sources = list(dict.fromkeys(states.values()))
+            reduced = getattr(grouped[sources], agg)()
+            parts.append(pd.DataFrame({state: reduced[src] for state, src in states.items()}))
+        batch = pd.concat(parts, axis=1)
+        return batch[[state for state in _STATE if state in batch.columns]]
+
+    @staticmethod
+    def _merge_groups(state: pd.DataFrame | None, batch: pd.DataFrame) -> pd.DataFrame:
+        if state is None:
+            return batch
+        merge = {col: _STATE[col][2] for col in batch.columns}
+        return pd.concat([state, batch]).groupby(level=0).agg(merge)
+
+    # --------------------------------------------------
+    # Group views
+    # --------------------------------------------------
+    def view(self, name: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Per-group summary for one of DIMENSIONS (key column first, sorted
+        by key). Available columns: total_posts / posts, avg_risk,
+        max_risk, avg_confidence, suspicious_posts (risk >= high_risk),
+        high_risk_rate, high_conf_rate, auto_actions, queue_review,
+        risk_trend, coactivity_group, coactivity_group_size.
+        """
+        key = DIMENSIONS[name]
+        if name not in self.groups:
+            return pd.DataFrame(columns=[key] + list(columns or []))
+        g = self.groups[name]
+
+        derived = {
+            "total_posts": lambda: g["n_posts"],
+            "posts": lambda: g["n_posts"],
+            "avg_risk": lambda: (g["risk_sum"] / g["n_risk"]).astype(self.risk_dtype),
+            "max_risk": lambda: g["risk_max"],
+            "avg_confidence": lambda: (g["conf_sum"] / g["n_conf"]).astype(self.conf_dtype),
+            "suspicious_posts": lambda: g["high_risk"].astype(np.int64),
+            "high_risk_rate": lambda: g["high_risk"] / g["n_risk"],
+            "high_conf_rate": lambda: g["high_conf"] / g["n_conf"],
+            "auto_actions": lambda: g["auto_actions"].astype(np.int64),
+            "queue_review": lambda: g["queue_review"].astype(np.int64),
+        }
+        columns = columns or [
+            c for c in derived if c != "posts"
+            and (c not in ("auto_actions", "queue_review") or c in g.columns)
+        ] + [c for c in ("risk_trend", "coactivity_group", "coactivity_group_size") if c in g.columns]
+
+        out = pd.DataFrame(
+            {c: derived[c]() if c in derived else g[c] for c in columns},
+            index=g.index,
+        )
+        out.index.name = key
+        return out.reset_index()
+
+    def accounts(self, columns: list[str] | None = None) -> pd.DataFrame:
+        return self.view("accounts", columns)
+
+    def narratives(self, columns: list[str] | None = None) -> pd.DataFrame:
+        return self.view("narratives", columns)
+
+    def clusters(self, columns: list[str] | None = None) -> pd.DataFrame:
+        return self.view("clusters", columns)
+
+    def scenarios(self) -> list[dict]:
+        """Per scenario: avg risk, high-risk / high-confidence share, reason mix."""
+        if "scenarios" not in self.groups:
+            return []
+        view = self.view("scenarios", ["total_posts", "avg_risk", "high_risk_rate", "high_conf_rate"])
+        report = []
+        for row in view.to_dict(orient="records"):
+            name = row["scenario"]
+            reasons = (
+                self.scenario_reasons.xs(name, level=0)
+                if name in self.scenario_reasons.index.get_level_values(0)
+                else pd.Series(dtype=np.int64)
+            )
+            row["reason_categories"] = (reasons / reasons.sum()).sort_values(ascending=False).to_dict()
+            report.append(row)
+        return report
+
+    # --------------------------------------------------
+    # Distribution views (from the joint histogram)
+    # --------------------------------------------------
+    def _dense(self) -> np.ndarray:
+        dense = np.zeros(_RISK_STEPS * _CONF_STEPS, dtype=np.int64)
+        dense[self.joint.index.to_numpy(np.int64)] = self.joint.to_numpy()
+        return dense.reshape(_RISK_STEPS, _CONF_STEPS)
+
+    @property
+    def total(self) -> int:
+        return int(self.joint.sum())
+
+    @staticmethod
+    def _describe(hist: np.ndarray, scale: float, sq_sum: float, percentiles) -> dict:
+        n = int(hist.sum())
+        if n == 0:
+            return {"count": 0}
+        values = np.arange(len(hist)) / scale
+        cum = np.cumsum(hist)
+        mean = float((hist * values).sum() / n)
+        var = (sq_sum - n * mean ** 2) / (n - 1) if n > 1 else float("nan")
+
+        def kth(k):  # k-th smallest value (0-based)
+            return float(values[np.searchsorted(cum, k + 1)])
+
+        out = {"count": n, "mean": mean, "std": float(np.sqrt(max(var, 0.0))), "min": kth(0)}
+        for p in percentiles:
+            # linear interpolation between order statistics, as pandas does
+            pos = p * (n - 1)
+            lo = int(np.floor(pos))
+            a, b = kth(lo), kth(min(lo + 1, n - 1))
+            out[f"{p:.0%}"] = a + (b - a) * (pos - lo)
+        out["max"] = kth(n - 1)
+        return out
+
+    def risk_distribution(self, percentiles=(0.1, 0.25, 0.5, 0.75, 0.9, 0.95)) -> dict:
+        return self._describe(self._dense().sum(axis=1), 100, self.risk_sq_sum, percentiles)
+
+    def confidence_distribution(self, percentiles=(0.25, 0.5, 0.75, 0.9)) -> dict:
+        return self._describe(self._dense().sum(axis=0), 100, self.conf_sq_sum, percentiles)
+
+    def reason_shares(self) -> dict[str, float]:
+        if self.reasons.empty:
+            return {}
+        return (self.reasons / self.reasons.sum()).sort_values(ascending=False).to_dict()
+
+    def risk_conf_matrix(self, risk_thr: float = HIGH_RISK, conf_thr: float = HIGH_CONF) -> pd.DataFrame:
+        """2x2 counts of (risk >= risk_thr) x (confidence >= conf_thr)."""
+        dense = self._dense()
+        r = int(np.clip(np.ceil(np.round(risk_thr * 100, 6)), 0, _RISK_STEPS))
+        c = int(np.clip(np.ceil(np.round(conf_thr * 100, 6)), 0, _CONF_STEPS))
+        table = pd.DataFrame(
+            [[dense[:r, :c].sum(), dense[:r, c:].sum()],
+             [dense[r:, :c].sum(), dense[r:, c:].sum()]],
+            index=pd.Index([False, True], name="High risk"),
+            columns=pd.Index([False, True], name="High confidence"),
+        )
+        # like pd.crosstab: only the outcomes that occur
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    def band(self, low: float, high: float) -> dict:
+        """Count, mean risk and mean confidence of posts with low <= risk < high."""
+        dense = self._dense()
+        lo = int(np.clip(np.ceil(np.round(low * 100, 6)), 0, _RISK_STEPS))
+        hi = int(np.clip(np.ceil(np.round(high * 100, 6)), 0, _RISK_STEPS))
+        block = dense[lo:hi]
+        n = int(block.sum())
+        if n == 0:
+            return {"low": low, "high": high, "count": 0}
+        risk = np.arange(lo, hi) / 100
+        conf = np.arange(_CONF_STEPS) / 100
+        return {
+            "low": low,
+            "high": high,
+            "count": n,
+            "avg_risk": float((block.sum(axis=1) * risk).sum() / n),
+            "avg_confidence": float((block.sum(axis=0) * conf).sum() / n),
+        }
+
+    def bands(self, edges=(0, 40, 50, 70, 75, 100.01)) -> list[dict]:
+        return [self.band(lo, hi) for lo, hi in zip(edges[:-1], edges[1:])]
+
+    def report(self) -> dict:
+        """Everything at once, for logging or JSON export."""
+        return {
+            "posts": self.total,
+            "risk": self.risk_distribution(),
+            "confidence": self.confidence_distribution(),
+            "reason_categories": self.reason_shares(),
+            "risk_conf_matrix": self.risk_conf_matrix().to_dict(),
+            "bands": self.bands(),
+            "scenarios": self.scenarios(),
+        }
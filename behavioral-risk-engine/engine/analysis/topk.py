@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from engine.utils.query import MAX_PAGE_SIZE
+
+DEFAULT_K = 1000
+
+# --------------------------------------------------
+# Bounded top-k index
+# --------------------------------------------------
+#
+# The dashboard mostly asks for the riskiest rows ("top 100 accounts",
+# "top posts in BTC"). Sorting or partitioning the whole view for each of
+# those is O(n); this index keeps, per metric, the best `k` rows overall
+# and per value of each partition column, already in page order, so a
+# page is a slice. Batches are merged in against the retained rows only,
+# so an update costs O(batch + retained) however many rows came before.
+
+
+class TopKIndex:
+    """
+    Highest-scoring rows per metric, overall and per partition value
+    (e.g. narrative, decision), at most `k` of each.
+
+    Order is score descending (NaN last), ties by arrival order, so the
+    index of a single frame pages exactly like page_frame. With `key` (a
+    column, or a list of columns identifying a row together), a row seen again (an account in a later batch, a rescored post)
+    replaces its earlier version, each metric combined as "last" or "max".
+    "max" metrics and rows whose scores only rise stay exact across
+    batches; a retained row whose score drops may end up ranked below a
+    row that was evicted before.
+
+    Memory is bounded by k x metrics x (1 + partition values) rows.
+    """
+
+    def __init__(
+        self,
+        metrics: list[str],
+        partitions: list[str] = (),
+        key: str | list[str] | None = None,
+        k: int = DEFAULT_K,
+        combine: dict[str, str] | None = None,
+    ):
+        if k <= 0:
+            raise ValueError("k must be > 0")
+        self.metrics = list(metrics)
+        self.partitions = list(partitions)
+        self.key = key
+        self.k = k
+        self.combine = {m: "last" for m in self.metrics} | (combine or {})
+        if set(self.combine.values()) - {"last", "max"}:
+            raise ValueError("combine must be 'last' or 'max'")
+
+        self.rows = pd.DataFrame()
+        self.counts: dict = {None: 0}  # rows offered, overall and per (column, value)
+        self._seq = 0
+        self._order: dict = {}  # (metric, partition) -> positions in rows, in page order
+
+    @property
+    def _key_cols(self) -> list[str]:
+        if self.key is None:
+            return []
+        return [self.key] if isinstance(self.key, str) else list(self.key)
+
+    # --------------------------------------------------
+    # Updates
+    # --------------------------------------------------
+    def update(self, df: pd.DataFrame) -> "TopKIndex":
+        """Merge a batch of rows into the index."""
+        required = {*self.metrics, *self.partitions, *self._key_cols}
+        missing = required - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing columns for the top-k index: {missing}")
+
+        seq = np.arange(self._seq, self._seq + len(df))
+        self._seq += len(df)
+        self.counts[None] += len(df)
+        for col in self.partitions:
+            for value, n in df[col].value_counts(dropna=False).items():
+                if n:
+                    self.counts[(col, str(value))] = self.counts.get((col, str(value)), 0) + int(n)
+
+        if self.key is None:
+            # rank on the indexed columns first: only rows that can enter
+            # the index are copied, not the whole (wide) batch
+            light = pd.DataFrame({c: df[c].to_numpy() for c in {*self.metrics, *self.partitions}})
+            light["_seq"] = seq
+            picked = np.unique(np.concatenate([
+                positions for metric in self.metrics for _, positions in self._tops(light, metric)
+            ]))
+            batch = df.iloc[picked].reset_index(drop=True).assign(_seq=seq[picked])
+        else:
+            batch = df.reset_index(drop=True).assign(_seq=seq)
+
+        rows = batch if self.rows.empty else pd.concat([self.rows, batch], ignore_index=True)
+        if self.key is not None and rows.duplicated(self._key_cols).any():
+            agg = {c: "last" for c in rows.columns if c not in self._key_cols} | self.combine | {"_seq": "first"}
+            rows = (
+                rows.groupby(self._key_cols, sort=False, observed=True, dropna=False)
+                .agg(agg)
+                .reset_index()
+                .sort_values("_seq", kind="stable", ignore_index=True)
+            )
+
+        keep = np.zeros(len(rows), dtype=bool)
+        order = {}
+        for metric in self.metrics:
+            for partition, positions in self._tops(rows, metric):
+                keep[positions] = True
+                order[(metric, partition)] = positions
+
+        # positions in the retained frame
+        remap = np.cumsum(keep) - 1
+        self.rows = rows[keep].reset_index(drop=True)
+        self._order = {name: remap[positions] for name, positions in order.items()}
+        return self
+
+    def _tops(self, rows: pd.DataFrame, metric: str):
+        score = rows[metric].to_numpy(dtype=np.float64)
+        ranked = np.lexsort((rows["_seq"].to_numpy(), np.where(np.isnan(score), np.inf, -score)))
+        yield None, ranked[:self.k]
+
+        for col in self.partitions:
+            codes, values = pd.factorize(rows[col].to_numpy()[ranked], use_na_sentinel=False)
+            # stable: rank order is kept inside each value
+            grouped = np.argsort(codes, kind="stable")
+            starts = np.flatnonzero(np.r_[True, codes[grouped][1:] != codes[grouped][:-1]])
+            ends = np.r_[starts[1:], len(grouped)]
+            for start, end in zip(starts, ends):
+                value = str(values[codes[grouped[start]]])
+                yield (col, value), ranked[grouped[start:min(end, start + self.k)]]
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def frame(self) -> pd.DataFrame:
+        """Retained rows in arrival order (to merge into another index)."""
+        return self.rows.drop(columns="_seq", errors="ignore")
+
+    def total(self, partition: tuple[str, str] | None = None) -> int:
+        """Rows offered so far, overall or of one (column, value)."""
+        if partition is not None:
+            partition = (partition[0], str(partition[1]))
+        return self.counts.get(partition, 0)
+
+    def page(
+        self,
+        metric: str,
+        offset: int = 0,
+        limit: int = 50,
+        partition: tuple[str, str] | None = None,
+    ) -> pd.DataFrame:
+        """Rows [offset, offset + limit) by `metric`, optionally of one (column, value)."""
+        if metric not in self.metrics:
+            raise ValueError(f"Not indexed: {metric} (indexed: {self.metrics})")
+        if partition is not None:
+            if partition[0] not in self.partitions:
+                raise ValueError(f"Not a partition: {partition[0]} (partitions: {self.partitions})")
+            partition = (partition[0], str(partition[1]))
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must be >= 0")
+        if offset + limit > self.k:
+            raise ValueError(f"Only the top {self.k} rows are indexed")
+
+        positions = self._order.get((metric, partition), np.empty(0, dtype=np.int64))
+        return self.rows.iloc[positions[offset:offset + limit]].drop(columns="_seq")
+
+    def lookup(
+        self,
+        filters: dict[str, list[str] | None],
+        sort: str | None,
+        descending: bool,
+        offset: int,
+        limit: int,
+    ) -> tuple[int, pd.DataFrame] | None:
+        """
+        (total, page) for a paged-view query when the index can answer it
+        exactly: a descending sort on an indexed metric, at most one
+        filter with a single value of a partition column, and a page
+        inside the top k. None otherwise (use filter_frame + page_frame).
+        """
+        limit = min(limit, MAX_PAGE_SIZE)
+        active = {col: values for col, values in filters.items() if values}
+        if self.key is not None or sort not in self.metrics or not descending:
+            return None
+        if offset < 0 or limit < 0 or offset + limit > self.k or len(active) > 1:
+            return None
+
+        partition = None
+        if active:
+            (col, values), = active.items()
+            if col not in self.partitions or len(values) != 1:
+                return None
+            partition = (col, values[0])
+        return self.total(partition), self.page(sort, offset, limit, partition)
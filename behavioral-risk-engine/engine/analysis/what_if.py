@@ -0,0 +1,238 @@
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine.explain.explainer import RiskExplainer
+from engine.utils.decisions import DecisionPolicy, DEFAULT_DECISION_TIERS
+from engine.utils.functions import (
+    DECISIONS,
+    RISK_AUTO,
+    CONF_AUTO,
+    RISK_REVIEW,
+    CONF_REVIEW,
+)
+# --------------------------------------------------
+# What-if re-scoring over cached features
+# --------------------------------------------------
+#
+# Only fusion -> confidence -> decision is re-run, on the feature matrix of
+# the last pipeline run. Scores are rounded to 2 decimals like fuse_risk,
+# so threshold sweeps can be answered from one cumulative 2-D histogram of
+# (risk, confidence) instead of re-deciding every post per grid point.
+
+DEFAULT_THRESHOLDS = {
+    "risk_auto": RISK_AUTO,
+    "conf_auto": CONF_AUTO,
+    "risk_review": RISK_REVIEW,
+    "conf_review": CONF_REVIEW,
+}
+# threshold name -> (tier decision, tier field)
+THRESHOLD_FIELDS = {
+    "risk_auto": ("AUTO_ACTION", "risk"),
+    "conf_auto": ("AUTO_ACTION", "confidence"),
+    "risk_review": ("QUEUE_REVIEW", "risk"),
+    "conf_review": ("QUEUE_REVIEW", "confidence"),
+}
+MAX_GRID_POINTS = 10_000
+
+# scores and confidences have 2 decimals: 0..100 and 0..1 in 0.01 steps
+_RISK_STEPS = 10_001
+_CONF_STEPS = 101
+
+
+def thresholds_to_tiers(thresholds: dict | None = None, tiers: list[dict] | None = None) -> list[dict]:
+    """`tiers` (default: DEFAULT_DECISION_TIERS) with `thresholds` applied over them."""
+    tiers = [dict(t) for t in (tiers or DEFAULT_DECISION_TIERS)]
+    thresholds = thresholds or {}
+    unknown = set(thresholds) - set(THRESHOLD_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+
+    for name, value in thresholds.items():
+        decision, field = THRESHOLD_FIELDS[name]
+        matching = [t for t in tiers if t["decision"] == decision]
+        if not matching:
+            raise ValueError(f"No {decision} tier to apply {name} to")
+        for tier in matching:
+            tier[field] = value
+    return tiers
+
+
+def tiers_to_thresholds(tiers: list[dict] | None = None) -> dict:
+    """Inverse of thresholds_to_tiers for the standard AUTO_ACTION / QUEUE_REVIEW tiers."""
+    tiers = tiers or DEFAULT_DECISION_TIERS
+    if [t["decision"] for t in tiers] != ["AUTO_ACTION", "QUEUE_REVIEW"]:
+        raise ValueError("Threshold sweeps need exactly an AUTO_ACTION then a QUEUE_REVIEW tier")
+    by_decision = {t["decision"]: t for t in tiers}
+    return {
+        name: float(by_decision[decision][field])
+        for name, (decision, field) in THRESHOLD_FIELDS.items()
+    }
+
+
+def _step_index(threshold, scale: int, limit: int) -> np.ndarray:
+    # first 0.01 step that satisfies value >= threshold
+    idx = np.ceil(np.round(np.asarray(threshold, dtype=np.float64) * scale, 6))
+    return np.clip(idx, 0, limit).astype(np.int64)
+
+
+class WhatIfScorer:
+    """
+    Re-scores the posts of a pipeline run under other fusion weights and
+    decision thresholds.
+
+    With the pipeline's own weights and decision tiers (pass the
+    pipeline's `decision_tiers`) it reproduces the cached decisions
+    exactly; everything else is reported as counts, deltas and decision
+    transitions against that baseline. Requested thresholds are applied
+    over those tiers.
+    """
+
+    def __init__(
+        self,
+        posts: pd.DataFrame,
+        weights: dict[str, float],
+        tiers: list[dict] | None = None,
+    ):
+        self.weights = dict(weights)
+        self.tiers = tiers or DEFAULT_DECISION_TIERS
+        self.features = [f for f in self.weights if f in posts.columns]
+        self.X = posts[self.features].fillna(0.0).to_numpy()
+        self.risk_dtype = posts["risk_score"].dtype
+
+        self.signal_names = list(RiskExplainer.SIGNAL_THRESHOLDS)
+        self.signals = posts.reindex(columns=self.signal_names, fill_value=0.0).fillna(0.0).to_numpy(np.float64)
+        self.confidence = posts["confidence"].to_numpy(np.float64)
+
+        self.baseline = pd.Categorical(posts["decision"].astype(str), categories=DECISIONS).codes.astype(np.int8)
+        self.baseline_counts = np.bincount(self.baseline, minlength=len(DECISIONS))
+
+    # --------------------------------------------------
+    # Vectorised fusion / confidence
+    # --------------------------------------------------
+    def risk(self, weights: dict[str, float] | None = None) -> np.ndarray:
+        """fuse_risk over the cached matrix (same summation order and rounding)."""
+        w = {**self.weights, **(weights or {})}
+        unknown = set(w) - set(self.weights)
+        if unknown:
+            raise ValueError(f"Unknown weights: {sorted(unknown)}")
+
+        raw = np.zeros(len(self.X), dtype=np.float64)
+        for j, f in enumerate(self.features):
+            raw += self.X[:, j] * float(w[f])
+        risk = (np.clip(raw, 0.0, 1.0) * 100.0).round(2)
+        return risk.astype(self.risk_dtype).astype(np.float64)
+
+    def confidence_for(self, signal_thresholds: dict[str, float] | None = None) -> np.ndarray:
+        if not signal_thresholds:
+            return self.confidence
+        t = {**RiskExplainer.SIGNAL_THRESHOLDS, **signal_thresholds}
+        unknown = set(t) - set(self.signal_names)
+        if unknown:
+            raise ValueError(f"Unknown signal thresholds: {sorted(unknown)}")
+        return RiskExplainer.confidence_vector(self.signals, [t[s] for s in self.signal_names])
+
+    # --------------------------------------------------
+    # Single scenario
+    # --------------------------------------------------
+    def score(
+        self,
+        weights: dict[str, float] | None = None,
+        thresholds: dict[str, float] | None = None,
+        signal_thresholds: dict[str, float] | None = None,
+    ) -> dict:
+        start = time.perf_counter()
+
+        risk = self.risk(weights)
+        confidence = self.confidence_for(signal_thresholds)
+        codes = DecisionPolicy(thresholds_to_tiers(thresholds, self.tiers)).decide_codes(risk, confidence)
+
+        k = len(DECISIONS)
+        counts = np.bincount(codes, minlength=k)
+        moves = np.bincount(self.baseline.astype(np.int64) * k + codes, minlength=k * k).reshape(k, k)
+        transitions = {
+            f"{DECISIONS[a]}->{DECISIONS[b]}": int(moves[a, b])
+            for a in range(k) for b in range(k)
+            if a != b and moves[a, b]
+        }
+
+        return {
+            "posts": len(codes),
+            "counts": self._as_dict(counts),
+            "baseline": self._as_dict(self.baseline_counts),
+            "delta": self._as_dict(counts - self.baseline_counts),
+            "changed": int(len(codes) - np.trace(moves)),
+            "transitions": transitions,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    # --------------------------------------------------
+    # Threshold grid
+    # --------------------------------------------------
+    def sweep(
+        self,
+        grid: dict[str, list[float]],
+        weights: dict[str, float] | None = None,
+        signal_thresholds: dict[str, float] | None = None,
+    ) -> dict:
+        """
+        Decision counts for every combination of the threshold values in
+        `grid` (keys of DEFAULT_THRESHOLDS; missing keys keep the value of
+        the scorer's tiers). One fusion pass, then O(1) per grid point.
+        """
+        start = time.perf_counter()
+
+        unknown = set(grid) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+        base = tiers_to_thresholds(self.tiers)
+        names = list(DEFAULT_THRESHOLDS)
+        axes = [list(grid.get(n) or [base[n]]) for n in names]
+        points = int(np.prod([len(a) for a in axes]))
+        if points > MAX_GRID_POINTS:
+            raise ValueError(f"Grid has {points} points (max {MAX_GRID_POINTS})")
+
+        risk = self.risk(weights)
+        confidence = self.confidence_for(signal_thresholds)
+
+        # above[i, j] = #posts with risk >= i / 100 and confidence >= j / 100
+        ri = np.rint(risk * 100).astype(np.int64)
+        ci = np.rint(confidence * 100).astype(np.int64)
+        hist = np.bincount(ri * _CONF_STEPS + ci, minlength=_RISK_STEPS * _CONF_STEPS)
+        above = np.zeros((_RISK_STEPS + 1, _CONF_STEPS + 1), dtype=np.int64)
+        above[:-1, :-1] = hist.reshape(_RISK_STEPS, _CONF_STEPS)[::-1, ::-1].cumsum(0).cumsum(1)[::-1, ::-1]
+
+        combos = np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, 4)
+        ra = _step_index(combos[:, 0], 100, _RISK_STEPS)
+        ca = _step_index(combos[:, 1], 100, _CONF_STEPS)
+        rr = _step_index(combos[:, 2], 100, _RISK_STEPS)
+        cr = _step_index(combos[:, 3], 100, _CONF_STEPS)
+
+        # AUTO wins first; QUEUE = review orthant minus its overlap with AUTO
+        auto = above[ra, ca]
+        queue = above[rr, cr] - above[np.maximum(ra, rr), np.maximum(ca, cr)]
+        none = len(risk) - auto - queue
+
+        by_decision = {"AUTO_ACTION": auto, "QUEUE_REVIEW": queue, "NO_ACTION": none}
+        table = np.stack([by_decision[d] for d in DECISIONS], axis=1)
+
+        results = []
+        for point, counts in zip(combos.tolist(), table):
+            results.append({
+                "thresholds": dict(zip(names, point)),
+                "counts": self._as_dict(counts),
+                "delta": self._as_dict(counts - self.baseline_counts),
+            })
+
+        return {
+            "posts": len(risk),
+            "baseline": self._as_dict(self.baseline_counts),
+            "results": results,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    @staticmethod
+    def _as_dict(counts) -> dict[str, int]:
+        return {d: int(c) for d, c in zip(DECISIONS, counts)}
@@ -1,10 +1,32 @@
+import numpy as np
 import pandas as pd
 
+from engine.store.account_features import AccountFeatureStore
+
+# Bit position of each flag in the compact `flags` bitmask
+ACCOUNT_FLAGS = [
+    "young_account",
+    "high_posting_rate",
+    "duplicate_content",
+    "coordinated_activity",
+    "coordinated_group",
+    "synchronized_posting",
+]
+
+
+def decode_flags(bits: int) -> list[str]:
+    return [f for i, f in enumerate(ACCOUNT_FLAGS) if bits & (1 << i)]
+
 
 def score_accounts(
     df_posts: pd.DataFrame,
     duplicate_post_ids: set,
-    coordinated_post_ids: set
+    coordinated_post_ids: set,
+    compact: bool = False,
+    coactive_account_ids: set | None = None,
+    synchronized_account_ids: set | None = None,
+    account_features: pd.DataFrame | None = None,
+    peak_posts_per_hour: int = 5,
 ):
     """
     Score accounts based on behavioral heuristics.
@@ -18,6 +40,18 @@ def score_accounts(
         Post IDs involved in duplicate / near-duplicate content
     coordinated_post_ids : set
         Post IDs involved in coordinated temporal bursts
+    compact : bool
+        Store flags as a uint8 bitmask over ACCOUNT_FLAGS instead of lists
+    coactive_account_ids : set, optional
+        Accounts in a co-activity group (detect_coactive_accounts)
+    synchronized_account_ids : set, optional
+        Accounts that repeatedly post within seconds of the same partner
+        (detect_synchronous_pairs)
+    account_features : pd.DataFrame, optional
+        Per-account rolling features (AccountFeatureStore.advance), e.g.
+        with the account's history; computed from this batch when omitted
+    peak_posts_per_hour : int
+        High posting rate: more posts than this in some trailing hour
 
     Returns
     -------
@@ -29,45 +63,56 @@ def score_accounts(
     if not required.issubset(df_posts.columns):
         raise ValueError(f"df_posts must contain columns: {required}")
 
-    df_posts = df_posts.copy()
-    df_posts["timestamp"] = pd.to_datetime(df_posts["timestamp"])
+    if account_features is None:
+        _, account_features = AccountFeatureStore().advance(
+            df_posts, duplicate_post_ids, coordinated_post_ids
+        )
 
-    account_rows = []
+    account_ids = df_posts.groupby("account_id", observed=True).size().index
+    if account_ids.empty:
+        return pd.DataFrame()
+    first = df_posts.drop_duplicates("account_id").set_index("account_id")
+    peak_1h = account_features.set_index("account_id")["peak_1h"]
 
-    for account_id, group in df_posts.groupby("account_id"):
-        score = 0
-        flags = []
+    def any_post(post_ids: set) -> pd.Series:
+        hit = df_posts["post_id"].isin(post_ids)
+        return hit.groupby(df_posts["account_id"], observed=True).any().reindex(account_ids)
 
+    rules = [
         # Rule 1: Young account
-        if group["account_age_days"].iloc[0] < 30:
-            score += 30
-            flags.append("young_account")
-
-        # Rule 2: High posting rate
-        duration_hours = max(
-            (group["timestamp"].max() - group["timestamp"].min()).total_seconds() / 3600,
-            1
-        )
-        posting_rate = len(group) / duration_hours
-        if posting_rate > 5:
-            score += 30
-            flags.append("high_posting_rate")
-
+        ("young_account", 30, first["account_age_days"].reindex(account_ids) < 30),
+        # Rule 2: High posting rate, in the account's busiest trailing hour
+        # (a burst counts even when the account is quiet the rest of the time)
+        ("high_posting_rate", 30, peak_1h.reindex(account_ids.astype(str)) > peak_posts_per_hour),
         # Rule 3: Duplicate content
-        if set(group["post_id"]).intersection(duplicate_post_ids):
-            score += 20
-            flags.append("duplicate_content")
-
+        ("duplicate_content", 20, any_post(duplicate_post_ids)),
         # Rule 4: Coordinated bursts
-        if set(group["post_id"]).intersection(coordinated_post_ids):
-            score += 20
-            flags.append("coordinated_activity")
-
-        account_rows.append({
-            "account_id": account_id,
-            "bot_score": min(score, 100),
-            "suspicious": score >= 70,
-            "flags": flags
-        })
-
-    return pd.DataFrame(account_rows)
+        ("coordinated_activity", 20, any_post(coordinated_post_ids)),
+        # Rule 5: Member of a co-activity group
+        ("coordinated_group", 20, account_ids.isin(list(coactive_account_ids or ()))),
+        # Rule 6: Repeated pairwise synchrony
+        ("synchronized_posting", 20, account_ids.isin(list(synchronized_account_ids or ()))),
+    ]
+
+    score = np.zeros(len(account_ids), dtype=np.int64)
+    bits = np.zeros(len(account_ids), dtype=np.int64)
+    for flag, points, hit in rules:
+        hit = np.asarray(hit, dtype=bool)
+        score += hit * points
+        bits |= hit.astype(np.int64) << ACCOUNT_FLAGS.index(flag)
+
+    accounts = pd.DataFrame({
+        "account_id": account_ids.to_numpy(),
+        "bot_score": np.minimum(score, 100),
+        "suspicious": score >= 70,
+        "flags": bits,
+    })
+
+    if compact:
+        accounts["account_id"] = accounts["account_id"].astype("category")
+        accounts["bot_score"] = accounts["bot_score"].astype("uint8")
+        accounts["flags"] = accounts["flags"].astype("uint8")
+    else:
+        accounts["flags"] = accounts["flags"].map(decode_flags)
+
+    return accounts
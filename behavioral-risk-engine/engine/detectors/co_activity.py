@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+COACTIVITY_COLUMNS = [
+    "account_id",
+    "coactivity_group",
+    "coactivity_group_size",
+    "coactive_partners",
+    "max_shared_events",
+]
+
+
+def detect_coactive_accounts(
+    df: pd.DataFrame,
+    window: str = "1h",
+    min_shared: int = 2,
+    min_group_size: int = 3,
+    max_event_accounts: int = 1000,
+):
+    """
+    Detect groups of accounts that repeatedly post the same content in the
+    same time window.
+
+    An event is one (duplicate cluster, time bin) pair. Accounts are linked
+    when they share at least `min_shared` events; coordinated groups are
+    the connected components of that graph. Everything is sparse algebra:
+    an account x event incidence matrix B, projected to the account x
+    account co-occurrence counts B @ B.T.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Must contain columns: ['account_id', 'timestamp', 'cluster_id']
+    window : str
+        Time bin width (e.g. '10min', '1h')
+    min_shared : int
+        Minimum number of shared events for two accounts to be linked
+    min_group_size : int
+        Minimum number of accounts in a reported group
+    max_event_accounts : int
+        Events with more accounts than this are ignored (ubiquitous
+        phrases; they would add n^2 / 2 pairs each)
+
+    Returns
+    -------
+    coactive_account_ids : set
+        Accounts that belong to a coordinated group
+    accounts : pd.DataFrame
+        One row per account: coactivity_group (-1 = none),
+        coactivity_group_size, coactive_partners, max_shared_events
+    """
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+
+    required = {"account_id", "timestamp", "cluster_id"}
+    if not required.issubset(df.columns):
+        raise ValueError(f"DataFrame must contain columns: {required}")
+
+    account_codes, account_ids = pd.factorize(df["account_id"])
+    n_accounts = len(account_ids)
+    if n_accounts == 0:
+        return set(), pd.DataFrame(columns=COACTIVITY_COLUMNS)
+
+    # --------------------------------------------------
+    # Account x (cluster, time bin) incidence
+    # --------------------------------------------------
+    # time bins of naive UTC (offset-aware input converted, naive kept)
+    bins = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(None).dt.floor(window)
+    cluster_codes, _ = pd.factorize(df["cluster_id"])
+    bin_codes, bin_values = pd.factorize(bins)
+    # posts without an account, cluster or time (code -1) are in no event;
+    # left in, -1 would alias the previous cluster's last bin
+    valid = (account_codes >= 0) & (cluster_codes >= 0) & (bin_codes >= 0)
+    event_codes, events = pd.factorize(
+        cluster_codes[valid].astype(np.int64) * max(len(bin_values), 1) + bin_codes[valid]
+    )
+
+    incidence = sp.csr_matrix(
+        (np.ones(len(event_codes), dtype=np.float32), (account_codes[valid], event_codes)),
+        shape=(n_accounts, len(events)),
+    )
+    incidence.sum_duplicates()
+    incidence.data[:] = 1.0  # several posts in one event count once
+
+    event_sizes = np.bincount(incidence.indices, minlength=len(events))
+    keep = (event_sizes >= 2) & (event_sizes <= max_event_accounts)
+    incidence = incidence.tocsc()[:, keep].tocsr()
+
+    # --------------------------------------------------
+    # Account x account projection -> groups
+    # --------------------------------------------------
+    shared = (incidence @ incidence.T).tocsr()
+    shared = (shared - sp.diags(shared.diagonal())).tocsr()
+    shared.data[shared.data < min_shared] = 0
+    shared.eliminate_zeros()
+
+    _, labels = connected_components(shared, directed=False)
+    sizes = np.bincount(labels)[labels]
+    in_group = sizes >= min_group_size
+
+    group = np.full(n_accounts, -1, dtype=np.int64)
+    group[in_group] = pd.factorize(labels[in_group])[0]
+
+    accounts = pd.DataFrame({
+        "account_id": np.asarray(account_ids),
+        "coactivity_group": group,
+        "coactivity_group_size": np.where(in_group, sizes, 0),
+        "coactive_partners": np.diff(shared.indptr),
+        "max_shared_events": shared.max(axis=1).toarray().ravel().astype(np.int64),
+    })
+
+    coactive_account_ids = set(accounts.loc[in_group, "account_id"].tolist())
+    return coactive_account_ids, accounts
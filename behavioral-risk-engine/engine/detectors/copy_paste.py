@@ -1,18 +1,78 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.cluster import AgglomerativeClustering
 from engine.utils.functions import preprocess
+from engine.encoders.backends import get_encoder
+from typing import NamedTuple
+
+import hashlib
+import numpy as np
 import pandas as pd
-import torch
 
-def detect_duplicates(df):
+
+class SimilarityStats(NamedTuple):
+    """
+    Per-post similarity summary used instead of the dense (n, n) matrix in
+    lexical mode and when matching against a campaign library.
+
+    row_max  : highest similarity to any other post
+    row_mean : mean similarity to all posts (self excluded, as in the dense path)
+    graph    : sparse (n, n) CSR of pairs at or above the threshold
+    """
+    row_max: np.ndarray
+    row_mean: np.ndarray
+    graph: object
+
+
+def detect_duplicates(
+    df,
+    encoder=None,
+    threshold=0.85,
+    refine_encoder=None,
+    refine_min=0.6,
+    block_rows=1024,
+    workers=1,
+    campaigns=None,
+    campaign_threshold=None,
+    campaign_min_members=3,
+    strategy="dense",
+    max_component=None,
+    campaign_batch=None,
+):
     """
     Detects duplicate and near-duplicate posts.
 
+    `encoder` is any engine.encoders backend (default: PyTorch
+    SentenceTransformer); float16 / int8 vectors are compared in float32.
+
+    Backends that return sparse vectors (hashed_ngram) switch to lexical
+    mode: neighbours come from blocked sparse products, clusters are the
+    connected components of the threshold graph and no dense matrix is
+    built. In that mode `refine_encoder` (e.g. the semantic default) is
+    run only on the ambiguous posts, whose best lexical match falls in
+    [refine_min, threshold). `workers` > 1 runs the neighbour blocks in
+    a process pool over shared memory.
+
+    With a `campaigns` library (engine.store.campaigns, dense encoders
+    only) posts are first matched to the centroids of known campaigns
+    (cosine >= `campaign_threshold`, default `threshold`); only the
+    unmatched ones are compared pairwise and clustered. Matched posts
+    count as duplicates and are grouped by campaign, and the run is folded
+    back into the library (new clusters of at least `campaign_min_members`
+    posts become campaigns). The batch is identified in the library by
+    `campaign_batch` (default: a digest of its post ids and texts).
+
+    `strategy` (normally chosen by engine.pipeline.planner) picks how
+    dense embeddings are compared: "dense" builds the (n, n) matrix,
+    "blocked" takes `block_rows` rows of similarities at a time and runs
+    complete linkage per connected component of the threshold graph
+    (same clusters, since complete-linkage clusters never span two
+    components). Components above `max_component` posts keep their
+    component as the cluster instead.
+
     Returns:
         duplicate_post_ids : set[int]
-        similarity_matrix  : np.ndarray
-        clusters_df        : pd.DataFrame (post_id, cluster_id)
+        similarity_matrix  : np.ndarray (SimilarityStats in lexical mode or
+                             with a campaign library)
+        clusters_df        : pd.DataFrame (post_id, cluster_id; plus
+                             campaign_id with a campaign library)
     """
 
     df = df.copy()
@@ -20,23 +80,44 @@ def detect_duplicates(df):
     # Preprocess
     df["clean_text"] = df["text"].apply(preprocess)
 
+    import scipy.sparse as sp
+    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.cluster import AgglomerativeClustering
+
     # Embeddings
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer("all-MiniLM-L6-v2", device=device)
-    embeddings = model.encode(df["clean_text"].tolist())
+    encoder = encoder or get_encoder()
+    embeddings = encoder.encode(df["clean_text"].tolist())
+
+    if sp.issparse(embeddings):
+        return _detect_lexical(
+            df, embeddings, threshold, refine_encoder, refine_min, block_rows, workers
+        )
+
+    if campaigns is not None:
+        return _detect_with_campaigns(
+            df, embeddings, threshold, campaigns,
+            threshold if campaign_threshold is None else campaign_threshold,
+            campaign_min_members, strategy, block_rows, max_component,
+            batch=campaign_batch,
+        )
 
-    similarity_matrix = cosine_similarity(embeddings)
+    if strategy == "blocked":
+        x = _normalize_rows(embeddings)
+        labels, row_max, graph = _cluster_pairs(x, threshold, strategy, block_rows, max_component)
+        df["cluster_id"] = labels
 
-    # Threshold
-    threshold = 0.85
+        linked = np.diff(graph.indptr) > 0
+        duplicate_post_ids = set(df["post_id"].to_numpy()[linked].tolist())
+        stats = SimilarityStats(row_max=row_max, row_mean=_dense_row_mean(x), graph=graph)
+        return duplicate_post_ids, stats, df[["post_id", "cluster_id"]]
+    if strategy != "dense":
+        raise ValueError(f"Unknown duplicate strategy: {strategy}")
 
-    duplicate_post_ids = set()
-    for i in range(len(similarity_matrix)):
-        for j in range(i + 1, len(similarity_matrix)):
-            
-            if similarity_matrix[i][j] >= threshold:
-                duplicate_post_ids.add(df.iloc[i]["post_id"])
-                duplicate_post_ids.add(df.iloc[j]["post_id"])
+    similarity_matrix = cosine_similarity(embeddings.astype(np.float32))
+
+    i, j = np.nonzero(np.triu(similarity_matrix >= threshold, k=1))
+    post_ids = df["post_id"].to_numpy()
+    duplicate_post_ids = set(post_ids[np.union1d(i, j)].tolist())
 
     # Clustering
     distance_matrix = 1 - similarity_matrix
@@ -52,3 +133,292 @@ def detect_duplicates(df):
     clusters_df = df[["post_id", "cluster_id"]]
 
     return duplicate_post_ids, similarity_matrix, clusters_df
+
+
+# --------------------------------------------------
+# Lexical mode (sparse vectors, no dense n x n matrix)
+# --------------------------------------------------
+def sparse_neighbours(x, threshold: float = 0.85, block_rows: int = 1024, workers: int = 1):
+    """
+    Cosine neighbours of L2-normalised sparse rows, one block of rows at a
+    time (block @ X.T), so only `block_rows` rows of similarities are held
+    at once.
+
+    With workers > 1 the blocks run in a process pool; X is placed in
+    shared memory once and workers attach to it (engine.utils.shared)
+    instead of each receiving a pickled copy.
+
+    Returns
+    -------
+    graph : scipy.sparse.csr_matrix
+        Symmetric (n, n) pairs with similarity >= threshold, no diagonal
+    row_max : np.ndarray
+        Highest similarity of each row to any other row
+    """
+    import scipy.sparse as sp
+
+    x = sp.csr_matrix(x, dtype=np.float32)
+    n = x.shape[0]
+    xt = x.T.tocsr()
+    starts = list(range(0, n, block_rows))
+
+    if workers > 1 and len(starts) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from engine.utils.shared import SharedArena
+
+        with SharedArena() as arena, ProcessPoolExecutor(workers) as pool:
+            xh, xth = arena.put_csr(x), arena.put_csr(xt)
+            parts = list(pool.map(
+                _neighbour_block,
+                [xh] * len(starts), [xth] * len(starts),
+                starts, [block_rows] * len(starts), [threshold] * len(starts),
+            ))
+    else:
+        parts = [_neighbour_block(x, xt, s, block_rows, threshold) for s in starts]
+
+    row_max = np.zeros(n, dtype=np.float32)
+    rows, cols, vals = [np.empty(0, np.int64)], [np.empty(0, np.int64)], [np.empty(0, np.float32)]
+    for start, (r, c, v, block_max) in zip(starts, parts):
+        row_max[start:start + len(block_max)] = block_max
+        rows.append(r)
+        cols.append(c)
+        vals.append(v)
+
+    graph = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, n),
+    )
+    return graph, row_max
+
+
+def _neighbour_block(x, xt, start, block_rows, threshold):
+    """Rows [start, start + block_rows): threshold edges and row max."""
+    from engine.utils.shared import release, resolve
+
+    try:
+        # views only live inside the call, so release() can close them
+        return _block_edges(resolve(x), resolve(xt), start, block_rows, threshold)
+    finally:
+        release()
+
+
+def _block_edges(x, xt, start, block_rows, threshold):
+    block = (x[start:start + block_rows] @ xt).tocsr()
+
+    # drop self-similarity (tf-idf similarities are >= 0, so 0 is neutral)
+    row_of = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr)) + start
+    block.data[block.indices == row_of] = 0.0
+    block_max = block.max(axis=1).toarray().ravel()
+
+    keep = block.data >= threshold
+    return row_of[keep], block.indices[keep], block.data[keep], block_max
+
+
+def mean_similarity(x) -> np.ndarray:
+    """
+    Mean cosine similarity of each row to all rows, self excluded
+    (sum_j x_i . x_j = x_i . sum_j x_j), in O(nnz) instead of O(n^2).
+    """
+    n = x.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    total = np.asarray(x.sum(axis=0)).ravel()
+    self_sim = np.asarray(x.multiply(x).sum(axis=1)).ravel()
+    return ((x @ total - self_sim) / n).astype(np.float32)
+
+
+def _detect_lexical(df, x, threshold, refine_encoder, refine_min, block_rows, workers):
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+
+    graph, row_max = sparse_neighbours(x, threshold, block_rows, workers)
+
+    # Semantic second opinion only where the lexical score is inconclusive
+    if refine_encoder is not None:
+        ambiguous = np.flatnonzero((row_max >= refine_min) & (row_max < threshold))
+        if len(ambiguous) > 1:
+            vecs = refine_encoder.encode(df["clean_text"].iloc[ambiguous].tolist())
+            vecs = vecs.astype(np.float32)
+            vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+            sims = vecs @ vecs.T
+            np.fill_diagonal(sims, 0.0)
+
+            row_max[ambiguous] = np.maximum(row_max[ambiguous], sims.max(axis=1))
+            r, c = np.nonzero(sims >= threshold)
+            extra = sp.csr_matrix(
+                (sims[r, c], (ambiguous[r], ambiguous[c])), shape=graph.shape
+            )
+            graph = graph.maximum(extra)
+
+    _, labels = connected_components(graph, directed=False)
+    df["cluster_id"] = labels
+
+    linked = np.diff(graph.indptr) > 0
+    duplicate_post_ids = set(df["post_id"].to_numpy()[linked].tolist())
+
+    stats = SimilarityStats(row_max=row_max, row_mean=mean_similarity(x), graph=graph)
+    return duplicate_post_ids, stats, df[["post_id", "cluster_id"]]
+
+
+# --------------------------------------------------
+# Campaign library (known campaigns matched before the pairwise pass)
+# --------------------------------------------------
+def _detect_with_campaigns(
+    df, embeddings, threshold, library, match_threshold, min_members,
+    strategy="dense", block_rows=1024, max_component=None, batch=None,
+):
+    import scipy.sparse as sp
+
+    x = _normalize_rows(embeddings)
+    n = len(x)
+
+    # a batch scored before is matched as it was then: its own campaigns
+    # and centroid moves must not feed back into its scores
+    if batch is None:
+        rows = pd.util.hash_pandas_object(df[["post_id", "clean_text"]], index=False)
+        batch = hashlib.sha256(rows.to_numpy().tobytes()).hexdigest()[:32]
+    known = library.batch_result(batch, match_threshold)
+    if known is not None:
+        campaign_ids, campaign_sim, assigned = known
+    else:
+        campaign_ids, campaign_sim = library.match(x, match_threshold)
+    rest = np.flatnonzero(campaign_ids < 0)
+
+    # Pairwise similarity and clustering for the unmatched posts only
+    labels, rest_max, rest_graph = _cluster_pairs(x[rest], threshold, strategy, block_rows, max_component)
+    row_max = campaign_sim.copy()
+    row_max[rest] = np.maximum(row_max[rest], rest_max)
+    rest_graph = rest_graph.tocoo()
+    graph = sp.csr_matrix(
+        (rest_graph.data, (rest[rest_graph.row], rest[rest_graph.col])), shape=(n, n)
+    )
+
+    # Matched posts: one cluster per campaign, numbered after the new ones
+    cluster_ids = np.empty(n, dtype=np.int64)
+    cluster_ids[rest] = labels
+    matched = campaign_ids >= 0
+    _, codes = np.unique(campaign_ids[matched], return_inverse=True)
+    cluster_ids[matched] = labels.max(initial=-1) + 1 + codes
+    df["cluster_id"] = cluster_ids
+
+    linked = matched | (np.diff(graph.indptr) > 0)
+    duplicate_post_ids = set(df["post_id"].to_numpy()[linked].tolist())
+
+    if known is not None:
+        df["campaign_id"] = assigned
+    else:
+        df["campaign_id"] = library.record(
+            x,
+            campaign_ids,
+            cluster_ids,
+            df["timestamp"],
+            narratives=df["narrative"] if "narrative" in df.columns else None,
+            min_members=min_members,
+            batch=batch,
+            scores=campaign_sim,
+            threshold=match_threshold,
+        )
+
+    stats = SimilarityStats(row_max=row_max, row_mean=_dense_row_mean(x), graph=graph)
+    return duplicate_post_ids, stats, df[["post_id", "cluster_id", "campaign_id"]]
+
+
+# --------------------------------------------------
+# Dense embeddings without the (n, n) matrix
+# --------------------------------------------------
+def _normalize_rows(embeddings) -> np.ndarray:
+    x = np.asarray(embeddings, dtype=np.float32).copy()
+    x /= np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+    return x
+
+
+def _dense_row_mean(x: np.ndarray) -> np.ndarray:
+    """Mean similarity to all rows, self excluded, as in the dense path."""
+    n = len(x)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    return ((x @ x.sum(axis=0) - (x * x).sum(axis=1)) / n).astype(np.float32)
+
+
+def dense_neighbours(x: np.ndarray, threshold: float = 0.85, block_rows: int = 1024):
+    """
+    sparse_neighbours for L2-normalised dense rows: `block_rows` rows of
+    similarities (block @ X.T) at a time instead of the (n, n) matrix.
+    """
+    import scipy.sparse as sp
+
+    n = len(x)
+    row_max = np.zeros(n, dtype=np.float32)
+    rows, cols, vals = [np.empty(0, np.int64)], [np.empty(0, np.int64)], [np.empty(0, np.float32)]
+    for start in range(0, n, block_rows):
+        block = x[start:start + block_rows] @ x.T
+        local = np.arange(len(block))
+        block[local, local + start] = 0.0   # as the dense path: self excluded
+        row_max[start:start + len(block)] = block.max(axis=1)
+
+        r, c = np.nonzero(block >= threshold)
+        rows.append(r + start)
+        cols.append(c)
+        vals.append(block[r, c])
+
+    graph = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, n),
+    )
+    return graph, row_max
+
+
+def _complete_linkage(sims: np.ndarray, threshold: float) -> np.ndarray:
+    from sklearn.cluster import AgglomerativeClustering
+
+    if len(sims) < 2:
+        return np.zeros(len(sims), dtype=np.int64)
+    np.fill_diagonal(sims, 1.0)
+    return AgglomerativeClustering(
+        n_clusters=None,
+        metric="precomputed",
+        linkage="complete",
+        distance_threshold=1 - threshold,
+    ).fit_predict(1 - sims)
+
+
+def _cluster_pairs(x, threshold, strategy="dense", block_rows=1024, max_component=None):
+    """
+    Duplicate clusters of L2-normalised rows: (labels, row_max, threshold
+    graph). See detect_duplicates for the strategies.
+    """
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(x)
+    if strategy == "dense":
+        sims = x @ x.T
+        np.fill_diagonal(sims, 0.0)
+        row_max = sims.max(axis=1) if n > 1 else np.zeros(n, dtype=np.float32)
+        r, c = np.nonzero(sims >= threshold)
+        graph = sp.csr_matrix((sims[r, c], (r, c)), shape=(n, n))
+        return _complete_linkage(sims, threshold), row_max, graph
+    if strategy != "blocked":
+        raise ValueError(f"Unknown duplicate strategy: {strategy}")
+
+    graph, row_max = dense_neighbours(x, threshold, block_rows)
+    n_components, components = connected_components(graph, directed=False)
+
+    # a component whose posts are all pairwise linked (pairs, cliques) is
+    # one complete-linkage cluster already; only the others are clustered
+    sizes = np.bincount(components, minlength=n_components)
+    edges = np.bincount(components, weights=np.diff(graph.indptr), minlength=n_components)
+    split = np.flatnonzero((sizes > 2) & (edges < sizes * (sizes - 1)))
+    if max_component is not None:
+        split = split[sizes[split] <= max_component]
+
+    labels = components.astype(np.int64)
+    next_label = n_components
+    order = np.argsort(components, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    for comp in split:
+        idx = order[starts[comp]:starts[comp + 1]]
+        sub = _complete_linkage(x[idx] @ x[idx].T, threshold)
+        labels[idx] = np.where(sub == 0, comp, next_label + sub - 1)
+        next_label += sub.max()
+    return labels, row_max, graph
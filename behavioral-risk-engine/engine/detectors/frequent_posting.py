@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from engine.store.events import CoordinationEvents
+
 
 def detect_coordinated_posts(
     df: pd.DataFrame,
@@ -22,49 +25,46 @@ def detect_coordinated_posts(
     -------
     coordinated_post_ids : set
         Set of post_ids involved in coordinated bursts
-    events : list of dict
-        Metadata about each detected burst
+    events : CoordinationEvents
+        Columnar event / event -> post tables with interval and post
+        indexes (iterating it yields the former event dicts)
     """
 
     if not {"post_id", "timestamp", "narrative"}.issubset(df.columns):
         raise ValueError("DataFrame must contain post_id, timestamp, narrative")
 
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-    coordinated_post_ids = set()
-    events = []
-
-    for narrative, group in df.groupby("narrative"):
-        if narrative == "OTHER":
-            continue
-
-        time_counts = (
-            group.set_index("timestamp")
-            .resample(window)
-            .size()
-        )
-
-        spike_windows = time_counts[time_counts >= min_posts]
-
-        for window_start, count in spike_windows.items():
-            window_end = window_start + pd.Timedelta(window)
-
-            window_posts = group[
-                (group["timestamp"] >= window_start) &
-                (group["timestamp"] < window_end)
-            ]
-
-            post_ids = window_posts["post_id"].tolist()
-
-            coordinated_post_ids.update(post_ids)
-
-            events.append({
-                "narrative": narrative,
-                "window_start": window_start,
-                "window_end": window_end,
-                "num_posts": len(post_ids),
-                "post_ids": post_ids
-            })
-
-    return coordinated_post_ids, events
+    timestamps = pd.to_datetime(df["timestamp"])
+    narratives = df["narrative"].astype(object)
+    keep = (narratives != "OTHER").to_numpy() & narratives.notna().to_numpy() & timestamps.notna().to_numpy()
+    posts = pd.DataFrame({
+        "post_id": df["post_id"].to_numpy()[keep],
+        "timestamp": timestamps.to_numpy()[keep],
+        "narrative": narratives.to_numpy()[keep],
+    })
+    if posts.empty:
+        return set(), CoordinationEvents()
+
+    # Same bins as resample(window) per narrative: anchored at midnight of
+    # the narrative's first day
+    width = pd.Timedelta(window)
+    origin = posts.groupby("narrative")["timestamp"].transform("min").dt.normalize()
+    posts["window_start"] = origin + ((posts["timestamp"] - origin) // width) * width
+
+    counts = posts.groupby(["narrative", "window_start"]).size()
+    bursts = counts[counts >= min_posts]
+    if bursts.empty:
+        return set(), CoordinationEvents()
+
+    events = bursts.rename("num_posts").reset_index()
+    events.insert(0, "event_id", np.arange(len(events)))
+    events["window_end"] = events["window_start"] + width
+
+    members = posts.merge(
+        events[["narrative", "window_start", "event_id"]],
+        on=["narrative", "window_start"],
+    )
+    # posts of an event in input order, events in (narrative, time) order
+    members = members.sort_values("event_id", kind="stable")[["event_id", "post_id"]]
+
+    coordinated_post_ids = set(members["post_id"].tolist())
+    return coordinated_post_ids, CoordinationEvents(events, members)
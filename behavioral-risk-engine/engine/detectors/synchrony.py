@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+SYNCHRONY_COLUMNS = [
+    "account_id",
+    "sync_partners",
+    "max_pair_syncs",
+    "total_syncs",
+]
+PAIR_COLUMNS = ["account_a", "account_b", "sync_count"]
+
+
+def detect_synchronous_pairs(
+    df: pd.DataFrame,
+    group_col: str = "cluster_id",
+    max_lag: str = "30s",
+    min_repeats: int = 2,
+    max_partners: int = 50,
+):
+    """
+    Detect account pairs that repeatedly post into the same group (duplicate
+    cluster or narrative) within `max_lag` of each other.
+
+    Posts are sorted once by (group, timestamp); each post's partners are
+    the following posts of its group up to `max_lag` later, found with one
+    searchsorted over a monotone (group, time) key. This is O(n log n)
+    plus the number of emitted pairs, instead of all-pairs.
+
+    A pair is counted once per occasion: within a group, its co-posts form
+    one occasion until more than `max_lag` passes between two of them. So
+    one burst with several posts per account adds one, and repeated
+    synchrony across occasions adds up.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Must contain columns: ['account_id', 'timestamp', group_col]
+    group_col : str
+        Column whose values define where synchrony is looked for
+    max_lag : str
+        Maximum time between two posts (pandas Timedelta string)
+    min_repeats : int
+        Minimum number of occasions for a pair to count as synchronized
+    max_partners : int
+        Cap on partners taken per post (bounds the output in huge bursts)
+
+    Returns
+    -------
+    synchronized_account_ids : set
+        Accounts in at least one pair with >= min_repeats occasions
+    accounts : pd.DataFrame
+        Per account: sync_partners, max_pair_syncs, total_syncs
+        (over pairs with >= min_repeats occasions)
+    pairs : pd.DataFrame
+        account_a, account_b, sync_count for the synchronized pairs
+    """
+    import scipy.sparse as sp
+
+    required = {"account_id", "timestamp", group_col}
+    if not required.issubset(df.columns):
+        raise ValueError(f"DataFrame must contain columns: {required}")
+
+    empty = (set(), pd.DataFrame(columns=SYNCHRONY_COLUMNS), pd.DataFrame(columns=PAIR_COLUMNS))
+    if df.empty:
+        return empty
+
+    lag_ms = int(pd.Timedelta(max_lag) / pd.Timedelta("1ms"))
+    if lag_ms <= 0:
+        raise ValueError("max_lag must be positive")
+
+    account_codes, account_ids = pd.factorize(df["account_id"])
+    group_codes, _ = pd.factorize(df[group_col])
+    # naive UTC (offset-aware input converted, naive kept)
+    ts = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(None).to_numpy()
+    t = ts.astype("datetime64[ms]").astype(np.int64)
+
+    valid = (group_codes >= 0) & ~np.isnat(ts)  # missing groups / times do not pair
+    account_codes, group_codes, t = account_codes[valid], group_codes[valid], t[valid]
+    if len(t) == 0:
+        return empty
+
+    # --------------------------------------------------
+    # Monotone (group, time) key -> partner ranges
+    # --------------------------------------------------
+    t = t - t.min()
+    span = int(t.max()) + lag_ms + 1
+    if (int(group_codes.max()) + 1) * span >= np.iinfo(np.int64).max:
+        raise ValueError("Time range too large for the synchrony key; split the data")
+
+    key = group_codes.astype(np.int64) * span + t
+    order = np.argsort(key, kind="stable")
+    key, accounts, t = key[order], account_codes[order], t[order]
+    groups = group_codes[order]
+
+    n = len(key)
+    end = np.searchsorted(key, key + lag_ms, side="right")
+    counts = np.minimum(end - np.arange(n) - 1, max_partners)
+
+    src = np.repeat(np.arange(n), counts)
+    step = np.arange(len(src)) - np.repeat(np.cumsum(counts) - counts, counts)
+    dst = src + 1 + step
+
+    a, b = accounts[src], accounts[dst]
+    cross = a != b
+    src, a, b = src[cross], a[cross], b[cross]
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+
+    # --------------------------------------------------
+    # One count per (pair, occasion), summed per pair
+    # --------------------------------------------------
+    # a pair's co-posts in one group, in time order; a gap of more than
+    # max_lag starts a new occasion
+    g, ts = groups[src], t[src]
+    order = np.lexsort((ts, g, hi, lo))
+    lo, hi, g, ts = lo[order], hi[order], g[order], ts[order]
+    same = (lo[1:] == lo[:-1]) & (hi[1:] == hi[:-1]) & (g[1:] == g[:-1])
+    starts = np.r_[True, ~same | (np.diff(ts) > lag_ms)][:len(lo)]
+
+    n_accounts = len(account_ids)
+    pair_counts = sp.coo_matrix(
+        (starts.astype(np.int64), (lo, hi)),
+        shape=(n_accounts, n_accounts),
+    ).tocsr()
+    pair_counts.sum_duplicates()
+    pair_counts.data[pair_counts.data < min_repeats] = 0
+    pair_counts.eliminate_zeros()
+
+    if pair_counts.nnz == 0:
+        return empty
+
+    # --------------------------------------------------
+    # Per-account repeated-synchrony scores
+    # --------------------------------------------------
+    both = (pair_counts + pair_counts.T).tocsr()
+    ids = np.asarray(account_ids)
+    accounts_df = pd.DataFrame({
+        "account_id": ids,
+        "sync_partners": np.diff(both.indptr),
+        "max_pair_syncs": both.max(axis=1).toarray().ravel(),
+        "total_syncs": np.asarray(both.sum(axis=1)).ravel(),
+    })
+    accounts_df = accounts_df[accounts_df["sync_partners"] > 0].reset_index(drop=True)
+
+    coo = pair_counts.tocoo()
+    pairs = (
+        pd.DataFrame({
+            "account_a": ids[coo.row],
+            "account_b": ids[coo.col],
+            "sync_count": coo.data,
+        })
+        .sort_values("sync_count", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
+
+    synchronized_account_ids = set(accounts_df["account_id"].tolist())
+    return synchronized_account_ids, accounts_df, pairs
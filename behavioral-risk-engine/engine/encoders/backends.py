@@ -0,0 +1,317 @@
+import os
+
+import numpy as np
+# --------------------------------------------------
+# Text encoder backends for detect_duplicates
+# --------------------------------------------------
+#
+# Every backend exposes encode(texts) -> (n, dim) L2-normalised vectors in
+# its configured output dtype (the lexical hashed_ngram backend returns a
+# sparse CSR matrix instead). Heavy libraries (torch, sentence_transformers,
+# onnxruntime, transformers) are imported on first encode.
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+HF_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+OUTPUT_DTYPES = ("float32", "float16", "int8")
+
+_MODELS = {}
+_SESSIONS = {}
+
+
+def load_encoder(name: str = MODEL_NAME):
+    """SentenceTransformer, loaded once per process and then reused."""
+    if name not in _MODELS:
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        _MODELS[name] = SentenceTransformer(name, device=device)
+    return _MODELS[name]
+
+
+# --------------------------------------------------
+# Shared helpers
+# --------------------------------------------------
+def approx_tokens(texts: list[str]) -> np.ndarray:
+    # word-piece count is ~1.3x words for English posts, +2 special tokens
+    return np.array([int(len(t.split()) * 1.3) + 2 for t in texts])
+
+
+def length_buckets(lengths, max_batch_tokens: int = 8192, max_batch_size: int = 256) -> list[np.ndarray]:
+    """
+    Dynamic batches of similar-length texts: texts are sorted by length and
+    a batch is closed when its padded size (rows x longest row) would pass
+    `max_batch_tokens`, so short posts are not padded to long ones.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(lengths, kind="stable")
+
+    batches, start = [], 0
+    for i in range(len(order)):
+        rows = i - start + 1
+        if rows > 1 and (rows * lengths[order[i]] > max_batch_tokens or rows > max_batch_size):
+            batches.append(order[start:i])
+            start = i
+    if start < len(order):
+        batches.append(order[start:])
+    return batches
+
+
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def quantize_vectors(x: np.ndarray, output_dtype: str = "float32") -> np.ndarray:
+    """Normalised vectors -> float32 / float16 / int8 (scale 127)."""
+    if output_dtype not in OUTPUT_DTYPES:
+        raise ValueError(f"output_dtype must be one of {OUTPUT_DTYPES}")
+    x = l2_normalize(x)
+    if output_dtype == "int8":
+        return np.round(x * 127.0).astype(np.int8)
+    return x.astype(output_dtype)
+
+
+# --------------------------------------------------
+# Backends
+# --------------------------------------------------
+class SentenceTransformerEncoder:
+    """PyTorch SentenceTransformer (default; GPU when available)."""
+
+    def __init__(
+        self,
+        model: str = MODEL_NAME,
+        max_batch_tokens: int = 8192,
+        max_batch_size: int = 128,
+        output_dtype: str = "float32",
+    ):
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.output_dtype = output_dtype
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        model = load_encoder(self.model)
+        out = None
+        for idx in length_buckets(approx_tokens(texts), self.max_batch_tokens, self.max_batch_size):
+            vecs = model.encode(
+                [texts[i] for i in idx],
+                batch_size=len(idx),
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        if out is None:
+            out = np.zeros((0, 0), dtype=np.float32)
+        return quantize_vectors(out, self.output_dtype)
+
+
+class OnnxEncoder:
+    """
+    CPU-optimised backend: an exported (optionally int8-quantised) ONNX copy
+    of the transformer run by onnxruntime, mean pooling + normalisation
+    done in numpy. Build the model directory with export_onnx().
+    """
+
+    def __init__(
+        self,
+        onnx_path: str = "data/models/all-MiniLM-L6-v2-onnx",
+        quantized: bool = True,
+        max_batch_tokens: int = 8192,
+        max_batch_size: int = 256,
+        max_length: int = 256,
+        output_dtype: str = "int8",
+        threads: int | None = None,
+    ):
+        self.onnx_path = onnx_path
+        self.quantized = quantized
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_length = max_length
+        self.output_dtype = output_dtype
+        self.threads = threads
+
+    @property
+    def model_file(self) -> str:
+        name = "model_quantized.onnx" if self.quantized else "model.onnx"
+        return os.path.join(self.onnx_path, name)
+
+    def _load(self):
+        key = (self.model_file, self.threads)
+        if key not in _SESSIONS:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.threads:
+                opts.intra_op_num_threads = self.threads
+
+            session = ort.InferenceSession(
+                self.model_file, opts, providers=["CPUExecutionProvider"]
+            )
+            tokenizer = AutoTokenizer.from_pretrained(self.onnx_path)
+            _SESSIONS[key] = (session, tokenizer)
+        return _SESSIONS[key]
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        session, tokenizer = self._load()
+        input_names = {i.name for i in session.get_inputs()}
+
+        out = None
+        for idx in length_buckets(approx_tokens(texts), self.max_batch_tokens, self.max_batch_size):
+            batch = tokenizer(
+                [texts[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in batch.items() if k in input_names}
+            hidden = session.run(None, feeds)[0]
+
+            # mean pooling over real tokens
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            vecs = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        if out is None:
+            out = np.zeros((0, 0), dtype=np.float32)
+        return quantize_vectors(out, self.output_dtype)
+
+
+class HashedNgramEncoder:
+    """
+    Lexical backend for bulk copy-paste detection: hashed character n-gram
+    TF-IDF vectors (sparse CSR, float32, L2-normalised).
+
+    No model download and no fitted vocabulary: n-grams are hashed into a
+    fixed number of columns and texts are vectorised chunk by chunk, so
+    memory does not grow with the vocabulary. IDF weights come from the
+    document frequencies of the encoded batch.
+    """
+
+    def __init__(
+        self,
+        ngram_range: tuple[int, int] = (3, 5),
+        n_features: int = 2 ** 20,
+        analyzer: str = "char_wb",
+        sublinear_tf: bool = True,
+        chunk_size: int = 50_000,
+    ):
+        self.ngram_range = tuple(ngram_range)
+        self.n_features = n_features
+        self.analyzer = analyzer
+        self.sublinear_tf = sublinear_tf
+        self.chunk_size = chunk_size
+
+    def encode(self, texts: list[str]):
+        import scipy.sparse as sp
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.preprocessing import normalize
+
+        vectorizer = HashingVectorizer(
+            analyzer=self.analyzer,
+            ngram_range=self.ngram_range,
+            n_features=self.n_features,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32,
+        )
+        chunks = [
+            vectorizer.transform(texts[start:start + self.chunk_size])
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+        if not chunks:
+            return sp.csr_matrix((0, self.n_features), dtype=np.float32)
+
+        x = sp.vstack(chunks, format="csr")
+        x.sum_duplicates()
+        if self.sublinear_tf:
+            np.log1p(x.data, out=x.data)
+
+        # smoothed idf, as in sklearn's TfidfTransformer
+        doc_freq = np.bincount(x.indices, minlength=self.n_features)
+        idf = np.log((1.0 + x.shape[0]) / (1.0 + doc_freq)) + 1.0
+        x.data *= idf[x.indices].astype(np.float32)
+
+        return normalize(x, norm="l2", copy=False)
+
+
+def export_onnx(
+    out_dir: str = "data/models/all-MiniLM-L6-v2-onnx",
+    model_name: str = HF_MODEL_NAME,
+    quantize: bool = True,
+) -> str:
+    """
+    Export the HF transformer behind the sentence model to ONNX (dynamic
+    batch / sequence axes) and, by default, write a dynamic int8 copy.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Positional(torch.nn.Module):
+        # keyword-only HF forward -> positional inputs for the exporter
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(names, inputs))).last_hidden_state
+
+    path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _Positional(model),
+            tuple(sample[n] for n in names),
+            path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(out_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            path,
+            os.path.join(out_dir, "model_quantized.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+    return out_dir
+
+
+ENCODER_BACKENDS = {
+    "sentence_transformers": SentenceTransformerEncoder,
+    "onnx": OnnxEncoder,
+    "hashed_ngram": HashedNgramEncoder,
+}
+
+
+def get_encoder(config: dict | None = None):
+    """
+    Build an encoder from a config dict, e.g.
+    {"backend": "onnx", "onnx_path": "...", "output_dtype": "int8"}.
+    """
+    config = dict(config or {})
+    backend = config.pop("backend", "sentence_transformers")
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}")
+    return ENCODER_BACKENDS[backend](**config)
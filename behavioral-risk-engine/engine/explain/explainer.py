@@ -1,7 +1,15 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from typing import Dict, List
 
+from engine.utils.compact import (
+    NO_DRIVER,
+    as_enum,
+    decode_drivers,
+    encode_drivers,
+)
+
 
 class RiskExplainer:
     """
@@ -55,6 +63,19 @@ class RiskExplainer:
         )
         return round(min(confidence, 1.0), 2)
 
+    @staticmethod
+    def confidence_vector(sig: np.ndarray, thresholds) -> np.ndarray:
+        """compute_confidence over a (n_posts, n_signals) matrix."""
+        hits = sig >= np.asarray(thresholds, dtype=np.float64)
+        active = hits.sum(axis=1)
+        strength = np.where(hits, sig, 0.0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            conf = (
+                0.6 * (active / hits.shape[1]) +
+                0.4 * (strength / active)
+            )
+        return np.where(active == 0, 0.05, np.minimum(conf, 1.0).round(2))
+
     # --------------------------------------------------
     # Reason category
     # --------------------------------------------------
@@ -119,3 +140,84 @@ class RiskExplainer:
         df["interpretation"] = interpretations
 
         return df
+
+    # --------------------------------------------------
+    # Compact explainer (vectorised, no per-row lists)
+    # --------------------------------------------------
+    def _feature_matrix(self, df: pd.DataFrame, feats: list[str]) -> np.ndarray:
+        return (
+            df.reindex(columns=feats, fill_value=0.0)
+            .fillna(0.0)
+            .to_numpy(dtype=np.float64)
+        )
+
+    def explain_posts_compact(self, df: pd.DataFrame, top_k: int = 4) -> pd.DataFrame:
+        """
+        Same semantics as explain_posts, but drivers are stored as int8
+        indices into list(self.weights), reason_category as an enum, and
+        explanations / interpretation are left to decode_posts.
+        """
+        df = df.copy()
+        feats = list(self.weights)
+
+        X = self._feature_matrix(df, feats)
+        contribs = X * np.array([self.weights[f] for f in feats])
+
+        # stable sort == python's list.sort on |contribution|, descending
+        order = np.argsort(-np.abs(contribs), axis=1, kind="stable")[:, :top_k]
+        if order.shape[1] < top_k:
+            pad = np.full((len(df), top_k - order.shape[1]), NO_DRIVER)
+            order = np.hstack([order, pad])
+        df = encode_drivers(df, order)
+
+        # confidence
+        sig = self._feature_matrix(df, list(self.SIGNAL_THRESHOLDS))
+        conf = self.confidence_vector(sig, list(self.SIGNAL_THRESHOLDS.values()))
+        df["confidence"] = conf.astype(np.float32)
+
+        # reason category (same precedence as classify_reason)
+        coord, sim_max, cluster, age = self._feature_matrix(
+            df, ["coordination_score", "sim_max", "cluster_size_norm", "account_age_norm"]
+        ).T
+        reasons = np.select(
+            [
+                coord >= 0.7,
+                (sim_max >= 0.65) & (cluster >= 0.5),
+                age >= 0.7,
+            ],
+            ["coordination", "copy_paste", "new_account"],
+            default="baseline",
+        )
+        df["reason_category"] = as_enum(reasons, list(self.REASON_LABELS))
+
+        return df
+
+    def decode_posts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rebuild top_drivers / explanations / interpretation strings for a
+        compact frame. Meant for the (usually small) slice being serialized.
+        """
+        df = df.copy()
+        feats = list(self.weights)
+        top_drivers = decode_drivers(df, feats)
+
+        explanations = []
+        for (_, row), drivers in zip(df.iterrows(), top_drivers):
+            exp_lines = []
+            for feat in drivers:
+                val = float(row.get(feat, 0.0))
+                c = val * self.weights[feat]
+                label = self.labels.get(feat, feat)
+                direction = "increases" if c >= 0 else "decreases"
+                exp_lines.append(
+                    f"{label} ({feat}={val:.3f}) {direction} risk (Δ={c:.2f})"
+                )
+            explanations.append(exp_lines)
+
+        df["top_drivers"] = top_drivers
+        df["explanations"] = explanations
+        df["interpretation"] = (
+            df["reason_category"].astype(str).map(self.REASON_LABELS)
+        )
+
+        return df
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from engine.utils.sketch import QuantileSketch
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are not serialised across processes
+    fcntl = None
+
+# raw feature -> how its [0, 1] feature is derived from value / reference
+NORMALIZED_FEATURES = {
+    "cluster_size": "direct",
+    "burst_size": "direct",
+    "account_age_days": "inverse",  # younger accounts = more risky
+    "posts_1h": "direct",  # account's posts in the trailing hour
+}
+MAX_BATCH_DIGESTS = 10_000
+
+
+class FeatureNormalizer:
+    """
+    Scales raw features by a fixed, robust reference (by default their
+    99th percentile over every batch seen) instead of the batch max.
+
+    Each raw feature has a mergeable QuantileSketch persisted as JSON at
+    `path`. A batch is folded in once (batches are recognised by the id
+    the pipeline gives them, else by content digest), then scaled against
+    the updated references; with
+    `frozen=True` the references are only read. One outlier no longer
+    rescales every other post, and scores stay comparable across runs and
+    streaming batches.
+
+    Parallel shards (batch workers, API processes) keep a sketch per batch
+    they ingested; save() merges those into the file under a lock and
+    skips batches another shard already saved, so no update is lost or
+    counted twice.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        quantile: float = 0.99,
+        frozen: bool = False,
+        k: int = 1024,
+    ):
+        if not 0 < quantile <= 1:
+            raise ValueError("quantile must be in (0, 1]")
+        self.path = path
+        self.quantile = quantile
+        self.frozen = frozen
+        self.k = k
+        self.sketches = {f: QuantileSketch(k) for f in NORMALIZED_FEATURES}
+        self.digests: list[str] = []
+        self._pending: list[tuple[list[str], dict]] = []  # (digests, sketches) not yet saved
+        if path and os.path.exists(path):
+            self.sketches, self.digests = self._read(path)
+
+    # --------------------------------------------------
+    # Updates
+    # --------------------------------------------------
+    @staticmethod
+    def batch_digest(df: pd.DataFrame) -> str:
+        cols = [c for c in ("post_id", *NORMALIZED_FEATURES) if c in df.columns]
+        h = hashlib.sha256(json.dumps(cols).encode())
+        h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+        return h.hexdigest()[:32]
+
+    def update(self, df: pd.DataFrame, batch: str | None = None) -> bool:
+        """
+        Fold a batch's raw features into the sketches (once per batch,
+        identified by `batch` or else by batch_digest()).
+        """
+        if self.frozen:
+            return False
+        digest = batch or self.batch_digest(df)
+        if digest in self.digests:
+            return False
+
+        delta = {}
+        for feature in NORMALIZED_FEATURES:
+            if feature in df.columns:
+                delta[feature] = QuantileSketch(self.k).update(df[feature].to_numpy(np.float64))
+                self.sketches[feature].merge(delta[feature])
+        self.digests.append(digest)
+        del self.digests[:-MAX_BATCH_DIGESTS]
+        self._pending.append(([digest], delta))
+        return True
+
+    def merge(self, other: "FeatureNormalizer") -> "FeatureNormalizer":
+        """Fold in the sketches of a normaliser built over other (disjoint) batches."""
+        for feature, sketch in other.sketches.items():
+            self.sketches[feature].merge(sketch)
+        seen = set(self.digests)
+        self.digests += [d for d in other.digests if d not in seen]
+        del self.digests[:-MAX_BATCH_DIGESTS]
+        self._pending.append((list(other.digests), other.sketches))
+        return self
+
+    # --------------------------------------------------
+    # Scaling
+    # --------------------------------------------------
+    def reference(self, feature: str) -> float:
+        """Scale reference of a raw feature; NaN before any data was seen."""
+        return self.sketches[feature].quantile(self.quantile)
+
+    def references(self) -> dict[str, float]:
+        return {f: self.reference(f) for f in NORMALIZED_FEATURES}
+
+    def scale(self, feature: str, col: pd.Series) -> pd.Series:
+        """Raw feature -> [0, 1]; the batch max stands in while no reference exists."""
+        ref = self.reference(feature)
+        if np.isnan(ref):
+            ref = col.max()
+        if ref <= 0 or pd.isna(ref):
+            scaled = col * 0.0
+        else:
+            scaled = (col / ref).clip(0.0, 1.0)
+        if NORMALIZED_FEATURES[feature] == "inverse":
+            return 1.0 - scaled
+        return scaled
+
+    def fingerprint(self, exclude: str | None = None) -> dict:
+        """
+        What scaling depends on, for artefact keys: the batches folded in,
+        except `exclude` (the batch being scaled, which update() folds in
+        once, so its rerun is scaled against the same references).
+        """
+        batches = sorted(set(self.digests) - {exclude})
+        return {
+            "quantile": self.quantile,
+            "frozen": self.frozen,
+            "k": self.k,
+            "batches": hashlib.sha256(json.dumps(batches).encode()).hexdigest()[:32],
+        }
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+    def _read(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        sketches = {
+            f: QuantileSketch.from_dict(state["sketches"][f])
+            if f in state["sketches"] else QuantileSketch(self.k)
+            for f in NORMALIZED_FEATURES
+        }
+        return sketches, list(state.get("digests", []))
+
+    def save(self) -> None:
+        """Merge this process's new batches into the file at `path`."""
+        if not self.path or not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            if os.path.exists(self.path):
+                sketches, digests = self._read(self.path)
+            else:
+                sketches = {f: QuantileSketch(self.k) for f in NORMALIZED_FEATURES}
+                digests = []
+            seen = set(digests)
+            for batch, delta in self._pending:
+                if all(d in seen for d in batch):
+                    continue  # another shard saved it already
+                for feature, sketch in delta.items():
+                    sketches[feature].merge(sketch)
+                digests += [d for d in batch if d not in seen]
+                seen.update(batch)
+            digests = digests[-MAX_BATCH_DIGESTS:]
+
+            state = {
+                "sketches": {f: s.to_dict() for f, s in sketches.items()},
+                "digests": digests,
+            }
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+
+        self.sketches, self.digests = sketches, digests
+        self._pending = []
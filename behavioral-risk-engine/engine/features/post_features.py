@@ -1,12 +1,29 @@
 import pandas as pd
 import numpy as np
 
+from engine.detectors.copy_paste import SimilarityStats
+from engine.store.events import CoordinationEvents
+from engine.store.account_features import AccountFeatureStore, POST_COLUMNS
+from engine.features.normalizer import FeatureNormalizer, NORMALIZED_FEATURES
+
 
 class PostFeatureExtractor:
     """
     Transforms raw detection signals into normalized numerical feature vectors.
+
+    Raw counts are scaled by the batch max, or by the persisted robust
+    references of `normalizer` (a FeatureNormalizer) when one is given.
     """
 
+    def __init__(self, normalizer: FeatureNormalizer | None = None):
+        self.normalizer = normalizer
+
+    def _norm(self, df: pd.DataFrame, feature: str) -> pd.Series:
+        if self.normalizer is not None:
+            return self.normalizer.scale(feature, df[feature])
+        scaled = self._safe_norm(df[feature])
+        return 1.0 - scaled if NORMALIZED_FEATURES[feature] == "inverse" else scaled
+
     @staticmethod
     def _safe_norm(col: pd.Series) -> pd.Series:
         max_val = col.max()
@@ -14,12 +31,31 @@ class PostFeatureExtractor:
             return col * 0.0
         return col / max_val
 
+    @staticmethod
+    def _similarity_stats(sim: np.ndarray, block_rows: int = 4096):
+        """
+        Row max / mean with self-similarity removed, a block of rows at a
+        time: the matrix itself is never copied.
+        """
+        n = len(sim)
+        row_max = np.zeros(n, dtype=sim.dtype)
+        row_mean = np.zeros(n, dtype=sim.dtype)
+        for start in range(0, n, block_rows):
+            block = np.array(sim[start:start + block_rows])
+            rows = np.arange(len(block))
+            block[rows, rows + start] = 0.0   # or -np.inf for max, but 0 works since similarities are >=0
+            row_max[start:start + len(block)] = block.max(axis=1)
+            row_mean[start:start + len(block)] = block.mean(axis=1)
+        return row_max, row_mean
+
     def extract(
         self,
         df_posts: pd.DataFrame,
         similarity_matrix,
         clusters_df: pd.DataFrame,
-        coordination_events: list,
+        coordination_events: CoordinationEvents | list,
+        account_activity: pd.DataFrame | None = None,
+        batch: str | None = None,
     ):
 
         df = df_posts.copy()
@@ -27,11 +63,13 @@ class PostFeatureExtractor:
         # ---------------------------------------------------------------------------
         # Content similarity features (already [0,1]) + removing the self-similarity
         # ---------------------------------------------------------------------------
-        sim = similarity_matrix.copy() 
-        np.fill_diagonal(sim, 0.0)   # or -np.inf for max, but 0 works since similarities are >=0
-
-        df["sim_max"] = sim.max(axis=1)
-        df["sim_mean"] = sim.mean(axis=1)
+        if isinstance(similarity_matrix, SimilarityStats):
+            # lexical mode: per-row stats were computed without a dense matrix
+            df["sim_max"] = similarity_matrix.row_max
+            df["sim_mean"] = similarity_matrix.row_mean
+        else:
+            # dense (n, n) matrix
+            df["sim_max"], df["sim_mean"] = self._similarity_stats(similarity_matrix)
 
         # --------------------------------------------------
         # Cluster features
@@ -39,26 +77,38 @@ class PostFeatureExtractor:
         cluster_sizes = clusters_df.groupby("cluster_id").size()
         df["cluster_size"] = df["cluster_id"].map(cluster_sizes).fillna(1)
 
-        df["cluster_size_norm"] = self._safe_norm(df["cluster_size"])
-
         # --------------------------------------------------
         # Coordination features
         # --------------------------------------------------
-        burst_map = {}
-        for event in coordination_events:
-            for pid in event["post_ids"]:
-                burst_map[pid] = event["num_posts"]
+        if not isinstance(coordination_events, CoordinationEvents):
+            coordination_events = CoordinationEvents.from_records(coordination_events)
+        df["burst_size"] = df["post_id"].map(coordination_events.burst_sizes()).fillna(0)
+
+        # --------------------------------------------------
+        # Account activity features (trailing window counts, intervals)
+        # --------------------------------------------------
+        if account_activity is None:
+            # this batch alone; AccountFeatureStore.advance adds history
+            account_activity, _ = AccountFeatureStore().advance(df, set(), set())
+        activity = account_activity.drop_duplicates("post_id").set_index("post_id")
+        for col in POST_COLUMNS[1:]:
+            df[col] = df["post_id"].map(activity[col])
+
+        # fold this batch into the scaling references before using them
+        if self.normalizer is not None:
+            self.normalizer.update(df, batch=batch)
 
-        df["burst_size"] = df["post_id"].map(burst_map).fillna(0)
-        df["burst_size_norm"] = self._safe_norm(df["burst_size"])
+        df["cluster_size_norm"] = self._norm(df, "cluster_size")
+        df["burst_size_norm"] = self._norm(df, "burst_size")
+        df["account_rate_norm"] = self._norm(df, "posts_1h")
 
         df["coordination_score"] = df["burst_size_norm"]
 
         # --------------------------------------------------
         # Account features
         # --------------------------------------------------
-        # Younger accounts = more risky
-        df["account_age_norm"] = 1.0 - self._safe_norm(df["account_age_days"])
+        # Younger accounts = more risky (inverse scaling)
+        df["account_age_norm"] = self._norm(df, "account_age_days")
 
         # --------------------------------------------------
         # Final feature set (ONLY normalized features)
@@ -69,6 +119,7 @@ class PostFeatureExtractor:
             "cluster_size_norm",
             "coordination_score",
             "account_age_norm",
+            "account_rate_norm",
         ]
 
         df[feature_cols] = df[feature_cols].fillna(0.0)
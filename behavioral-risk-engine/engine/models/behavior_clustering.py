@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import hdbscan
-from sklearn.preprocessing import StandardScaler
 
 
 class BehaviorClusterer:
@@ -10,9 +8,18 @@ class BehaviorClusterer:
     """
 
     def __init__(self, min_cluster_size: int = 2): # Adjusted default for testing (Real default 5)
+        self.min_cluster_size = min_cluster_size
+        # hdbscan / sklearn are imported on first fit (fast API cold start)
+        self.scaler = None
+        self.clusterer = None
+
+    def _build(self):
+        import hdbscan
+        from sklearn.preprocessing import StandardScaler
+
         self.scaler = StandardScaler()
         self.clusterer = hdbscan.HDBSCAN(
-            min_cluster_size=min_cluster_size,
+            min_cluster_size=self.min_cluster_size,
             metric="euclidean",
             prediction_data=True
         )
@@ -20,17 +27,109 @@ class BehaviorClusterer:
     def fit_predict(
         self,
         df: pd.DataFrame,
-        feature_cols: list[str]
+        feature_cols: list[str],
+        fit_rows: int | None = None,
+        chunk_rows: int = 50_000,
+        workers: int = 1,
     ) -> pd.DataFrame:
+        """
+        Fit on all rows, or (when more than `fit_rows`, to bound memory) on
+        a fixed random sample of `fit_rows` and assign the other rows with
+        predict().
+        """
+        if self.clusterer is None:
+            self._build()
 
         X = df[feature_cols].values
-        X_scaled = self.scaler.fit_transform(X)
+        if fit_rows is not None and len(X) > fit_rows:
+            sample = np.sort(np.random.default_rng(0).choice(len(X), fit_rows, replace=False))
+            self.scaler.fit(X[sample])
+            self.clusterer.fit(self.scaler.transform(X[sample]))
 
-        labels = self.clusterer.fit_predict(X_scaled)
-        probs = self.clusterer.probabilities_
+            rest = np.ones(len(X), dtype=bool)
+            rest[sample] = False
+            predicted = self.predict(df.iloc[np.flatnonzero(rest)], feature_cols, workers, chunk_rows)
+            labels = np.empty(len(X), dtype=self.clusterer.labels_.dtype)
+            probs = np.empty(len(X), dtype=np.float64)
+            labels[sample], probs[sample] = self.clusterer.labels_, self.clusterer.probabilities_
+            labels[rest] = predicted["behavior_cluster"].to_numpy()
+            probs[rest] = predicted["cluster_confidence"].to_numpy()
+        else:
+            X_scaled = self.scaler.fit_transform(X)
+            labels = self.clusterer.fit_predict(X_scaled)
+            probs = self.clusterer.probabilities_
 
         df = df.copy()
         df["behavior_cluster"] = labels
         df["cluster_confidence"] = np.where(labels == -1, 0.0, probs)
 
         return df
+
+    def predict(
+        self,
+        df: pd.DataFrame,
+        feature_cols: list[str],
+        workers: int = 1,
+        chunk_rows: int = 50_000,
+    ) -> pd.DataFrame:
+        """
+        Assign new posts to the fitted clusters (hdbscan approximate_predict).
+
+        With workers > 1 the scaled feature matrix is placed in shared
+        memory and each worker predicts row chunks from a read-only view;
+        the fitted model is sent once per worker, not once per chunk.
+        """
+        if self.clusterer is None or not hasattr(self.scaler, "mean_"):
+            raise ValueError("BehaviorClusterer must be fitted before predict")
+
+        X = self.scaler.transform(df[feature_cols].values)
+        starts = list(range(0, len(X), chunk_rows))
+
+        if workers > 1 and len(starts) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            from engine.utils.shared import SharedArena
+
+            with SharedArena() as arena, ProcessPoolExecutor(
+                workers, initializer=_init_predict_worker, initargs=(self.clusterer,)
+            ) as pool:
+                handle = arena.put(X)
+                parts = list(pool.map(
+                    _predict_chunk,
+                    [handle] * len(starts), starts, [chunk_rows] * len(starts),
+                ))
+        else:
+            parts = [_predict_chunk(X, s, chunk_rows, self.clusterer) for s in starts]
+
+        labels = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, int)
+        probs = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+
+        df = df.copy()
+        df["behavior_cluster"] = labels
+        df["cluster_confidence"] = np.where(labels == -1, 0.0, probs)
+
+        return df
+
+
+# --------------------------------------------------
+# Prediction workers
+# --------------------------------------------------
+_WORKER_MODEL = None
+
+
+def _init_predict_worker(clusterer):
+    global _WORKER_MODEL
+    _WORKER_MODEL = clusterer
+
+
+def _predict_chunk(X, start, chunk_rows, clusterer=None):
+    import hdbscan
+    from engine.utils.shared import release, resolve
+
+    try:
+        # the shared view only lives inside the call, so release() can close it
+        return hdbscan.approximate_predict(
+            clusterer if clusterer is not None else _WORKER_MODEL,
+            resolve(X)[start:start + chunk_rows],
+        )
+    finally:
+        release()
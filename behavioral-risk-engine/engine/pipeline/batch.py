@@ -0,0 +1,254 @@
+"""
+Batch scoring of CSV exports across a process pool.
+
+    python -m engine.pipeline.batch data/exports --out data/scored --workers 4
+    python -m engine.pipeline.batch data/exports --out data/scored --config batch.json
+
+Each input file gets <name>.posts.parquet / .accounts.parquet /
+.clusters.parquet under --out (same sub-directories as the input tree).
+Workers build one RiskPipeline each and warm its encoder and clusterer
+once, then score file after file. Finished files are appended to
+<out>/manifest.jsonl; a rerun skips inputs whose size / mtime match a
+finished record and whose outputs still exist, so a crashed backfill
+resumes where it stopped.
+
+Note: with "account_state_path" or "account_feature_path" in the config,
+trends and account activity depend on the order files are scored in; use
+--workers 1 for such runs.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from engine.pipeline.risk_pipeline import RiskPipeline
+from engine.pipeline.run_mvp_pipeline import build_mvp_views
+
+MANIFEST_NAME = "manifest.jsonl"
+OUTPUT_VIEWS = ("posts", "accounts", "clusters")
+
+
+# --------------------------------------------------
+# Inputs / outputs / manifest
+# --------------------------------------------------
+def discover_inputs(root: str, pattern: str = "*.csv") -> list[str]:
+    """Files under `root` matching `pattern` (recursive), or `root` itself."""
+    if os.path.isfile(root):
+        return [root]
+    if not os.path.isdir(root):
+        raise ValueError(f"Input path does not exist: {root}")
+
+    from pathlib import Path
+    return sorted(str(p) for p in Path(root).rglob(pattern) if p.is_file())
+
+
+def file_signature(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def output_paths(path: str, root: str, out_dir: str) -> dict[str, str]:
+    base = os.path.dirname(root) if os.path.isfile(root) else root
+    rel = os.path.splitext(os.path.relpath(path, base))[0]
+    return {view: os.path.join(out_dir, f"{rel}.{view}.parquet") for view in OUTPUT_VIEWS}
+
+
+def load_manifest(out_dir: str) -> dict[str, dict]:
+    """Latest record per input path (a torn last line is ignored)."""
+    records = {}
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["input"]] = record
+    return records
+
+
+def append_manifest(out_dir: str, record: dict) -> None:
+    with open(os.path.join(out_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def is_done(record: dict | None, path: str) -> bool:
+    if not record or record.get("status") != "done":
+        return False
+    if {k: record.get(k) for k in ("size", "mtime_ns")} != file_signature(path):
+        return False
+    return all(os.path.exists(p) for p in record["outputs"].values())
+
+
+def write_parquet(df: pd.DataFrame, path: str) -> None:
+    # write to a temp name first so a crash never leaves a half file behind
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+_PIPELINE = None
+
+
+def _init_worker(config: dict | None) -> None:
+    """One warm pipeline per worker process, reused for every file."""
+    global _PIPELINE
+    _PIPELINE = RiskPipeline(config)
+    _PIPELINE.encoder.encode(["warm up"])
+    import hdbscan  # noqa: F401
+    import sklearn.cluster  # noqa: F401
+
+
+def score_file(path: str, outputs: dict[str, str]) -> dict:
+    timings = {}
+
+    t0 = time.perf_counter()
+    df_posts = pd.read_csv(path)
+    timings["load"] = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    views = build_mvp_views(df_posts, pipeline=_PIPELINE)
+    total = time.perf_counter() - t1
+    timings.update(_PIPELINE.stage_timings)
+    timings["views"] = max(total - sum(_PIPELINE.stage_timings.values()), 0.0)
+
+    t2 = time.perf_counter()
+    for view, out in outputs.items():
+        write_parquet(views[view], out)
+    timings["write"] = time.perf_counter() - t2
+
+    return {
+        "posts": len(df_posts),
+        "seconds": time.perf_counter() - t0,
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+    }
+
+
+# --------------------------------------------------
+# Driver
+# --------------------------------------------------
+def run_batch(
+    input_root: str,
+    out_dir: str,
+    config: dict | None = None,
+    workers: int = 1,
+    pattern: str = "*.csv",
+    resume: bool = True,
+    log=print,
+) -> dict:
+    """
+    Score every input file and return a run summary. Only the driver
+    writes the manifest (one fsync'd line per finished file).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    inputs = discover_inputs(input_root, pattern)
+    manifest = load_manifest(out_dir) if resume else {}
+
+    pending = [p for p in inputs if not is_done(manifest.get(p), p)]
+    skipped = len(inputs) - len(pending)
+    # largest first keeps the pool busy until the end
+    pending.sort(key=lambda p: os.path.getsize(p), reverse=True)
+    log(f"{len(inputs)} input files, {skipped} already done, {len(pending)} to score ({workers} workers)")
+
+    def finish(path, result=None, error=None):
+        record = {
+            "input": path,
+            **file_signature(path),
+            "outputs": output_paths(path, input_root, out_dir),
+            "status": "failed" if error else "done",
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        if error:
+            record["error"] = error
+            log(f"FAILED {path}: {error}")
+        else:
+            record.update(result)
+            rate = result["posts"] / max(result["seconds"], 1e-9)
+            stages = " ".join(f"{k}={v:.2f}s" for k, v in result["timings"].items())
+            log(f"{path}: {result['posts']} posts, {rate:,.0f} posts/s  [{stages}]")
+        append_manifest(out_dir, record)
+        return record
+
+    start = time.perf_counter()
+    records = []
+    if workers <= 1:
+        if pending:
+            _init_worker(config)
+        for path in pending:
+            try:
+                records.append(finish(path, score_file(path, output_paths(path, input_root, out_dir))))
+            except Exception as e:
+                records.append(finish(path, error=f"{type(e).__name__}: {e}"))
+    elif pending:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,)) as pool:
+            futures = {
+                pool.submit(score_file, path, output_paths(path, input_root, out_dir)): path
+                for path in pending
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    records.append(finish(path, future.result()))
+                except Exception as e:
+                    records.append(finish(path, error=f"{type(e).__name__}: {e}"))
+    wall = time.perf_counter() - start
+
+    done = [r for r in records if r["status"] == "done"]
+    posts = sum(r["posts"] for r in done)
+    summary = {
+        "files": len(inputs),
+        "scored": len(done),
+        "skipped": skipped,
+        "failed": len(records) - len(done),
+        "posts": posts,
+        "seconds": round(wall, 2),
+        "posts_per_sec": round(posts / wall, 1) if wall > 0 else 0.0,
+    }
+    log(
+        f"scored {summary['scored']} files ({posts} posts) in {wall:.1f}s: "
+        f"{summary['posts_per_sec']:,.0f} posts/s; "
+        f"{summary['skipped']} skipped, {summary['failed']} failed"
+    )
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a directory of CSV exports.")
+    parser.add_argument("input", help="input CSV file or directory")
+    parser.add_argument("--out", required=True, help="output directory (parquet + manifest)")
+    parser.add_argument("--pattern", default="*.csv", help="file pattern for directories")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument("--config", help="JSON file with the RiskPipeline config")
+    parser.add_argument("--no-resume", action="store_true", help="ignore the manifest and rescore everything")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+
+    summary = run_batch(
+        args.input,
+        args.out,
+        config=config,
+        workers=args.workers,
+        pattern=args.pattern,
+        resume=not args.no_resume,
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
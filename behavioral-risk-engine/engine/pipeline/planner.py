@@ -0,0 +1,136 @@
+import logging
+import os
+
+try:
+    import psutil
+except ImportError:  # os.sysconf fallback (Linux / macOS)
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Peak bytes measured with tracemalloc (cosine_similarity + complete
+# linkage on the precomputed distances: ~22.5 n^2; hdbscan fit on the
+# five fused features: ~350 per row), rounded up for headroom.
+DENSE_BYTES_PER_PAIR = 24
+CLUSTER_BYTES_PER_ROW = 512
+FLOAT_BYTES = 4
+
+MIN_BLOCK_ROWS = 16
+MAX_BLOCK_ROWS = 8192
+DEFAULT_BLOCK_ROWS = 1024  # detect_duplicates' default (lexical mode)
+MIN_CLUSTER_FIT_ROWS = 10_000
+DEFAULT_BUDGET_MB = 2048
+
+
+def available_memory() -> int | None:
+    """Bytes of RAM currently available, None when the OS does not say."""
+    if psutil is not None:
+        return int(psutil.virtual_memory().available)
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class ExecutionPlanner:
+    """
+    Picks per-stage execution strategies from the input size and a memory
+    budget, instead of allocating (n, n) arrays whatever n is.
+
+    - duplicates: "dense" (full similarity matrix, exact) while it fits,
+      else "blocked" (row blocks sized to the budget; same clusters while
+      each connected component fits, see detect_duplicates). Lexical mode
+      is always blocked and only takes the block size.
+    - clustering: hdbscan fits every row while it fits, else a random
+      sample of `fit_rows` and approximate_predict for the rest in chunks.
+
+    The budget is `memory_budget_mb` (default DEFAULT_BUDGET_MB), so the
+    same input always gets the same plan, and with it the same sampled
+    clusters and artefact keys. "auto" sizes it to `fraction` of the RAM
+    available when the plan is made instead, which depends on machine
+    load and so is not reproducible. A plan that cannot fit (e.g. the embeddings
+    alone are over budget) is still returned, with a warning, so runs
+    degrade instead of failing up front.
+    """
+
+    def __init__(self, memory_budget_mb: float | str | None = None, fraction: float = 0.5):
+        if memory_budget_mb is None:
+            memory_budget_mb = DEFAULT_BUDGET_MB
+        if memory_budget_mb != "auto" and (isinstance(memory_budget_mb, str) or memory_budget_mb <= 0):
+            raise ValueError("memory_budget_mb must be > 0 or 'auto'")
+        if not 0 < fraction <= 1:
+            raise ValueError("fraction must be in (0, 1]")
+        self.memory_budget_mb = memory_budget_mb
+        self.fraction = fraction
+
+    def budget(self) -> int:
+        if self.memory_budget_mb != "auto":
+            return int(self.memory_budget_mb * 1024 ** 2)
+        available = available_memory()
+        if available is None:
+            return DEFAULT_BUDGET_MB * 1024 ** 2
+        return int(available * self.fraction)
+
+    # --------------------------------------------------
+    # Per-stage decisions
+    # --------------------------------------------------
+    def duplicates(self, n: int, dim: int, budget: int) -> dict:
+        embeddings = n * dim * FLOAT_BYTES
+        dense = DENSE_BYTES_PER_PAIR * n * n + embeddings
+        if dense <= budget:
+            return {"strategy": "dense", "block_rows": DEFAULT_BLOCK_ROWS, "max_component": None,
+                    "estimated_mb": _mb(dense)}
+
+        # a block of similarities plus its threshold mask and index arrays
+        free = max(budget - 2 * embeddings, 0)
+        block_rows = int(min(max(free // (2 * FLOAT_BYTES * max(n, 1)), MIN_BLOCK_ROWS), MAX_BLOCK_ROWS))
+        # largest component still re-clustered exactly (complete linkage)
+        max_component = int((free / DENSE_BYTES_PER_PAIR) ** 0.5)
+        return {
+            "strategy": "blocked",
+            "block_rows": block_rows,
+            "max_component": max_component,
+            "estimated_mb": _mb(2 * embeddings + 2 * FLOAT_BYTES * n * block_rows),
+        }
+
+    def clustering(self, n: int, budget: int) -> dict:
+        full = CLUSTER_BYTES_PER_ROW * n
+        if full <= budget:
+            return {"strategy": "full", "fit_rows": None, "chunk_rows": 50_000,
+                    "estimated_mb": _mb(full)}
+
+        fit_rows = max(int(budget // CLUSTER_BYTES_PER_ROW), MIN_CLUSTER_FIT_ROWS)
+        return {
+            "strategy": "sample",
+            "fit_rows": fit_rows,
+            "chunk_rows": 50_000,
+            "estimated_mb": _mb(CLUSTER_BYTES_PER_ROW * fit_rows),
+        }
+
+    def plan(self, n_posts: int, embedding_dim: int) -> dict:
+        budget = self.budget()
+        plan = {
+            "posts": n_posts,
+            "embedding_dim": embedding_dim,
+            "budget_mb": _mb(budget),
+            "duplicates": self.duplicates(n_posts, embedding_dim, budget),
+            "clustering": self.clustering(n_posts, budget),
+        }
+
+        logger.info(
+            "Execution plan for %d posts (budget %.0f MB): duplicates=%s (block_rows=%s), clustering=%s (fit_rows=%s)",
+            n_posts, plan["budget_mb"],
+            plan["duplicates"]["strategy"], plan["duplicates"]["block_rows"],
+            plan["clustering"]["strategy"], plan["clustering"]["fit_rows"],
+        )
+        for stage in ("duplicates", "clustering"):
+            if plan[stage]["estimated_mb"] > plan["budget_mb"]:
+                logger.warning(
+                    "%s stage needs ~%.0f MB, over the %.0f MB budget; running it anyway",
+                    stage, plan[stage]["estimated_mb"], plan["budget_mb"],
+                )
+        return plan
+
+
+def _mb(n_bytes: float) -> float:
+    return round(n_bytes / 1024 ** 2, 1)
@@ -1,14 +1,31 @@
+import json
+import time
 import pandas as pd
 from typing import Dict, Any
 
 from engine.detectors.copy_paste import detect_duplicates
+from engine.detectors.co_activity import detect_coactive_accounts
+from engine.detectors.synchrony import detect_synchronous_pairs
 from engine.detectors.frequent_posting import detect_coordinated_posts
 from engine.detectors.bot_rating import score_accounts
 from engine.utils.functions import preprocess
 from engine.utils.functions import assign_narrative
 from engine.features.post_features import PostFeatureExtractor
+from engine.features.normalizer import FeatureNormalizer
 from engine.models.behavior_clustering import BehaviorClusterer
 from engine.explain.explainer import RiskExplainer
+from engine.analysis.reports import ReportEngine
+from engine.utils.compact import intern_ids, downcast_floats
+from engine.encoders.backends import get_encoder
+from engine.store.artifacts import ArtifactStore, frame_digest, stage_key
+from engine.store.campaigns import CampaignLibrary
+from engine.store.events import EventStore
+from engine.store.account_features import AccountFeatureStore
+from engine.pipeline.planner import ExecutionPlanner
+
+
+class DataValidationError(ValueError):
+    """Posts the pipeline cannot score: missing columns or unparseable values."""
 
 
 class RiskPipeline:
@@ -25,7 +42,33 @@ class RiskPipeline:
 
     def __init__(self, config: Dict[str, Any] | None = None):
         self.config = config or {}
-        self.feature_extractor = PostFeatureExtractor()
+        # Compact mode: categorical ids, float32 features, enum reasons and
+        # int8 driver codes instead of per-row Python lists/strings.
+        self.compact = self.config.get("compact", False)
+        # Robust persisted scaling references instead of the batch max, e.g.
+        # "normalizer_path": "data/state/feature_sketches.json"
+        # (an in-memory one with just "normalizer_quantile")
+        self.normalizer = None
+        if "normalizer_path" in self.config or "normalizer_quantile" in self.config:
+            self.normalizer = FeatureNormalizer(
+                self.config.get("normalizer_path"),
+                quantile=self.config.get("normalizer_quantile", 0.99),
+                frozen=self.config.get("normalizer_frozen", False),
+            )
+        self.feature_extractor = PostFeatureExtractor(self.normalizer)
+        # Text encoder for duplicate detection, e.g. {"backend": "onnx", ...}
+        # or {"backend": "hashed_ngram"} for the cheap lexical mode
+        self.encoder = get_encoder(self.config.get("encoder"))
+        # Lexical mode only: semantic encoder for the ambiguous posts
+        refine = self.config.get("refine_encoder")
+        self.refine_encoder = get_encoder(refine) if refine is not None else None
+        # Known campaigns matched before the pairwise duplicate pass, e.g.
+        # "campaign_path": "data/state/campaigns.npz" (dense encoders only)
+        campaign_path = self.config.get("campaign_path")
+        self.campaigns = None
+        if campaign_path:
+            space = json.dumps(self.config.get("encoder"), sort_keys=True, default=str)
+            self.campaigns = CampaignLibrary(campaign_path, space=space)
         self.clusterer = BehaviorClusterer(
             min_cluster_size=self.config.get("min_cluster_size", 5)
         )
@@ -39,6 +82,30 @@ class RiskPipeline:
 
         self.explainer = RiskExplainer(self.weights)
 
+        # Coordination bursts of every run, queryable by time / narrative / post
+        event_path = self.config.get("event_store_path")
+        self.event_store = EventStore(event_path) if event_path else None
+
+        # Rolling per-account activity (window counts, intervals, duplicate /
+        # coordination ratios); with "account_feature_path" it carries over
+        # between runs, otherwise each batch stands alone
+        self.account_features = AccountFeatureStore(self.config.get("account_feature_path"))
+
+        # Per-stage strategies (dense vs blocked duplicates, full vs sampled
+        # clustering) sized to "memory_budget_mb" (default 2048; "auto" for
+        # "memory_fraction" of the free RAM, not reproducible across runs)
+        self.planner = ExecutionPlanner(
+            self.config.get("memory_budget_mb"),
+            fraction=self.config.get("memory_fraction", 0.5),
+        )
+        self.plan = None  # plan of the last run
+
+        # Stage artefacts (signals / features / clusters) reused across runs
+        artifact_path = self.config.get("artifact_path")
+        self.artifacts = ArtifactStore(artifact_path) if artifact_path else None
+        self.stage_status = {}
+        self.stage_timings = {}  # seconds per stage of the last run
+
     # --------------------------------------------------
     # Stage 1: Preprocessing
     # --------------------------------------------------
@@ -57,10 +124,17 @@ class RiskPipeline:
 
         missing = required - set(df.columns)
         if missing:
-            raise ValueError(f"Missing required columns: {missing}")
+            raise DataValidationError(f"Missing required columns: {missing}")
+        empty_text = int(df["text"].isna().sum())
+        if empty_text:
+            raise DataValidationError(f"text is missing in {empty_text} rows")
 
         # Normalize types
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        try:
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            df["account_age_days"] = pd.to_numeric(df["account_age_days"])
+        except (ValueError, TypeError) as e:
+            raise DataValidationError(f"Invalid timestamp or account_age_days: {e}") from e
 
         # Text preprocessing
         df["clean_text"] = df["text"].apply(preprocess)
@@ -68,27 +142,76 @@ class RiskPipeline:
         # Narrative assignment (🔥 this fixes your error)
         df["narrative"] = df["text"].apply(assign_narrative)
 
+        if self.compact:
+            df = intern_ids(df)
+
         return df
 
     # --------------------------------------------------
     # Stage 2: Signal Detection
     # --------------------------------------------------
-    def detect_signals(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def detect_signals(self, df: pd.DataFrame, batch: str | None = None) -> Dict[str, Any]:
+        """
+        `batch` identifies the input in the stateful stores (see
+        batch_digest()), so scoring it again does not fold it in twice.
+        """
+        plan = (self.plan or self.plan_execution(df))["duplicates"]
         (
             duplicate_post_ids,
             similarity_matrix,
             clusters_df
-        ) = detect_duplicates(df)
+        ) = detect_duplicates(
+            df,
+            encoder=self.encoder,
+            threshold=self.config.get("duplicate_threshold", 0.85),
+            refine_encoder=self.refine_encoder,
+            block_rows=plan["block_rows"],
+            workers=self.config.get("workers", 1),
+            campaigns=self.campaigns,
+            campaign_threshold=self.config.get("campaign_threshold"),
+            campaign_min_members=self.config.get("campaign_min_members", 3),
+            strategy=plan["strategy"],
+            max_component=plan["max_component"],
+            campaign_batch=batch,
+        )
 
         (
             coordinated_post_ids,
             coordination_events
         ) = detect_coordinated_posts(df)
+        if self.event_store is not None:
+            self.event_store.record(coordination_events, source=self.event_source(df))
+
+        # Account-level coordination over the duplicate clusters
+        clustered = df.assign(cluster_id=clusters_df["cluster_id"].to_numpy())
+
+        coactive_account_ids, coactivity = detect_coactive_accounts(
+            clustered,
+            window=self.config.get("coactivity_window", "1h"),
+            min_shared=self.config.get("coactivity_min_shared", 2),
+            min_group_size=self.config.get("coactivity_min_group", 3),
+        )
+
+        synchronized_account_ids, synchrony, synchrony_pairs = detect_synchronous_pairs(
+            clustered,
+            group_col=self.config.get("synchrony_group", "cluster_id"),
+            max_lag=self.config.get("synchrony_max_lag", "30s"),
+            min_repeats=self.config.get("synchrony_min_repeats", 2),
+        )
+
+        account_activity, account_features = self.account_features.advance(
+            df, duplicate_post_ids, coordinated_post_ids, batch=batch
+        )
 
         account_scores = score_accounts(
             df_posts=df,
             duplicate_post_ids=duplicate_post_ids,
             coordinated_post_ids=coordinated_post_ids,
+            compact=self.compact,
+            coactive_account_ids=coactive_account_ids,
+            synchronized_account_ids=synchronized_account_ids,
+            account_features=account_features,
+            peak_posts_per_hour=self.config.get("peak_posts_per_hour", 5),
         )
 
         return {
@@ -97,9 +220,38 @@ class RiskPipeline:
             "similarity_matrix": similarity_matrix,
             "clusters": clusters_df,
             "coordination_events": coordination_events,
+            "coactivity": coactivity,
+            "synchrony": synchrony,
+            "synchrony_pairs": synchrony_pairs,
             "account_scores": account_scores,
+            "account_activity": account_activity,
+            "account_features": account_features,
         }
 
+    @staticmethod
+    def batch_digest(df_posts: pd.DataFrame) -> str:
+        """Id of an input batch in the campaign / account / scaling stores."""
+        return frame_digest(df_posts)[:32]
+
+    @staticmethod
+    def event_source(df: pd.DataFrame) -> str:
+        """Key of a batch's events in the event store (its posts and times)."""
+        return frame_digest(df[["post_id", "timestamp"]].reset_index(drop=True))[:16]
+
+    def attach_coactivity(self, df: pd.DataFrame, coactivity: pd.DataFrame) -> pd.DataFrame:
+        """Account co-activity group (-1 = none) and its size on every post."""
+        groups = coactivity.set_index(coactivity["account_id"].astype(str))
+        key = df["account_id"].astype(str)
+
+        dtype = "int32" if self.compact else "int64"
+        df["coactivity_group"] = (
+            groups["coactivity_group"].reindex(key).fillna(-1).to_numpy().astype(dtype)
+        )
+        df["coactivity_group_size"] = (
+            groups["coactivity_group_size"].reindex(key).fillna(0).to_numpy().astype(dtype)
+        )
+        return df
+
     # --------------------------------------------------
     # Stage 3: Feature Extraction
     # --------------------------------------------------
@@ -107,6 +259,7 @@ class RiskPipeline:
         self,
         df: pd.DataFrame,
         signals: Dict[str, Any],
+        batch: str | None = None,
     ) -> tuple[pd.DataFrame, list[str]]:
 
         df_features, feature_cols = self.feature_extractor.extract(
@@ -114,8 +267,17 @@ class RiskPipeline:
             similarity_matrix=signals["similarity_matrix"],
             clusters_df=signals["clusters"],
             coordination_events=signals["coordination_events"],
+            account_activity=signals["account_activity"],
+            batch=batch,
         )
+        if self.normalizer is not None:
+            self.normalizer.save()
 
+        if self.compact:
+            df_features = downcast_floats(
+                df_features,
+                feature_cols + ["cluster_size", "burst_size", "burst_size_norm", "interval_s"],
+            )
 
         return df_features, feature_cols
 
@@ -140,69 +302,159 @@ class RiskPipeline:
         for f in used:
             df[f"contrib_{f}"] = (df[f] * self.weights[f] * 100.0).round(2)
 
+        if self.compact:
+            df = downcast_floats(
+                df, ["risk_raw", "risk_score"] + [f"contrib_{f}" for f in used]
+            )
+
         return df
 
 
     # --------------------------------------------------
     # Stage 5: Aggregation
     # --------------------------------------------------
-    def aggregate_account_risk(self, df: pd.DataFrame) -> pd.DataFrame:
-        return (
-            df.groupby("account_id")
-            .agg(
-                avg_risk=("risk_score", "mean"),
-                max_risk=("risk_score", "max"),
-                total_posts=("post_id", "count"),
-            )
-            .reset_index()
-        )
+    def aggregate_account_risk(self, df: pd.DataFrame, report: ReportEngine | None = None) -> pd.DataFrame:
+        report = report or ReportEngine().update(df)
+        return report.accounts(["avg_risk", "max_risk", "total_posts", "coactivity_group"])
 
-    def aggregate_narrative_risk(self, df: pd.DataFrame) -> pd.DataFrame:
-        return (
-            df.groupby("narrative")
-            .agg(
-                avg_risk=("risk_score", "mean"),
-                max_risk=("risk_score", "max"),
-                suspicious_posts=("risk_score", lambda x: (x >= 70).sum()),
-                total_posts=("post_id", "count"),
-            )
-            .reset_index()
-        )
+    def aggregate_narrative_risk(self, df: pd.DataFrame, report: ReportEngine | None = None) -> pd.DataFrame:
+        report = report or ReportEngine().update(df)
+        return report.narratives(["avg_risk", "max_risk", "suspicious_posts", "total_posts"])
 
     # --------------------------------------------------
     # Public API
     # --------------------------------------------------
+    def plan_execution(self, df_posts: pd.DataFrame) -> dict:
+        """Strategies for this input under the memory budget (logged)."""
+        return self.planner.plan(len(df_posts), self.config.get("embedding_dim", 384))
+
     def run(self, df_posts: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-        # Stage 1: preprocessing
-        df = self.preprocess_posts(df_posts)
+        self.plan = self.plan_execution(df_posts)
+        batch = self.batch_digest(df_posts)
+        keys = self.stage_keys(df_posts, batch)
+        self.stage_status = {}
+        self.stage_timings = {}
+        prepared = []
+
+        def preprocessed() -> pd.DataFrame:
+            # Stage 1: preprocessing (only when an upstream stage must run)
+            if not prepared:
+                t0 = time.perf_counter()
+                prepared.append(self.preprocess_posts(df_posts))
+                self.stage_timings["preprocess"] = time.perf_counter() - t0
+            return prepared[0]
 
         # Stage 2: signal detection
-        signals = self.detect_signals(df)
-
-        # Merge duplicate clusters into df
-        df = df.merge(
-            signals["clusters"],
-            on="post_id",
-            how="left"
+        signals = self.checkpoint(
+            "signals", keys, lambda: self.detect_signals(preprocessed(), batch)
         )
 
         # Stage 3: feature extraction
-        df, feature_cols = self.extract_features(df, signals)
+        def features():
+            # Merge duplicate clusters into df
+            df = preprocessed().merge(
+                signals["clusters"],
+                on="post_id",
+                how="left"
+            )
+            df = self.attach_coactivity(df, signals["coactivity"])
+            return self.extract_features(df, signals, batch)
+
+        df, feature_cols = self.checkpoint("features", keys, features)
 
         # 🔥 NEW: Step 2 — Behavioral clustering
-        df = self.clusterer.fit_predict(df, feature_cols)
+        def clusters():
+            plan = self.plan["clustering"]
+            df_clustered = self.clusterer.fit_predict(
+                df, feature_cols,
+                fit_rows=plan["fit_rows"],
+                chunk_rows=plan["chunk_rows"],
+                workers=self.config.get("workers", 1),
+            )
+            return df_clustered, self.clusterer
+
+        df, self.clusterer = self.checkpoint("clusters", keys, clusters)
 
         # Stage 4: risk fusion (still heuristic)
+        t0 = time.perf_counter()
         df = self.fuse_risk(df, feature_cols)
+        self.stage_timings["fuse"] = time.perf_counter() - t0
         # 🔥 NEW: Step 4 — Explanation
-        df = self.explainer.explain_posts(df, top_k=self.config.get("top_k_explanations", 4))
-
-        # Stage 5: aggregation
+        t0 = time.perf_counter()
+        top_k = self.config.get("top_k_explanations", 4)
+        if self.compact:
+            df = self.explainer.explain_posts_compact(df, top_k=top_k)
+        else:
+            df = self.explainer.explain_posts(df, top_k=top_k)
+        self.stage_timings["explain"] = time.perf_counter() - t0
+
+        # Stage 5: aggregation (one report pass for all group views)
+        report = ReportEngine().update(df)
         return {
             "posts": df,
-            "accounts": self.aggregate_account_risk(df),
-            "narratives": self.aggregate_narrative_risk(df),
+            "accounts": self.aggregate_account_risk(df, report),
+            "narratives": self.aggregate_narrative_risk(df, report),
             "features": feature_cols,
             "signals": signals,
         }
 
+    # --------------------------------------------------
+    # Stage checkpoints
+    # --------------------------------------------------
+    def stage_keys(self, df_posts: pd.DataFrame, batch: str | None = None) -> dict[str, str] | None:
+        """
+        Chained artefact keys: each stage hashes its upstream key plus the
+        config it reads, so a change only invalidates that stage and the
+        ones after it. None when no artifact_path is configured.
+
+        Stateful stores enter with the state of every batch but this one
+        (`batch`, default batch_digest(df_posts)): a run folds its input
+        into them, and that must not change the keys of its own rerun.
+        """
+        if self.artifacts is None:
+            return None
+
+        cfg = self.config
+        plan = self.plan or self.plan_execution(df_posts)
+        batch = batch or self.batch_digest(df_posts)
+        signals = stage_key("signals", batch, {
+            "compact": self.compact,
+            "encoder": cfg.get("encoder"),
+            "refine_encoder": cfg.get("refine_encoder"),
+            "duplicate_threshold": cfg.get("duplicate_threshold", 0.85),
+            # blocked runs keep oversized components as clusters
+            "duplicate_strategy": plan["duplicates"]["strategy"],
+            "max_component": plan["duplicates"]["max_component"],
+            "campaigns": self.campaigns.fingerprint(exclude=batch) if self.campaigns is not None else None,
+            "campaign_threshold": cfg.get("campaign_threshold"),
+            "campaign_min_members": cfg.get("campaign_min_members", 3),
+            "account_features": self.account_features.fingerprint(exclude=batch),
+            "peak_posts_per_hour": cfg.get("peak_posts_per_hour", 5),
+            **{k: v for k, v in cfg.items() if k.startswith(("coactivity_", "synchrony_"))},
+        })
+        features = stage_key("features", signals, {
+            "compact": self.compact,
+            "normalizer": self.normalizer.fingerprint(exclude=batch) if self.normalizer is not None else None,
+        })
+        clusters = stage_key("clusters", features, {
+            "min_cluster_size": cfg.get("min_cluster_size", 5),
+            "fit_rows": plan["clustering"]["fit_rows"],
+        })
+        return {"signals": signals, "features": features, "clusters": clusters}
+
+    def checkpoint(self, stage: str, keys: dict[str, str] | None, compute):
+        """Stored artefact for this stage's key, else compute() and store it."""
+        t0 = time.perf_counter()
+        value = None if keys is None else self.artifacts.get(stage, keys[stage])
+        if value is None:
+            upstream = sum(self.stage_timings.values())
+            value = compute()
+            if keys is not None:
+                self.artifacts.put(stage, keys[stage], value)
+            self.stage_status[stage] = "computed"
+            # lazily run upstream stages (preprocess) are timed on their own
+            t0 += sum(self.stage_timings.values()) - upstream
+        else:
+            self.stage_status[stage] = "cached"
+        self.stage_timings[stage] = time.perf_counter() - t0
+        return value
@@ -1,57 +1,147 @@
 import pandas as pd
 from engine.pipeline.risk_pipeline import RiskPipeline
-from engine.utils.functions import decision_policy, compute_account_ewma
+from engine.utils.functions import compute_account_ewma_fast
+from engine.utils.functions import DECISIONS
+from engine.utils.decisions import DecisionPolicy
 from engine.utils.functions import (
     serialize_posts,serialize_accounts 
     )
-def run_mvp_pipeline(url="data/sample_posts.csv") -> dict:
-    df_posts = pd.read_csv(url)
+from engine.utils.functions import posts_frame, accounts_frame
+from engine.utils.encoding import encode_records, encode_payload
+from engine.utils.compact import as_enum
+from engine.store.account_state import AccountStateStore
+from engine.analysis.reports import ReportEngine
+from engine.analysis.topk import TopKIndex, DEFAULT_K
+from engine.store.topk import TopKStore
+from engine.store.artifacts import frame_digest
 
-    pipeline = RiskPipeline()
+# Top-k indexes kept with the views: indexed metrics, partition columns
+# and, for the corpus-wide store ("topk_path"), the identity of a row
+# across batches and how its metrics combine. Post ids are only unique
+# within one input, so stored posts are keyed by their dataset too.
+TOP_INDEXES = {
+    "posts": {"metrics": ["risk_score"], "partitions": ["narrative", "decision"], "key": ["dataset_id", "post_id"]},
+    "accounts": {"metrics": ["max_risk", "risk_trend"], "key": "account_id", "combine": {"max_risk": "max"}},
+    "clusters": {"metrics": ["avg_risk"]},
+}
+
+
+def build_mvp_views(
+    url="data/sample_posts.csv",
+    config: dict | None = None,
+    pipeline: RiskPipeline | None = None,
+    dataset_id: str | None = None,
+) -> dict:
+    """
+    Run the pipeline and build the dashboard views as DataFrames
+    (posts / accounts / clusters), before any JSON serialization.
+
+    `url` may also be an already loaded posts DataFrame; pass `pipeline`
+    to reuse a warm RiskPipeline (its config then wins over `config`).
+    `dataset_id` names the input in the corpus-wide top-k store (default:
+    a hash of its content).
+    """
+    df_posts = url if isinstance(url, pd.DataFrame) else pd.read_csv(url)
+
+    pipeline = pipeline or RiskPipeline(config)
     results = pipeline.run(df_posts)
 
     posts = results["posts"].copy()
 
-    posts["decision"] = posts.apply(
-        lambda r: decision_policy(r["risk_score"], r["confidence"]),
-        axis=1
-    )
+    policy = DecisionPolicy(pipeline.config.get("decision_tiers"))
+    posts["decision"] = policy.apply(posts)
+    if pipeline.compact:
+        posts["decision"] = as_enum(posts["decision"], DECISIONS)
 
-    posts = compute_account_ewma(posts, alpha=0.3)
+    # Account trend: continue from persisted state when a store is configured
+    alpha = pipeline.config.get("ewma_alpha", 0.3)
+    state_path = pipeline.config.get("account_state_path")
+    account_state = None
+    if state_path:
+        posts, account_state = AccountStateStore(state_path).advance(posts, alpha=alpha)
+    else:
+        posts = compute_account_ewma_fast(posts, alpha=alpha)
 
-    account_view = (
-        posts.groupby("account_id")
-        .agg(
-            avg_risk=("risk_score", "mean"),
-            max_risk=("risk_score", "max"),
-            avg_confidence=("confidence", "mean"),
-            risk_trend=("risk_ewma", "last"),
-            total_posts=("post_id", "count"),
+    report = ReportEngine().update(posts)
+    account_view = report.accounts([
+        "avg_risk",
+        "max_risk",
+        "avg_confidence",
+        "risk_trend",
+        "total_posts",
+        "coactivity_group",
+        "coactivity_group_size",
+    ]).sort_values("max_risk", ascending=False)
+    if account_state is not None:
+        account_view["risk_trend"] = (
+            account_view["account_id"].astype(str)
+            .map(account_state.set_index("account_id")["risk_ewma"])
+            .to_numpy()
+            .astype(posts["risk_score"].dtype)
         )
-        .reset_index()
-        .sort_values("max_risk", ascending=False)
-    )
 
-    cluster_view = (
-        posts.groupby("behavior_cluster")
-        .agg(
-            posts=("post_id", "count"),
-            avg_risk=("risk_score", "mean"),
-            avg_confidence=("confidence", "mean"),
-            auto_actions=("decision", lambda x: (x == "AUTO_ACTION").sum()),
+    cluster_view = report.clusters(["posts", "avg_risk", "avg_confidence", "auto_actions"])
+
+    # Bounded top-k per view (within this dataset: rows are not keyed)
+    k = pipeline.config.get("top_k_index", DEFAULT_K)
+    views = {"posts": posts, "accounts": account_view, "clusters": cluster_view}
+    top = {
+        name: TopKIndex(k=k, **{**spec, "key": None}).update(views[name])
+        for name, spec in TOP_INDEXES.items()
+    }
+    topk_path = pipeline.config.get("topk_path")
+    if topk_path:
+        # corpus-wide: only this batch's top rows, in their API form
+        dataset_id = dataset_id or frame_digest(df_posts)[:16]
+        candidates = top["posts"].frame()
+        TopKStore(topk_path).record(
+            {
+                "posts": posts_frame(candidates, explainer=pipeline.explainer).assign(
+                    narrative=candidates["narrative"].astype(str).to_numpy(),
+                    dataset_id=dataset_id,
+                ),
+                "accounts": accounts_frame(top["accounts"].frame()),
+            },
+            {name: TOP_INDEXES[name] for name in ("posts", "accounts")},
+            k,
         )
-        .reset_index()
-    )
-    object={
+
+    return {
         "summary": {
             "total_posts": len(posts),
             "auto_actions": int((posts.decision == "AUTO_ACTION").sum()),
             "queue_review": int((posts.decision == "QUEUE_REVIEW").sum()),
         },
-        "posts": serialize_posts(posts),
-        "accounts": serialize_accounts(account_view),
-        "clusters": serialize_accounts(cluster_view),
+        "posts": posts,
+        "accounts": account_view,
+        "clusters": cluster_view,
+        "events": results["signals"]["coordination_events"],
+        "top": top,
+        "explainer": pipeline.explainer,
+        "weights": dict(pipeline.weights),
+        "decision_tiers": policy.tiers,
+    }
+
+
+def run_mvp_pipeline(url="data/sample_posts.csv", config: dict | None = None) -> dict:
+    views = build_mvp_views(url, config)
+
+    object={
+        "summary": views["summary"],
+        "posts": serialize_posts(views["posts"], explainer=views["explainer"]),
+        "accounts": serialize_accounts(views["accounts"]),
+        "clusters": serialize_accounts(views["clusters"]),
     }
     print(object)
 
-    return object
\ No newline at end of file
+    return object
+
+
+def encode_mvp_payload(views: dict) -> bytes:
+    """Same payload as run_mvp_pipeline, encoded straight to JSON bytes."""
+    return encode_payload({
+        "summary": views["summary"],
+        "posts": encode_records(posts_frame(views["posts"], explainer=views["explainer"])),
+        "accounts": encode_records(accounts_frame(views["accounts"])),
+        "clusters": encode_records(accounts_frame(views["clusters"])),
+    })
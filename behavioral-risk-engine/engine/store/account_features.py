@@ -0,0 +1,360 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from engine.utils.functions import grouped_intervals, grouped_window_counts
+
+# Rolling windows: label -> pandas offset
+WINDOWS = {"1m": "1min", "10m": "10min", "1h": "1h", "24h": "24h"}
+HISTORY = max(pd.Timedelta(w) for w in WINDOWS.values())
+
+STATE_COLUMNS = [
+    "account_id",
+    "post_count",
+    "first_timestamp",
+    "last_timestamp",
+    *[f"peak_{label}" for label in WINDOWS],
+    "interval_count",
+    "interval_mean",
+    "interval_m2",
+    "interval_min",
+    "duplicate_count",
+    "coordinated_count",
+]
+POST_COLUMNS = ["post_id", *[f"posts_{label}" for label in WINDOWS], "interval_s"]
+MAX_BATCH_DIGESTS = 10_000
+
+
+class AccountFeatureStore:
+    """
+    Per-account behavioural features, maintained incrementally.
+
+    For every post: posts by the same account in the trailing 1m / 10m /
+    1h / 24h (ties included) and the seconds since the account's previous
+    post. For every account: lifetime peaks of those window counts,
+    inter-post interval mean / std / min, and the share of its posts that
+    were duplicates or in coordinated bursts.
+
+    With a `path` the state lives in SQLite: one row of running
+    aggregates per account (intervals merged with Chan's parallel
+    variance update) plus the account's post times of the last 24h, the
+    longest window, so a new batch is folded in without rescanning older
+    history. As with AccountStateStore, only posts newer than an account's
+    last stored post advance it; older ones (re-uploads) get features from
+    the posts in their own file and change nothing. Batches advanced
+    with a `batch` id are recorded, and a recorded batch is not folded in
+    again. Without a path nothing is kept: features of the batch alone.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        if not path:
+            return
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            peaks = "".join(f"peak_{label} INTEGER NOT NULL, " for label in WINDOWS)
+            conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS account_features (
+                    account_id        TEXT PRIMARY KEY,
+                    post_count        INTEGER NOT NULL,
+                    first_timestamp   INTEGER NOT NULL,
+                    last_timestamp    INTEGER NOT NULL,
+                    {peaks}
+                    interval_count    INTEGER NOT NULL,
+                    interval_mean     REAL NOT NULL,
+                    interval_m2       REAL NOT NULL,
+                    interval_min      REAL,
+                    duplicate_count   INTEGER NOT NULL,
+                    coordinated_count INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS recent_posts (
+                    account_id TEXT NOT NULL,
+                    timestamp  INTEGER NOT NULL,
+                    posts      INTEGER NOT NULL,
+                    PRIMARY KEY (account_id, timestamp)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key   TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS batches (
+                    seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+                    digest TEXT NOT NULL UNIQUE
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def fingerprint(self, exclude: str | None = None) -> dict | None:
+        """
+        What features of a new batch depend on, for artefact keys: the
+        batches folded in, except `exclude` (the batch being scored, whose
+        own posts do not change its features on a rerun), and the number
+        of writes without a batch id (`revision`).
+        """
+        if not self.path:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+            batches = [d for (d,) in conn.execute("SELECT digest FROM batches ORDER BY digest") if d != exclude]
+        return {
+            "path": os.path.abspath(self.path),
+            "revision": row[0] if row else 0,
+            "batches": hashlib.sha256(json.dumps(batches).encode()).hexdigest()[:32],
+        }
+
+    # --------------------------------------------------
+    # Bulk read
+    # --------------------------------------------------
+    @staticmethod
+    def _empty_state() -> pd.DataFrame:
+        return pd.DataFrame({c: [] for c in STATE_COLUMNS}).pipe(_state_types)
+
+    def _load(self, conn: sqlite3.Connection, ids) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """State rows and recent post times of the given accounts."""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (account_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM wanted")
+        conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((i,) for i in ids))
+
+        state = pd.read_sql_query(
+            f"""
+            SELECT {", ".join(f"s.{c}" for c in STATE_COLUMNS)} FROM account_features s
+            JOIN wanted w ON w.account_id = s.account_id
+            """,
+            conn,
+        )
+        recent = pd.read_sql_query(
+            """
+            SELECT r.account_id, r.timestamp, r.posts FROM recent_posts r
+            JOIN wanted w ON w.account_id = r.account_id
+            """,
+            conn,
+        )
+        return _state_types(state), recent.astype({"account_id": str, "timestamp": "int64", "posts": "int64"})
+
+    def load(self, account_ids) -> pd.DataFrame:
+        """Derived features of the given accounts (unknown accounts are absent)."""
+        if not self.path:
+            return derive_account_features(self._empty_state())
+        ids = pd.unique(pd.Series(account_ids, dtype=str))
+        with self._connect() as conn:
+            state, _ = self._load(conn, ids)
+        return derive_account_features(state)
+
+    # --------------------------------------------------
+    # Incremental update
+    # --------------------------------------------------
+    def advance(
+        self,
+        posts: pd.DataFrame,
+        duplicate_post_ids: set,
+        coordinated_post_ids: set,
+        batch: str | None = None,
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Fold a batch into the per-account state (once per `batch` id).
+
+        Returns
+        -------
+        post_features : pd.DataFrame
+            POST_COLUMNS, aligned with `posts`
+        accounts : pd.DataFrame
+            Derived features (after this batch) of every account in `posts`
+        """
+        if not {"post_id", "account_id", "timestamp"}.issubset(posts.columns):
+            raise ValueError("posts must contain post_id, account_id, timestamp")
+
+        key = posts["account_id"].astype(str).to_numpy()
+        ids = pd.unique(key)
+        if not self.path:
+            return self._advance(
+                posts, key, self._empty_state(), None, duplicate_post_ids, coordinated_post_ids
+            )[:2]
+
+        with self._connect() as conn:
+            # one writer at a time: the state read here is the one replaced
+            conn.execute("BEGIN IMMEDIATE")
+            prior, recent = self._load(conn, ids)
+            post_features, accounts, changes = self._advance(
+                posts, key, prior, recent, duplicate_post_ids, coordinated_post_ids
+            )
+            seen = batch is not None and conn.execute(
+                "SELECT 1 FROM batches WHERE digest = ?", (batch,)
+            ).fetchone() is not None
+            if changes is not None and not seen:
+                self._write(conn, *changes, batch=batch)
+        return post_features, accounts
+
+    def _advance(self, posts, key, prior, recent, duplicate_post_ids, coordinated_post_ids):
+        ts = pd.to_datetime(posts["timestamp"]).to_numpy("datetime64[ns]")
+        n = len(posts)
+        prior = prior.set_index("account_id")
+        if recent is None:
+            recent = pd.DataFrame({"account_id": [], "timestamp": [], "posts": []}).astype(
+                {"account_id": str, "timestamp": "int64", "posts": "int64"}
+            )
+
+        codes, uniques = pd.factorize(key)
+        uniques = pd.Index(uniques)
+        valid = ~np.isnat(ts)
+        last_ts = prior["last_timestamp"].reindex(key).to_numpy("datetime64[ns]")
+        is_new = valid & (np.isnat(last_ts) | (ts > last_ts))
+
+        # re-uploaded posts form their own groups (in-file history only);
+        # new posts continue from the account's stored recent posts
+        m = int(valid.sum())
+        groups = np.where(is_new, codes, codes + len(uniques))[valid]
+        times = np.r_[ts[valid].astype(np.int64), recent["timestamp"].to_numpy()]
+        groups = np.r_[groups, uniques.get_indexer(recent["account_id"])]
+        weights = np.r_[np.ones(m, dtype=np.int64), recent["posts"].to_numpy()]
+
+        out = pd.DataFrame({"post_id": posts["post_id"].to_numpy()}, index=posts.index)
+        for label, window in WINDOWS.items():
+            counts = np.zeros(n, dtype=np.int64)
+            counts[valid] = grouped_window_counts(times, groups, window, weights)[:m]
+            out[f"posts_{label}"] = counts
+        out["interval_s"] = np.nan
+        out.loc[valid, "interval_s"] = grouped_intervals(times, groups)[:m]
+
+        # running aggregates of the new posts, merged into the prior state
+        fresh = pd.DataFrame({
+            "account_id": key[is_new],
+            "timestamp": ts[is_new],
+            "interval": out["interval_s"].to_numpy()[is_new],
+            "duplicate": posts["post_id"].isin(duplicate_post_ids).to_numpy()[is_new],
+            "coordinated": posts["post_id"].isin(coordinated_post_ids).to_numpy()[is_new],
+            **{f"peak_{label}": out[f"posts_{label}"].to_numpy()[is_new] for label in WINDOWS},
+        })
+        seen = prior.index.intersection(uniques)
+        if fresh.empty:
+            return out, derive_account_features(prior.loc[seen].rename_axis("account_id").reset_index()), None
+
+        by_account = fresh.groupby("account_id")
+        batch = by_account.agg(
+            post_count=("timestamp", "size"),
+            first_timestamp=("timestamp", "min"),
+            last_timestamp=("timestamp", "max"),
+            **{f"peak_{label}": (f"peak_{label}", "max") for label in WINDOWS},
+            interval_count=("interval", "count"),
+            interval_mean=("interval", "mean"),
+            interval_min=("interval", "min"),
+            duplicate_count=("duplicate", "sum"),
+            coordinated_count=("coordinated", "sum"),
+        )
+        batch["interval_m2"] = (
+            (fresh["interval"] - by_account["interval"].transform("mean")) ** 2
+        ).groupby(fresh["account_id"]).sum()
+        batch["interval_mean"] = batch["interval_mean"].fillna(0.0)
+
+        old = prior.reindex(batch.index)
+        known = old["post_count"].notna().to_numpy()
+        merged = batch.copy()
+        for col in ("post_count", "duplicate_count", "coordinated_count"):
+            merged[col] += old[col].fillna(0).astype(np.int64)
+        merged["first_timestamp"] = old["first_timestamp"].where(known, batch["first_timestamp"])
+        for label in WINDOWS:
+            merged[f"peak_{label}"] = np.fmax(batch[f"peak_{label}"], old[f"peak_{label}"].fillna(0)).astype(np.int64)
+        merged["interval_min"] = np.fmin(batch["interval_min"], old["interval_min"])
+
+        # Chan et al.: combine (count, mean, M2) of history and batch
+        na = old["interval_count"].fillna(0).to_numpy(np.float64)
+        nb = batch["interval_count"].to_numpy(np.float64)
+        total = na + nb
+        delta = batch["interval_mean"].to_numpy() - old["interval_mean"].fillna(0).to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = old["interval_mean"].fillna(0).to_numpy() + np.where(total > 0, delta * nb / total, 0.0)
+            m2 = (
+                old["interval_m2"].fillna(0).to_numpy()
+                + batch["interval_m2"].to_numpy()
+                + np.where(total > 0, delta ** 2 * na * nb / total, 0.0)
+            )
+        merged["interval_count"] = total.astype(np.int64)
+        merged["interval_mean"] = mean
+        merged["interval_m2"] = m2
+        merged = merged.rename_axis("account_id").reset_index()[STATE_COLUMNS]
+
+        untouched = prior.loc[seen.difference(merged["account_id"])].rename_axis("account_id").reset_index()
+        state = pd.concat([untouched, merged], ignore_index=True)
+        # post times per account for the next batch's windows
+        new_recent = (
+            fresh.assign(timestamp=fresh["timestamp"].to_numpy().astype(np.int64))
+            .groupby(["account_id", "timestamp"]).size().rename("posts").reset_index()
+        )
+        return out, derive_account_features(state), (merged, new_recent)
+
+    def _write(self, conn: sqlite3.Connection, state: pd.DataFrame, recent: pd.DataFrame, batch: str | None = None) -> None:
+        rows = state.astype({"first_timestamp": "datetime64[ns]", "last_timestamp": "datetime64[ns]"})
+        rows["first_timestamp"] = rows["first_timestamp"].astype(np.int64)
+        rows["last_timestamp"] = rows["last_timestamp"].astype(np.int64)
+        rows = rows.astype(object).where(rows.notna(), None)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO account_features VALUES ({', '.join('?' * len(STATE_COLUMNS))})",
+            rows.itertuples(index=False, name=None),
+        )
+        conn.executemany(
+            """
+            INSERT INTO recent_posts VALUES (?, ?, ?)
+            ON CONFLICT(account_id, timestamp) DO UPDATE SET posts = posts + excluded.posts
+            """,
+            recent.itertuples(index=False, name=None),
+        )
+        # drop times no future window can reach
+        conn.executemany(
+            "DELETE FROM recent_posts WHERE account_id = ? AND timestamp <= ?",
+            zip(state["account_id"].tolist(), (rows["last_timestamp"] - HISTORY.value).tolist()),
+        )
+        if batch is not None:
+            conn.execute("INSERT INTO batches (digest) VALUES (?)", (batch,))
+            conn.execute("DELETE FROM batches WHERE seq <= (SELECT MAX(seq) FROM batches) - ?", (MAX_BATCH_DIGESTS,))
+            return
+        conn.execute(
+            """
+            INSERT INTO meta VALUES ('revision', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+            """
+        )
+
+
+def _state_types(state: pd.DataFrame) -> pd.DataFrame:
+    state = state.astype({
+        "account_id": str,
+        "post_count": "int64",
+        **{f"peak_{label}": "int64" for label in WINDOWS},
+        "interval_count": "int64",
+        "interval_mean": "float64",
+        "interval_m2": "float64",
+        "interval_min": "float64",
+        "duplicate_count": "int64",
+        "coordinated_count": "int64",
+    })
+    state["first_timestamp"] = pd.to_datetime(state["first_timestamp"].astype("int64")).astype("datetime64[ns]")
+    state["last_timestamp"] = pd.to_datetime(state["last_timestamp"].astype("int64")).astype("datetime64[ns]")
+    return state
+
+
+def derive_account_features(state: pd.DataFrame) -> pd.DataFrame:
+    """Running aggregates -> per-account features."""
+    span_hours = (state["last_timestamp"] - state["first_timestamp"]).dt.total_seconds() / 3600
+    count = state["interval_count"]
+    out = pd.DataFrame({
+        "account_id": state["account_id"].astype(str),
+        "post_count": state["post_count"],
+        "posting_rate": state["post_count"] / span_hours.clip(lower=1),
+        **{f"peak_{label}": state[f"peak_{label}"] for label in WINDOWS},
+        "interval_mean_s": state["interval_mean"].where(count > 0),
+        "interval_std_s": np.sqrt(state["interval_m2"] / (count - 1)).where(count > 1),
+        "interval_min_s": state["interval_min"],
+        "duplicate_ratio": state["duplicate_count"] / state["post_count"],
+        "coordination_ratio": state["coordinated_count"] / state["post_count"],
+    })
+    return out.reset_index(drop=True)
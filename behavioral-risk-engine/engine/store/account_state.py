@@ -0,0 +1,160 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from engine.utils.functions import grouped_ewma
+
+
+def _utc_naive(timestamps) -> pd.Series:
+    """Timestamps as naive UTC datetime64[ns] (offset-aware input converted, naive kept)."""
+    return pd.to_datetime(timestamps, utc=True).dt.tz_convert(None).astype("datetime64[ns]")
+
+
+class AccountStateStore:
+    """
+    Persistent per-account risk state (SQLite, one row per account).
+
+    Keeps the last EWMA value, last post timestamp, lifetime post count and
+    max risk so an account's trend carries over between uploads: only posts
+    newer than the stored timestamp advance the state, which makes each run
+    O(new posts) and re-uploading the same file idempotent.
+    """
+
+    COLUMNS = ["account_id", "risk_ewma", "last_timestamp", "post_count", "max_risk"]
+
+    def __init__(self, path: str = "data/state/account_state.sqlite"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS account_state (
+                    account_id     TEXT PRIMARY KEY,
+                    risk_ewma      REAL NOT NULL,
+                    last_timestamp INTEGER NOT NULL,
+                    post_count     INTEGER NOT NULL,
+                    max_risk       REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    # --------------------------------------------------
+    # Bulk read / write
+    # --------------------------------------------------
+    def load(self, account_ids) -> pd.DataFrame:
+        """State rows for the given accounts (unknown accounts are absent)."""
+        ids = pd.unique(pd.Series(account_ids, dtype=str))
+
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (account_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM wanted")
+            conn.executemany(
+                "INSERT OR IGNORE INTO wanted VALUES (?)", ((i,) for i in ids)
+            )
+            state = pd.read_sql_query(
+                """
+                SELECT s.* FROM account_state s
+                JOIN wanted w ON w.account_id = s.account_id
+                """,
+                conn,
+            )
+
+        return state.astype({
+            "account_id": str,
+            "risk_ewma": "float64",
+            "last_timestamp": "datetime64[ns]",
+            "post_count": "int64",
+            "max_risk": "float64",
+        })
+
+    def upsert(self, state: pd.DataFrame) -> None:
+        rows = zip(
+            state["account_id"].astype(str),
+            state["risk_ewma"].astype(float),
+            _utc_naive(state["last_timestamp"]).astype("int64"),
+            state["post_count"].astype(int),
+            state["max_risk"].astype(float),
+        )
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO account_state VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(account_id) DO UPDATE SET
+                    risk_ewma      = excluded.risk_ewma,
+                    last_timestamp = excluded.last_timestamp,
+                    post_count     = excluded.post_count,
+                    max_risk       = excluded.max_risk
+                """,
+                ((a, e, int(t), int(c), m) for a, e, t, c, m in rows),
+            )
+
+    # --------------------------------------------------
+    # EWMA continuation
+    # --------------------------------------------------
+    def advance(self, posts: pd.DataFrame, alpha: float = 0.3) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Continue each account's EWMA from its stored state over the posts
+        newer than its last seen timestamp, then persist the new state.
+
+        Posts at or before the stored timestamp were already folded into the
+        state (re-uploads); they keep an in-file EWMA and change nothing.
+
+        Returns
+        -------
+        posts : pd.DataFrame
+            Sorted by timestamp, with `risk_ewma`
+        state : pd.DataFrame
+            Current state (after this batch) for every account in `posts`
+        """
+        posts = posts.sort_values("timestamp", kind="stable")
+        account_key = posts["account_id"].astype(str)
+        prior = self.load(account_key).set_index("account_id")
+
+        timestamps = _utc_naive(posts["timestamp"])
+        last_ts = prior["last_timestamp"].reindex(account_key).to_numpy()
+        is_new = pd.isna(last_ts) | (timestamps.to_numpy() > last_ts)
+
+        codes, _ = pd.factorize(account_key)
+        risk = posts["risk_score"].to_numpy()
+        ewma = np.empty(len(posts), dtype=np.float64)
+
+        ewma[~is_new] = grouped_ewma(risk[~is_new], codes[~is_new], alpha=alpha)
+        ewma[is_new] = grouped_ewma(
+            risk[is_new],
+            codes[is_new],
+            alpha=alpha,
+            initial=prior["risk_ewma"].reindex(account_key[is_new]).to_numpy(dtype=np.float64),
+        )
+        posts["risk_ewma"] = ewma.astype(posts["risk_score"].dtype)
+
+        fresh = posts[is_new].assign(account_key=account_key[is_new], utc_ts=timestamps[is_new])
+        batch = (
+            fresh.groupby("account_key")
+            .agg(
+                risk_ewma=("risk_ewma", "last"),
+                last_timestamp=("utc_ts", "max"),
+                post_count=("post_id", "count"),
+                max_risk=("risk_score", "max"),
+            )
+        )
+        old = prior.reindex(batch.index)
+        batch["post_count"] += old["post_count"].fillna(0).astype(int)
+        batch["max_risk"] = np.fmax(batch["max_risk"], old["max_risk"].to_numpy())
+
+        batch = batch.rename_axis("account_id").reset_index()
+        if not batch.empty:
+            self.upsert(batch)
+
+        state = pd.concat(
+            [prior.drop(index=batch["account_id"], errors="ignore").reset_index(), batch],
+            ignore_index=True,
+        )
+        return posts, state[self.COLUMNS]
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+# Bump a stage's version when its code changes so stale artefacts are
+# not reused (the version is part of the key).
+STAGE_VERSIONS = {
+    "signals": 5,
+    "features": 2,
+    "clusters": 1,
+}
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a frame (values, index and column names)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def stage_key(stage: str, upstream: str, config: dict | None = None) -> str:
+    """
+    Key of a stage artefact: its upstream key (which chains the input data
+    and every earlier stage's settings), the stage code version and the
+    config entries the stage reads.
+    """
+    if stage not in STAGE_VERSIONS:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    payload = json.dumps(
+        [stage, STAGE_VERSIONS[stage], upstream, config or {}],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Stage results of RiskPipeline.run on disk (one pickle per stage key),
+    with an in-process copy of the most recently used artefacts.
+
+    A rerun whose stage keys are unchanged loads signals / features /
+    behaviour clusters instead of recomputing them, so changing fusion
+    weights or decision tiers only reruns the cheap downstream stages.
+    The oldest files are removed once the store grows past `max_bytes`.
+    """
+
+    def __init__(self, root: str = "data/state/artifacts", max_bytes: int = 2 * 1024 ** 3, memory_items: int = 8):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, f"{stage}-{key}.pkl")
+
+    def get(self, stage: str, key: str):
+        """Stored artefact, or None when the key has not been computed."""
+        path = self._path(stage, key)
+        if (stage, key) in self._memory:
+            value = self._memory[(stage, key)]
+        else:
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                return None
+        try:
+            os.utime(path)  # recently used files are pruned last
+        except FileNotFoundError:
+            pass
+        self._remember(stage, key, value)
+        return value
+
+    def put(self, stage: str, key: str, value) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(stage, key))
+
+        self._remember(stage, key, value)
+        self.prune()
+
+    def _remember(self, stage: str, key: str, value) -> None:
+        self._memory.pop((stage, key), None)
+        self._memory[(stage, key)] = value
+        while len(self._memory) > self.memory_items:
+            self._memory.pop(next(iter(self._memory)))
+
+    def prune(self) -> None:
+        files = []
+        for name in os.listdir(self.root):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.root, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        self._memory.clear()
+        for name in os.listdir(self.root):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.root, name))
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are not serialised across processes
+    fcntl = None
+
+MAX_BATCH_DIGESTS = 10_000
+# per-row results kept for the most recent batches (re-scoring reuses them)
+MAX_BATCH_RESULTS = 256
+
+
+class CampaignLibrary:
+    """
+    Known copy-paste campaigns: one L2-normalised centroid embedding per
+    confirmed duplicate cluster, with its member count, first / last seen
+    time and dominant narrative, in a single .npz file (replaced
+    atomically, so readers never see a half-written index).
+
+    Incoming posts are matched against the centroids first, with a blocked
+    (posts x centroids) product: a few thousand centroids cost one small
+    matmul per block of posts. Only unmatched posts then need the full
+    pairwise similarity. Centroids are only comparable within one
+    embedding space, so the library records the encoder it was built with.
+
+    The match of each recorded batch is kept in <path>.batches/, so a
+    batch scored again is matched as it was the first time, not against
+    the centroids it created or moved itself.
+    """
+
+    def __init__(self, path: str = "data/state/campaigns.npz", space: str = "default", block_rows: int = 4096):
+        self.path = path
+        self.space = space
+        self.block_rows = block_rows
+        self._mtime = None
+        self._load()
+
+    # --------------------------------------------------
+    # Storage
+    # --------------------------------------------------
+    def _empty(self, dim: int = 0) -> None:
+        self.centroids = np.empty((0, dim), dtype=np.float32)
+        self.members = np.empty(0, dtype=np.int64)
+        self.first_seen = np.empty(0, dtype="datetime64[ns]")
+        self.last_seen = np.empty(0, dtype="datetime64[ns]")
+        self.narrative = np.empty(0, dtype=object)
+        self.digests: list[str] = []
+        self.revision = 0
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            self._empty()
+            return
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        with np.load(self.path, allow_pickle=False) as data:
+            space = str(data["space"])
+            if space != self.space:
+                raise ValueError(
+                    f"Campaign library {self.path} was built with encoder {space}, not {self.space}"
+                )
+            self.centroids = data["centroids"]
+            self.members = data["members"]
+            self.first_seen = data["first_seen"].astype("datetime64[ns]")
+            self.last_seen = data["last_seen"].astype("datetime64[ns]")
+            self.narrative = data["narrative"].astype(object)
+            self.digests = data["digests"].tolist()
+            self.revision = int(data["revision"])
+        self._mtime = mtime
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                space=np.array(self.space),
+                centroids=self.centroids,
+                members=self.members,
+                first_seen=self.first_seen.astype(np.int64),
+                last_seen=self.last_seen.astype(np.int64),
+                narrative=self.narrative.astype(str),
+                digests=np.array(self.digests, dtype=str),
+                revision=np.array(self.revision),
+            )
+        os.replace(tmp, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def fingerprint(self, exclude: str | None = None) -> dict:
+        """
+        Identifies the library state, for artefact keys: the batches folded
+        in, except `exclude` (the batch being scored, which batch_result()
+        matches as before its own record), and the records without a batch
+        digest (`revision`).
+        """
+        self._load()
+        batches = sorted(set(self.digests) - {exclude})
+        return {
+            "space": self.space,
+            "batches": hashlib.sha256(json.dumps(batches).encode()).hexdigest()[:32],
+            "revision": self.revision,
+        }
+
+    def campaigns(self) -> pd.DataFrame:
+        self._load()
+        return pd.DataFrame({
+            "campaign_id": np.arange(len(self)),
+            "members": self.members,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "narrative": self.narrative,
+        })
+
+    # --------------------------------------------------
+    # Matching
+    # --------------------------------------------------
+    def nearest(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best centroid of each L2-normalised row: (campaign id, cosine);
+        (-1, 0.0) when the library is empty.
+        """
+        self._load()
+        n = len(x)
+        best = np.full(n, -1, dtype=np.int64)
+        score = np.zeros(n, dtype=np.float32)
+        if len(self) == 0 or n == 0:
+            return best, score
+        if x.shape[1] != self.centroids.shape[1]:
+            raise ValueError(
+                f"Embedding size {x.shape[1]} does not match the campaign library ({self.centroids.shape[1]})"
+            )
+
+        ct = self.centroids.T
+        for start in range(0, n, self.block_rows):
+            sims = x[start:start + self.block_rows] @ ct
+            best[start:start + len(sims)] = sims.argmax(axis=1)
+            score[start:start + len(sims)] = sims.max(axis=1)
+        return best, score
+
+    def match(self, x: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+        """nearest(), with ids of rows below `threshold` set to -1."""
+        best, score = self.nearest(x)
+        best[score < threshold] = -1
+        return best, score
+
+    def batch_result(self, batch: str, threshold: float) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+        """
+        (matched campaign ids, match scores, returned campaign ids) of a
+        batch already recorded with the same match `threshold`, else None.
+        """
+        try:
+            with np.load(self._batch_path(batch), allow_pickle=False) as data:
+                if float(data["threshold"]) != float(threshold):
+                    return None
+                return data["matched"], data["scores"], data["assigned"]
+        except FileNotFoundError:
+            return None
+
+    def _batch_path(self, batch: str) -> str:
+        return os.path.join(self.path + ".batches", f"{batch}.npz")
+
+    def _save_batch(self, batch, threshold, matched, scores, assigned) -> None:
+        folder = os.path.dirname(self._batch_path(batch))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, threshold=np.array(float(threshold)), matched=matched, scores=scores, assigned=assigned)
+        os.replace(tmp, self._batch_path(batch))
+
+        saved = sorted(
+            (os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".npz")),
+            key=os.path.getmtime,
+        )
+        for old in saved[:-MAX_BATCH_RESULTS]:
+            os.remove(old)
+
+    # --------------------------------------------------
+    # Learning
+    # --------------------------------------------------
+    def record(
+        self,
+        x: np.ndarray,
+        campaign_ids: np.ndarray,
+        cluster_ids: np.ndarray,
+        timestamps,
+        narratives=None,
+        min_members: int = 3,
+        batch: str | None = None,
+        scores: np.ndarray | None = None,
+        threshold: float | None = None,
+    ) -> np.ndarray:
+        """
+        Fold one run into the library and return each row's campaign id
+        (-1 = none):
+          * rows matched to a campaign (campaign_ids >= 0) move its centroid
+            (running mean) and extend its member count / last seen;
+          * unmatched duplicate clusters with >= min_members rows become new
+            campaigns.
+        A batch (identified by its `batch` digest) is folded in once, so
+        re-scoring the same posts leaves the library unchanged; with its
+        match `scores` and `threshold` the batch's result is also kept for
+        batch_result(). The file is re-read and written under a lock, so
+        concurrent processes do not overwrite each other's campaigns.
+        """
+        campaign_ids = np.asarray(campaign_ids, dtype=np.int64).copy()
+        matched_ids = campaign_ids.copy()
+        cluster_ids = np.asarray(cluster_ids)
+        ts = pd.to_datetime(pd.Series(timestamps)).to_numpy().astype("datetime64[ns]")
+        narratives = (
+            np.asarray(narratives, dtype=object) if narratives is not None
+            else np.full(len(x), "", dtype=object)
+        )
+
+        # new campaigns: big enough clusters among the unmatched rows
+        unmatched = campaign_ids < 0
+        labels, sizes = np.unique(cluster_ids[unmatched], return_counts=True)
+        new_labels = labels[sizes >= min_members]
+        if len(new_labels) == 0 and not (~unmatched).any():
+            return campaign_ids
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._load()
+            if batch is not None and batch in self.digests:
+                known = self.batch_result(batch, threshold) if threshold is not None else None
+                return known[2] if known is not None else campaign_ids
+            if len(self) == 0:
+                self.centroids = np.empty((0, x.shape[1]), dtype=np.float32)
+
+            # campaigns matched this run
+            matched = np.flatnonzero(~unmatched)
+            if len(matched):
+                ids, inverse = np.unique(campaign_ids[matched], return_inverse=True)
+                sums = np.zeros((len(ids), x.shape[1]), dtype=np.float64)
+                np.add.at(sums, inverse, x[matched])
+                counts = np.bincount(inverse)
+                total = self.members[ids] + counts
+                mean = (self.centroids[ids] * self.members[ids, None] + sums) / total[:, None]
+                self.centroids[ids] = _normalize(mean)
+                self.members[ids] = total
+                last = pd.Series(ts[matched]).groupby(inverse).max().to_numpy()
+                self.last_seen[ids] = np.maximum(self.last_seen[ids], last)
+
+            # new campaigns
+            if len(new_labels):
+                start = len(self)
+                rows = np.flatnonzero(unmatched & np.isin(cluster_ids, new_labels))
+                codes = np.searchsorted(new_labels, cluster_ids[rows])
+                sums = np.zeros((len(new_labels), x.shape[1]), dtype=np.float64)
+                np.add.at(sums, codes, x[rows])
+                frame = pd.DataFrame({"code": codes, "ts": ts[rows], "narrative": narratives[rows]})
+                grouped = frame.groupby("code")
+
+                self.centroids = np.vstack([self.centroids, _normalize(sums)])
+                self.members = np.concatenate([self.members, np.bincount(codes)])
+                self.first_seen = np.concatenate([self.first_seen, grouped["ts"].min().to_numpy()])
+                self.last_seen = np.concatenate([self.last_seen, grouped["ts"].max().to_numpy()])
+                self.narrative = np.concatenate([
+                    self.narrative,
+                    grouped["narrative"].agg(lambda s: s.mode().iat[0] if s.notna().any() else "").to_numpy(),
+                ])
+                campaign_ids[rows] = start + codes
+
+            if batch is not None:
+                self.digests.append(batch)
+                del self.digests[:-MAX_BATCH_DIGESTS]
+            else:
+                self.revision += 1
+            self._save()
+            if batch is not None and scores is not None and threshold is not None:
+                self._save_batch(batch, threshold, matched_ids, np.asarray(scores, dtype=np.float32), campaign_ids)
+        return campaign_ids
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
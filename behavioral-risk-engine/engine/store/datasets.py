@@ -0,0 +1,333 @@
+import hashlib
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from engine.pipeline.risk_pipeline import DataValidationError
+
+# Bump when the views built for a dataset change shape, so results stored
+# by an older version are rebuilt instead of loaded.
+VIEWS_VERSION = 5
+
+
+class DatasetTooLarge(ValueError):
+    """An upload that alone exceeds the registry's byte budget."""
+
+
+class DatasetRegistry:
+    """
+    Uploaded datasets and their computed results, shared by every API
+    worker process.
+
+    Each upload is identified by the hash of its content (re-uploading the
+    same file reuses the same dataset), parsed once into Parquet and
+    scored once: the first process to claim a dataset computes its views
+    and stores them next to the data, the others wait for and load that
+    result. Datasets not used for `max_age_days`, then the least recently
+    used ones past `max_bytes`, are evicted (pinned datasets are kept; an
+    upload larger than `max_bytes` on its own is rejected).
+    A dataset the pipeline rejects (DataValidationError) stays failed
+    until it is registered again; any other error is treated as transient
+    and retried by the next request.
+
+    Layout: <root>/registry.sqlite and <root>/<dataset_id>/{posts.parquet, views-v<N>.pkl}
+    """
+
+    def __init__(
+        self,
+        root: str = "data/datasets",
+        max_age_days: float = 7.0,
+        max_bytes: int = 5 * 1024 ** 3,
+        memory_items: int = 4,
+        compute_timeout: float = 600.0,
+    ):
+        self.root = root
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.compute_timeout = compute_timeout
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._compute_locks = {}
+
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS datasets (
+                    dataset_id  TEXT PRIMARY KEY,
+                    name        TEXT NOT NULL,
+                    rows        INTEGER NOT NULL,
+                    bytes       INTEGER NOT NULL,
+                    pinned      INTEGER NOT NULL DEFAULT 0,
+                    uploaded_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    status      TEXT NOT NULL,
+                    claimed_at  REAL,
+                    error       TEXT
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.root, "registry.sqlite"), timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _dir(self, dataset_id: str) -> str:
+        return os.path.join(self.root, dataset_id)
+
+    # --------------------------------------------------
+    # Registration
+    # --------------------------------------------------
+    def register_file(self, fileobj, name: str, pinned: bool = False) -> str:
+        """Stream an upload to disk, hashing it on the way; returns its id."""
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"), suffix=".csv")
+        h = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for block in iter(lambda: fileobj.read(1 << 20), b""):
+                    h.update(block)
+                    out.write(block)
+            return self._ingest(tmp, h.hexdigest()[:16], name, pinned)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def register_path(self, path: str, pinned: bool = False) -> str:
+        with open(path, "rb") as f:
+            return self.register_file(f, os.path.basename(path), pinned)
+
+    def _ingest(self, csv_path: str, dataset_id: str, name: str, pinned: bool) -> str:
+        now = time.time()
+        with self._connect() as conn:
+            # re-registering a dataset that failed to score retries it
+            updated = conn.execute(
+                """
+                UPDATE datasets SET uploaded_at = ?, last_access = ?, pinned = MAX(pinned, ?),
+                    status = CASE status WHEN 'failed' THEN 'uploaded' ELSE status END,
+                    error  = CASE status WHEN 'failed' THEN NULL ELSE error END
+                WHERE dataset_id = ?
+                """,
+                (now, now, int(pinned), dataset_id),
+            ).rowcount
+        if updated and os.path.exists(os.path.join(self._dir(dataset_id), "posts.parquet")):
+            return dataset_id
+
+        try:
+            df = pd.read_csv(csv_path)
+        except Exception as e:
+            raise ValueError(f"Could not parse {name} as CSV: {e}")
+
+        target = self._dir(dataset_id)
+        os.makedirs(target, exist_ok=True)
+        # one temp file per writer: workers ingesting the same content
+        # concurrently each replace posts.parquet with identical bytes
+        fd, tmp = tempfile.mkstemp(dir=target, suffix=".parquet.tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, os.path.join(target, "posts.parquet"))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        size = self._size(dataset_id)
+        if size > self.max_bytes and not pinned:
+            self.delete(dataset_id)
+            raise DatasetTooLarge(
+                f"{name} takes {size} bytes stored, over the {self.max_bytes} byte dataset budget"
+            )
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO datasets (dataset_id, name, rows, bytes, pinned, uploaded_at, last_access, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'uploaded')
+                ON CONFLICT(dataset_id) DO UPDATE SET
+                    uploaded_at = excluded.uploaded_at,
+                    last_access = excluded.last_access
+                """,
+                (dataset_id, name, len(df), size, int(pinned), now, now),
+            )
+        self.evict(keep=dataset_id)
+        return dataset_id
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def info(self, dataset_id: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM datasets WHERE dataset_id = ?", (dataset_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(dataset_id)
+        return dict(row)
+
+    def entries(self) -> list[dict]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM datasets ORDER BY uploaded_at DESC").fetchall()
+        return [dict(r) for r in rows]
+
+    def latest(self) -> str | None:
+        """Most recently uploaded dataset (the default for the dashboard)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT dataset_id FROM datasets WHERE status != 'failed' "
+                "ORDER BY uploaded_at DESC LIMIT 1"
+            ).fetchone()
+        return row["dataset_id"] if row else None
+
+    def posts(self, dataset_id: str) -> pd.DataFrame:
+        self.info(dataset_id)
+        return pd.read_parquet(os.path.join(self._dir(dataset_id), "posts.parquet"))
+
+    # --------------------------------------------------
+    # Computed results
+    # --------------------------------------------------
+    def views(self, dataset_id: str, build) -> dict:
+        """
+        Computed views of a dataset: from memory, else from disk, else
+        build(posts_df) once across all processes (others wait for it).
+        """
+        with self._lock:
+            if dataset_id in self._memory:
+                self._memory.move_to_end(dataset_id)
+                return self._memory[dataset_id]
+            lock = self._compute_locks.setdefault(dataset_id, threading.Lock())
+
+        with lock:
+            with self._lock:
+                if dataset_id in self._memory:
+                    return self._memory[dataset_id]
+            views = self._load_or_build(dataset_id, build)
+            with self._lock:
+                self._memory[dataset_id] = views
+                while len(self._memory) > self.memory_items:
+                    self._memory.popitem(last=False)
+        self._touch(dataset_id)
+        return views
+
+    def _load_or_build(self, dataset_id: str, build) -> dict:
+        path = os.path.join(self._dir(dataset_id), f"views-v{VIEWS_VERSION}.pkl")
+        deadline = time.time() + self.compute_timeout
+
+        while True:
+            info = self.info(dataset_id)
+            if info["status"] == "ready" and os.path.exists(path):
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+            if info["status"] == "failed":
+                raise ValueError(f"Dataset {dataset_id} failed to score: {info['error']}")
+            if self._claim(dataset_id):
+                break
+            if time.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for dataset {dataset_id}")
+            time.sleep(0.2)
+
+        try:
+            views = build(self.posts(dataset_id))
+        except DataValidationError as e:
+            # the content itself cannot be scored: remembered until re-uploaded
+            self._set_status(dataset_id, "failed", f"{type(e).__name__}: {e}")
+            raise ValueError(f"Dataset {dataset_id} failed to score: {e}")
+        except BaseException:
+            # anything else (model download, lock timeout, OOM, ...) may pass:
+            # release the claim so the next request retries
+            self._set_status(dataset_id, "uploaded")
+            raise
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(views, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE datasets SET status = 'ready', bytes = ?, error = NULL WHERE dataset_id = ?",
+                (self._size(dataset_id), dataset_id),
+            )
+        self.evict(keep=dataset_id)
+        return views
+
+    def _claim(self, dataset_id: str) -> bool:
+        """Atomically take the 'computing' slot (or a stale one)."""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                """
+                UPDATE datasets SET status = 'computing', claimed_at = ?
+                WHERE dataset_id = ?
+                  AND (status IN ('uploaded', 'ready')
+                       OR (status = 'computing' AND claimed_at < ?))
+                """,
+                (now, dataset_id, now - self.compute_timeout),
+            ).rowcount == 1
+
+    def _set_status(self, dataset_id: str, status: str, error: str | None = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE datasets SET status = ?, error = ? WHERE dataset_id = ?",
+                (status, error, dataset_id),
+            )
+
+    def _touch(self, dataset_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE datasets SET last_access = ? WHERE dataset_id = ?",
+                (time.time(), dataset_id),
+            )
+
+    # --------------------------------------------------
+    # Eviction
+    # --------------------------------------------------
+    def _size(self, dataset_id: str) -> int:
+        folder = self._dir(dataset_id)
+        if not os.path.isdir(folder):
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(folder, f))
+            for f in os.listdir(folder)
+            if os.path.isfile(os.path.join(folder, f))
+        )
+
+    def delete(self, dataset_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM datasets WHERE dataset_id = ?", (dataset_id,))
+        shutil.rmtree(self._dir(dataset_id), ignore_errors=True)
+        with self._lock:
+            self._memory.pop(dataset_id, None)
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """
+        Drop expired datasets, then least recently used ones over budget;
+        `keep` (the dataset just stored) is spared.
+        """
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT dataset_id, bytes, last_access FROM datasets "
+                "WHERE pinned = 0 AND status != 'computing' AND dataset_id IS NOT ? "
+                "ORDER BY last_access",
+                (keep,),
+            ).fetchall()
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM datasets").fetchone()[0]
+
+        evicted = []
+        for row in rows:
+            if row["last_access"] >= cutoff and total <= self.max_bytes:
+                break
+            self.delete(row["dataset_id"])
+            total -= row["bytes"]
+            evicted.append(row["dataset_id"])
+        return evicted
@@ -0,0 +1,321 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ["event_id", "narrative", "window_start", "window_end", "num_posts"]
+
+
+class CoordinationEvents:
+    """
+    Coordination bursts in columnar form: an event table
+    (event_id, narrative, window_start, window_end, num_posts) plus the
+    exploded event -> post table (event_id, post_id).
+
+    Two sorted orders make the usual lookups O(log n + matches):
+      * events by (narrative, window_start), and by window_start alone,
+        for "which bursts overlap [start, end)" (an event overlaps when it
+        starts before `end` and no earlier than `start - longest window`);
+      * memberships by post_id, for "which events contain post P".
+
+    Iterating yields the legacy event dicts (with a `post_ids` list).
+    """
+
+    def __init__(self, events: pd.DataFrame | None = None, posts: pd.DataFrame | None = None):
+        if events is None:
+            events = pd.DataFrame({
+                "event_id": np.empty(0, dtype=np.int64),
+                "narrative": np.empty(0, dtype=object),
+                "window_start": pd.to_datetime([]),
+                "window_end": pd.to_datetime([]),
+                "num_posts": np.empty(0, dtype=np.int64),
+            })
+        if posts is None:
+            posts = pd.DataFrame({"event_id": np.empty(0, dtype=np.int64), "post_id": []})
+
+        self.events = events[EVENT_COLUMNS].reset_index(drop=True)
+        self.posts = posts[["event_id", "post_id"]].reset_index(drop=True)
+        self._index()
+
+    def _index(self) -> None:
+        ev = self.events
+        self._starts = ev["window_start"].to_numpy("datetime64[ns]")
+        self._ends = ev["window_end"].to_numpy("datetime64[ns]")
+        self._longest = (self._ends - self._starts).max() if len(ev) else np.timedelta64(0, "ns")
+
+        # (narrative, start) order, with the slice bounds of each narrative
+        self._by_narrative = np.lexsort((self._starts, ev["narrative"].astype(str).to_numpy()))
+        narratives = ev["narrative"].astype(str).to_numpy()[self._by_narrative]
+        names, first = np.unique(narratives, return_index=True)
+        bounds = np.append(first, len(narratives))
+        self._narrative_slices = {
+            name: (bounds[i], bounds[i + 1]) for i, name in enumerate(names)
+        }
+        self._by_start = np.argsort(self._starts, kind="stable")
+
+        # event row of each event id, and memberships sorted by post id
+        self._row_of = pd.Series(np.arange(len(ev)), index=ev["event_id"].to_numpy())
+        post_keys = self.posts["post_id"].astype(str).to_numpy()
+        self._by_post = np.argsort(post_keys, kind="stable")
+        self._post_keys = post_keys[self._by_post]
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "CoordinationEvents":
+        """Build from the legacy list of event dicts."""
+        if not records:
+            return cls()
+        events = pd.DataFrame([
+            {k: r[k] for k in EVENT_COLUMNS[1:]} for r in records
+        ])
+        events.insert(0, "event_id", np.arange(len(records)))
+        posts = pd.DataFrame({
+            "event_id": np.repeat(np.arange(len(records)), [len(r["post_ids"]) for r in records]),
+            "post_id": [pid for r in records for pid in r["post_ids"]],
+        })
+        return cls(events, posts)
+
+    # --------------------------------------------------
+    # Legacy / bulk access
+    # --------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        members = self.posts.groupby("event_id", sort=False)["post_id"].agg(list)
+        for row in self.events.itertuples(index=False):
+            yield {
+                "narrative": row.narrative,
+                "window_start": row.window_start,
+                "window_end": row.window_end,
+                "num_posts": row.num_posts,
+                "post_ids": members.get(row.event_id, []),
+            }
+
+    def post_ids(self) -> set:
+        return set(self.posts["post_id"].tolist())
+
+    def burst_sizes(self) -> pd.Series:
+        """post_id -> size of its burst (the last event wins, as before)."""
+        sizes = self.posts["event_id"].map(
+            self.events.set_index("event_id")["num_posts"]
+        )
+        return pd.Series(sizes.to_numpy(), index=self.posts["post_id"].to_numpy()).groupby(level=0).last()
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def overlapping(self, start=None, end=None, narrative: str | None = None) -> pd.DataFrame:
+        """Events whose window overlaps [start, end), optionally of one narrative."""
+        # ns since epoch, as EventStore compares (offset-aware bounds as UTC)
+        start = np.datetime64(pd.Timestamp(start).value, "ns") if start is not None else None
+        end = np.datetime64(pd.Timestamp(end).value, "ns") if end is not None else None
+
+        if narrative is None:
+            order = self._by_start
+        else:
+            lo, hi = self._narrative_slices.get(str(narrative), (0, 0))
+            order = self._by_narrative[lo:hi]
+        starts = self._starts[order]
+
+        lo, hi = 0, len(order)
+        if end is not None:
+            hi = np.searchsorted(starts, end, side="left")
+        if start is not None:
+            lo = np.searchsorted(starts, start - self._longest, side="right")
+        rows = order[lo:hi]
+        if start is not None:
+            rows = rows[self._ends[rows] > start]
+        return self.events.iloc[rows]
+
+    def containing(self, post_id) -> pd.DataFrame:
+        """Events that include `post_id`."""
+        key = str(post_id)
+        lo = np.searchsorted(self._post_keys, key, side="left")
+        hi = np.searchsorted(self._post_keys, key, side="right")
+        event_ids = self.posts["event_id"].to_numpy()[self._by_post[lo:hi]]
+        return self.events.iloc[self._row_of.loc[event_ids].to_numpy()]
+
+    def members(self, event_id: int) -> list:
+        return self.posts.loc[self.posts["event_id"] == event_id, "post_id"].tolist()
+
+
+class EventStore:
+    """
+    Coordination events of every run, persisted in SQLite.
+
+    Runs are stored under a `source` key (re-recording a source replaces
+    its events, so reruns are idempotent). B-trees on
+    (narrative, window_start), window_start and post_id give the same
+    O(log n) overlap / membership lookups as CoordinationEvents, across
+    the whole history.
+    """
+
+    def __init__(self, path: str = "data/state/events.sqlite"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    source       TEXT NOT NULL,
+                    event_id     INTEGER NOT NULL,
+                    narrative    TEXT NOT NULL,
+                    window_start INTEGER NOT NULL,
+                    window_end   INTEGER NOT NULL,
+                    num_posts    INTEGER NOT NULL,
+                    PRIMARY KEY (source, event_id)
+                );
+                CREATE INDEX IF NOT EXISTS events_narrative_start
+                    ON events (narrative, window_start);
+                CREATE INDEX IF NOT EXISTS events_start ON events (window_start);
+                CREATE TABLE IF NOT EXISTS event_posts (
+                    post_id  TEXT NOT NULL,
+                    source   TEXT NOT NULL,
+                    event_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (post_id, source, event_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key   TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+    def record(self, events: CoordinationEvents, source: str) -> None:
+        """Store one run's events under `source` (replacing earlier ones)."""
+        ev = events.events
+        starts = ev["window_start"].to_numpy("datetime64[ns]").astype(np.int64)
+        ends = ev["window_end"].to_numpy("datetime64[ns]").astype(np.int64)
+        longest = int((ends - starts).max()) if len(ev) else 0
+        post_keys = events.posts["post_id"].astype(str).to_numpy()
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM event_posts WHERE source = ?", (source,))
+            conn.execute("DELETE FROM events WHERE source = ?", (source,))
+            conn.executemany(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                zip(
+                    [source] * len(ev),
+                    ev["event_id"].astype(int).tolist(),
+                    ev["narrative"].astype(str).tolist(),
+                    starts.tolist(),
+                    ends.tolist(),
+                    ev["num_posts"].astype(int).tolist(),
+                ),
+            )
+            # in key order: appending to the post_id B-tree beats random inserts
+            order = np.argsort(post_keys, kind="stable")
+            conn.executemany(
+                "INSERT OR IGNORE INTO event_posts VALUES (?, ?, ?, ?)",
+                zip(
+                    post_keys[order].tolist(),
+                    [source] * len(order),
+                    events.posts["event_id"].to_numpy()[order].tolist(),
+                    order.tolist(),
+                ),
+            )
+            # longest window seen, bounds the overlap scan (never shrinks)
+            conn.execute(
+                """
+                INSERT INTO meta VALUES ('longest_window', ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+                """,
+                (longest,),
+            )
+
+    def delete(self, source: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM event_posts WHERE source = ?", (source,))
+            conn.execute("DELETE FROM events WHERE source = ?", (source,))
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    @staticmethod
+    def _frame(rows) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=["source", *EVENT_COLUMNS])
+        df["window_start"] = pd.to_datetime(df["window_start"].astype("int64"))
+        df["window_end"] = pd.to_datetime(df["window_end"].astype("int64"))
+        return df
+
+    def overlapping(self, start=None, end=None, narrative: str | None = None, source: str | None = None) -> pd.DataFrame:
+        """Stored events whose window overlaps [start, end)."""
+        clauses, params = [], []
+        if narrative is not None:
+            clauses.append("narrative = ?")
+            params.append(str(narrative))
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+
+        with self._connect() as conn:
+            if end is not None:
+                clauses.append("window_start < ?")
+                params.append(pd.Timestamp(end).value)
+            if start is not None:
+                longest = conn.execute(
+                    "SELECT value FROM meta WHERE key = 'longest_window'"
+                ).fetchone()
+                start = pd.Timestamp(start).value
+                clauses += ["window_start > ?", "window_end > ?"]
+                params += [start - (longest[0] if longest else 0), start]
+
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = conn.execute(
+                f"""
+                SELECT source, event_id, narrative, window_start, window_end, num_posts
+                FROM events {where}
+                ORDER BY window_start, source, event_id
+                """,
+                params,
+            ).fetchall()
+        return self._frame(rows)
+
+    def containing(self, post_id, source: str | None = None) -> pd.DataFrame:
+        """Stored events that include `post_id`."""
+        params = [str(post_id)]
+        extra = ""
+        if source is not None:
+            extra = "AND p.source = ?"
+            params.append(source)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT e.source, e.event_id, e.narrative, e.window_start, e.window_end, e.num_posts
+                FROM event_posts p
+                JOIN events e ON e.source = p.source AND e.event_id = p.event_id
+                WHERE p.post_id = ? {extra}
+                ORDER BY e.window_start
+                """,
+                params,
+            ).fetchall()
+        return self._frame(rows)
+
+    def load(self, source: str) -> CoordinationEvents:
+        """One run's events back as a CoordinationEvents."""
+        with self._connect() as conn:
+            events = self._frame(conn.execute(
+                """
+                SELECT source, event_id, narrative, window_start, window_end, num_posts
+                FROM events WHERE source = ? ORDER BY event_id
+                """,
+                (source,),
+            ).fetchall())
+            posts = pd.read_sql_query(
+                "SELECT event_id, post_id FROM event_posts WHERE source = ? ORDER BY position",
+                conn,
+                params=(source,),
+            )
+        return CoordinationEvents(events.drop(columns="source"), posts)
@@ -0,0 +1,63 @@
+import os
+import pickle
+import tempfile
+
+from engine.analysis.topk import TopKIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are not serialised across processes
+    fcntl = None
+
+
+class TopKStore:
+    """
+    Corpus-wide top-k indexes (one TopKIndex per entity, e.g. posts and
+    accounts), merged batch by batch and pickled at `path`.
+
+    record() folds in each scored batch's own top rows (never the whole
+    batch), under a file lock and with an atomic replace, so API workers
+    and batch jobs can share one file. Entities are keyed (posts by
+    dataset_id and post_id, since post ids are only unique within one upload;
+    accounts by account_id): re-scoring a dataset replaces its rows
+    instead of adding them twice. An index whose k or key changed is
+    rebuilt. Reads are cached until the file changes.
+    """
+
+    def __init__(self, path: str = "data/state/topk.pkl"):
+        self.path = path
+        self._mtime = None
+        self._indexes: dict[str, TopKIndex] = {}
+
+    def load(self) -> dict[str, TopKIndex]:
+        if not os.path.exists(self.path):
+            return {}
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with open(self.path, "rb") as f:
+                self._indexes = pickle.load(f)
+            self._mtime = mtime
+        return self._indexes
+
+    def record(self, batches: dict, specs: dict[str, dict], k: int) -> None:
+        """
+        Merge `batches` ({entity: frame of candidate rows}) into the stored
+        indexes, created from `specs` ({entity: TopKIndex kwargs}) on first use.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            indexes = dict(self.load())
+            for entity, rows in batches.items():
+                index = indexes.get(entity)
+                if index is None or index.k != k or index.key != specs[entity].get("key"):
+                    index = TopKIndex(k=k, **specs[entity])
+                indexes[entity] = index.update(rows)
+
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(indexes, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        self._indexes, self._mtime = indexes, os.stat(self.path).st_mtime_ns
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+# --------------------------------------------------
+# Compact post representation (multi-million-row runs)
+# --------------------------------------------------
+#
+# Strings become categoricals (interned ids / int8 enums), features become
+# float32 and per-row driver lists become a fixed-width int8 index array
+# into the explainer feature list. Strings are only rebuilt for the rows
+# that actually leave the API (see serialize_posts).
+
+ID_COLS = ["account_id", "narrative"]
+DRIVER_PREFIX = "driver_"
+NO_DRIVER = -1
+
+
+def intern_ids(df: pd.DataFrame, cols: list[str] = ID_COLS) -> pd.DataFrame:
+    """Store repeated identifiers once (categorical codes per row)."""
+    for col in cols:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def as_enum(values, categories: list[str]) -> pd.Categorical:
+    """Fixed-vocabulary enum; codes fit in int8 for small vocabularies."""
+    return pd.Categorical(values, categories=categories)
+
+
+def downcast_floats(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    for col in cols:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def widen_floats(df: pd.DataFrame, decimals: int = 4) -> pd.DataFrame:
+    """float32 -> rounded float64 so JSON does not show float32 noise."""
+    cols = df.select_dtypes(include=[np.float32]).columns
+    if len(cols):
+        df = df.copy()
+        df[cols] = df[cols].astype(np.float64).round(decimals)
+    return df
+
+
+def driver_columns(df: pd.DataFrame) -> list[str]:
+    cols = [c for c in df.columns if c.startswith(DRIVER_PREFIX)]
+    return sorted(cols, key=lambda c: int(c[len(DRIVER_PREFIX):]))
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return "top_drivers" not in df.columns and bool(driver_columns(df))
+
+
+def encode_drivers(df: pd.DataFrame, order: np.ndarray) -> pd.DataFrame:
+    """
+    Store a (n_posts, top_k) matrix of feature indices as int8 columns
+    driver_0 .. driver_{k-1}; NO_DRIVER pads missing slots.
+    """
+    order = np.asarray(order, dtype=np.int8)
+    for k in range(order.shape[1]):
+        df[f"{DRIVER_PREFIX}{k}"] = order[:, k]
+    return df
+
+
+def decode_drivers(df: pd.DataFrame, features: list[str]) -> list[list[str]]:
+    """Map the int8 driver matrix back to feature-name lists."""
+    cols = driver_columns(df)
+    if not cols:
+        return [[] for _ in range(len(df))]
+
+    codes = df[cols].to_numpy()
+    names = np.array(features, dtype=object)
+    return [
+        names[row[row != NO_DRIVER]].tolist()
+        for row in codes
+    ]
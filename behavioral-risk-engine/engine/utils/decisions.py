@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from engine.utils.functions import (
+    DECISIONS,
+    RISK_AUTO,
+    CONF_AUTO,
+    RISK_REVIEW,
+    CONF_REVIEW,
+)
+# --------------------------------------------------
+# Vectorised decision policy
+# --------------------------------------------------
+
+# Checked top to bottom; the first tier whose risk AND confidence floors
+# are both met wins, otherwise the post gets the policy default.
+DEFAULT_DECISION_TIERS = [
+    {"decision": "AUTO_ACTION", "risk": RISK_AUTO, "confidence": CONF_AUTO},
+    {"decision": "QUEUE_REVIEW", "risk": RISK_REVIEW, "confidence": CONF_REVIEW},
+]
+
+
+class DecisionPolicy:
+    """
+    Threshold-tier decision engine; decision_policy() for whole columns.
+    """
+
+    def __init__(
+        self,
+        tiers: list[dict] | None = None,
+        default: str = "NO_ACTION",
+    ):
+        self.tiers = tiers or DEFAULT_DECISION_TIERS
+        self.default = default
+
+        for tier in self.tiers:
+            if tier["decision"] not in DECISIONS:
+                raise ValueError(f"Unknown decision: {tier['decision']}")
+        if default not in DECISIONS:
+            raise ValueError(f"Unknown decision: {default}")
+
+    def decide(self, risk, confidence) -> np.ndarray:
+        risk = np.asarray(risk, dtype=np.float64)
+        confidence = np.asarray(confidence, dtype=np.float64)
+
+        conditions = [
+            (risk >= t["risk"]) & (confidence >= t["confidence"])
+            for t in self.tiers
+        ]
+        choices = [t["decision"] for t in self.tiers]
+
+        return np.select(conditions, choices, default=self.default).astype(object)
+
+    def decide_codes(self, risk, confidence) -> np.ndarray:
+        """Same as decide(), as int8 indices into DECISIONS (cheap to count)."""
+        risk = np.asarray(risk, dtype=np.float64)
+        confidence = np.asarray(confidence, dtype=np.float64)
+
+        conditions = [
+            (risk >= t["risk"]) & (confidence >= t["confidence"])
+            for t in self.tiers
+        ]
+        choices = [DECISIONS.index(t["decision"]) for t in self.tiers]
+
+        return np.select(conditions, choices, default=DECISIONS.index(self.default)).astype(np.int8)
+
+    def apply(self, df: pd.DataFrame) -> np.ndarray:
+        return self.decide(df["risk_score"].to_numpy(), df["confidence"].to_numpy())
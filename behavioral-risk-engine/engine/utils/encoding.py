@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output (slower)
+    orjson = None
+# --------------------------------------------------
+# Frame -> JSON bytes (API fast path)
+# --------------------------------------------------
+#
+# Frames are converted column by column to native Python values (one
+# C-level .tolist() per column instead of per-cell boxing in to_dict), then
+# encoded straight to bytes. Responses built from these bytes skip
+# FastAPI's jsonable_encoder walk entirely.
+
+NDJSON_CHUNK_ROWS = 10_000
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _column_values(col: pd.Series) -> list:
+    """One column as JSON-ready Python values (NaN/NaT -> None)."""
+    if pd.api.types.is_datetime64_any_dtype(col):
+        values = np.datetime_as_string(col.to_numpy(), unit="s").astype(object)
+        values[col.isna().to_numpy()] = None
+        return values.tolist()
+
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype(object)
+
+    values = col.to_numpy()
+    if values.dtype.kind == "f":
+        if np.isnan(values).any():
+            values = values.astype(object)
+            values[col.isna().to_numpy()] = None
+        return values.tolist()
+
+    if values.dtype == object:
+        # str / list cells pass through; missing scalars become null
+        return [None if v is None or v is pd.NA or (isinstance(v, float) and v != v) else v
+                for v in values.tolist()]
+
+    return values.tolist()
+
+
+def frame_records(df: pd.DataFrame) -> list[dict]:
+    cols = list(df.columns)
+    columns = [_column_values(df[c]) for c in cols]
+    return [dict(zip(cols, row)) for row in zip(*columns)]
+
+
+def encode_records(df: pd.DataFrame) -> bytes:
+    """JSON array of row objects, same shape as to_dict(orient='records')."""
+    return dumps(frame_records(df))
+
+
+def encode_payload(parts: dict) -> bytes:
+    """
+    JSON object whose values may be pre-encoded bytes (spliced as-is) or
+    plain objects; avoids decoding and re-encoding large frames.
+    """
+    out = []
+    for key, value in parts.items():
+        encoded = value if isinstance(value, (bytes, bytearray)) else dumps(value)
+        out.append(dumps(key) + b":" + encoded)
+    return b"{" + b",".join(out) + b"}"
+
+
+def iter_ndjson(df: pd.DataFrame, chunk_rows: int = NDJSON_CHUNK_ROWS):
+    """Yield newline-delimited JSON rows in chunks (streaming responses)."""
+    for start in range(0, len(df), chunk_rows):
+        rows = frame_records(df.iloc[start:start + chunk_rows])
+        yield b"".join(dumps(r) + b"\n" for r in rows)
@@ -1,5 +1,8 @@
 import re
+import numpy as np
 import pandas as pd
+
+from engine.utils.compact import is_compact, widen_floats
 # Text Preprocessing
 def preprocess(text):
     text = text.lower()
@@ -14,8 +17,14 @@ def preprocess(text: str) -> str:
     text = re.sub(r"[^a-z0-9\s#\$]", "", text)
     return text.strip()
 
-def serialize_posts(df: pd.DataFrame) -> list[dict]:
-    """Convert posts dataframe into JSON-safe records."""
+def posts_frame(df: pd.DataFrame, explainer=None, fields: list[str] | None = None) -> pd.DataFrame:
+    """
+    Posts projected to the API columns, ready to encode.
+
+    Compact frames (int8 driver codes, no explanation lists) are decoded
+    here, at the API boundary, which requires the pipeline's explainer.
+    `fields` projects the output to a subset of the default columns.
+    """
     cols = [
         "post_id",
         "text",
@@ -27,11 +36,30 @@ def serialize_posts(df: pd.DataFrame) -> list[dict]:
         "top_drivers",
         "explanations",
     ]
-    return df[cols].to_dict(orient="records")
+    if fields:
+        cols = [c for c in cols if c in fields]
+
+    if is_compact(df) and {"top_drivers", "explanations"} & set(cols):
+        if explainer is None:
+            raise ValueError("Compact posts need an explainer to be serialized")
+        df = explainer.decode_posts(df)
+
+    return widen_floats(df[cols])
+
+
+def accounts_frame(df: pd.DataFrame, fields: list[str] | None = None) -> pd.DataFrame:
+    if fields:
+        df = df[[c for c in df.columns if c in fields]]
+    return widen_floats(df)
+
+
+def serialize_posts(df: pd.DataFrame, explainer=None, fields: list[str] | None = None) -> list[dict]:
+    """Convert posts dataframe into JSON-safe records."""
+    return posts_frame(df, explainer, fields).to_dict(orient="records")
 
 
-def serialize_accounts(df: pd.DataFrame) -> list[dict]:
-    return df.to_dict(orient="records")
+def serialize_accounts(df: pd.DataFrame, fields: list[str] | None = None) -> list[dict]:
+    return accounts_frame(df, fields).to_dict(orient="records")
 def assign_narrative(text: str) -> str:
     """
     Assigns a narrative label to a post based on keyword heuristics.
@@ -52,11 +80,142 @@ def assign_narrative(text: str) -> str:
 def compute_account_ewma(df, alpha=0.3):
     df = df.sort_values("timestamp")
     df["risk_ewma"] = (
-        df.groupby("account_id")["risk_score"]
+        df.groupby("account_id", observed=True)["risk_score"]
           .apply(lambda x: x.ewm(alpha=alpha, adjust=False).mean())
           .reset_index(level=0, drop=True)
+          .astype(df["risk_score"].dtype)
     )
     return df
+
+
+def grouped_ewma(
+    values,
+    groups,
+    alpha: float = 0.3,
+    initial=None,
+    block: int = 1024,
+) -> np.ndarray:
+    """
+    EWMA (adjust=False) of `values` restarted for every group, without a
+    Python call per group.
+
+    Rows must already be in time order within each group; groups may be
+    interleaved. `initial` (per row, NaN = none) continues a group from a
+    previous EWMA value instead of starting at its first value. Each group
+    is cut into blocks of at most `block` rows so the scaled cumulative
+    sum (beta ** -j) stays inside float64 range; blocks are chained by a
+    loop over block rounds, which is 1 round for any group shorter than
+    `block`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    beta = 1.0 - alpha
+    if beta <= 0.0:
+        out[:] = values
+        return out
+    if beta < 1.0:
+        block = max(1, min(block, int(100 * np.log(10) / -np.log(beta))))
+
+    order = np.argsort(groups, kind="stable")
+    x = values[order]
+    g = groups[order]
+
+    # position inside group -> position inside block
+    idx = np.arange(n)
+    group_start = np.r_[True, g[1:] != g[:-1]]
+    pos = idx - np.maximum.accumulate(np.where(group_start, idx, 0))
+    j = pos % block
+    block_start = group_start | (j == 0)
+    bid = np.cumsum(block_start) - 1
+
+    # in-block part: alpha * sum_k beta^(j-k) x_k
+    scaled = pd.Series(x * beta ** -j).groupby(bid).cumsum().to_numpy()
+    partial = alpha * beta ** j * scaled
+
+    # carry between blocks: first block of a group starts from its first value
+    first = np.flatnonzero(block_start)
+    last = np.r_[first[1:] - 1, n - 1]
+    round_no = pos[first] // block
+    carry = x[first].copy()
+    if initial is not None:
+        seed = np.asarray(initial, dtype=np.float64)[order][first]
+        seeded = group_start[first] & ~np.isnan(seed)
+        carry[seeded] = seed[seeded]
+    tail = beta ** (j[last] + 1) * carry + partial[last]
+    for r in range(1, round_no.max() + 1):
+        b = np.flatnonzero(round_no == r)
+        carry[b] = tail[b - 1]
+        tail[b] = beta ** (j[last[b]] + 1) * carry[b] + partial[last[b]]
+
+    out[order] = beta ** (j + 1) * carry[bid] + partial
+    return out
+
+
+def compute_account_ewma_fast(df, alpha=0.3):
+    """Vectorised compute_account_ewma (same ordering and values)."""
+    df = df.sort_values("timestamp", kind="stable")
+    codes, _ = pd.factorize(df["account_id"])
+    df["risk_ewma"] = grouped_ewma(
+        df["risk_score"].to_numpy(), codes, alpha=alpha
+    ).astype(df["risk_score"].dtype)
+    return df
+
+
+def grouped_window_counts(times, groups, window, weights=None) -> np.ndarray:
+    """
+    Rows of the same group in (t - window, t] for every row (ties included),
+    without a Python call per group.
+
+    One sort by (group, time) and two searchsorted calls: times and window
+    lower bounds are rank-compressed together so (group, rank) packs into a
+    single sorted int64 key. `weights` counts a row as several posts
+    (compressed history); rows may come in any order.
+    """
+    t = np.asarray(times, dtype="datetime64[ns]").astype(np.int64)
+    g = np.asarray(groups, dtype=np.int64)
+    n = len(t)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    w = np.ones(n, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+
+    order = np.lexsort((t, g))
+    ts, gs = t[order], g[order]
+    _, ranks = np.unique(np.r_[ts, ts - pd.Timedelta(window).value], return_inverse=True)
+    stride = 2 * n + 1
+    key = gs * stride + ranks[:n]
+    lower = gs * stride + ranks[n:]
+
+    cum = np.r_[0, np.cumsum(w[order])]
+    right = np.searchsorted(key, key, side="right")
+    left = np.searchsorted(key, lower, side="right")
+
+    out = np.empty(n, dtype=np.int64)
+    out[order] = cum[right] - cum[left]
+    return out
+
+
+def grouped_intervals(times, groups) -> np.ndarray:
+    """Seconds since the previous row of the same group (NaN for the first)."""
+    t = np.asarray(times, dtype="datetime64[ns]").astype(np.int64)
+    g = np.asarray(groups, dtype=np.int64)
+    order = np.lexsort((t, g))
+    ts, gs = t[order], g[order]
+
+    gaps = np.full(len(t), np.nan)
+    if len(t) > 1:
+        same = gs[1:] == gs[:-1]
+        gaps[1:][same] = (ts[1:] - ts[:-1])[same] / 1e9
+
+    out = np.empty(len(t), dtype=np.float64)
+    out[order] = gaps
+    return out
+DECISIONS = ["AUTO_ACTION", "QUEUE_REVIEW", "NO_ACTION"]
+
 RISK_AUTO = 75
 CONF_AUTO = 0.8
 
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+# --------------------------------------------------
+# Server-side paging over cached result views
+# --------------------------------------------------
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_list(value: str | None) -> list[str] | None:
+    """'a,b , c' -> ['a', 'b', 'c'] (None / empty -> None)."""
+    if value is None:
+        return None
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    return items or None
+
+
+def filter_frame(df: pd.DataFrame, filters: dict[str, list[str] | None]) -> pd.DataFrame:
+    """
+    Keep rows whose column value is one of the requested values.
+    Values arrive as strings from the query string, so columns are
+    compared on their string form.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters.items():
+        if not values:
+            continue
+        if col not in df.columns:
+            raise ValueError(f"Cannot filter on unknown column: {col}")
+        mask &= df[col].astype(str).isin(values).to_numpy()
+    return df[mask]
+
+
+def page_frame(
+    df: pd.DataFrame,
+    sort: str | None = None,
+    descending: bool = True,
+    offset: int = 0,
+    limit: int | None = 50,
+) -> pd.DataFrame:
+    """
+    Return rows [offset, offset + limit) in sort order, ties by position.
+    Only the rows up to the page are fully ordered (partition + sort of
+    the head).
+    limit=None returns everything after `offset` (streaming exports).
+    """
+    if limit is None:
+        limit = len(df)
+    else:
+        limit = min(limit, MAX_PAGE_SIZE)
+    if offset < 0 or limit < 0:
+        raise ValueError("offset and limit must be >= 0")
+
+    if sort is None:
+        return df.iloc[offset:offset + limit]
+    if sort not in df.columns:
+        raise ValueError(f"Cannot sort on unknown column: {sort}")
+
+    end = min(offset + limit, len(df))
+    if end <= offset:
+        return df.iloc[0:0]
+
+    keys = df[sort].to_numpy()
+    if not np.issubdtype(keys.dtype, np.number):
+        order = df[sort].sort_values(ascending=not descending, kind="stable").index
+        return df.loc[order[offset:end]]
+
+    if keys.dtype.kind == "u":
+        keys = keys.astype(np.int64)  # compact uint8 columns would wrap when negated
+    keys = -keys if descending else keys
+    # every row tied with the last one of the page stays a candidate, so
+    # ties are broken by position (argpartition alone picks an arbitrary
+    # subset of them, and pages could repeat or skip rows)
+    cut = np.partition(keys, end - 1)[end - 1] if end < len(df) else None
+    if cut is not None and not np.isnan(cut):
+        head = np.flatnonzero(keys <= cut)
+    else:
+        head = np.arange(len(df))
+    head = head[np.lexsort((head, keys[head]))]
+    return df.iloc[head[offset:end]]
+
+
+def paged_response(total: int | None, offset: int, limit: int, items: list[dict]) -> dict:
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": min(limit, MAX_PAGE_SIZE),
+        "items": items,
+    }
@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+# --------------------------------------------------
+# Shared-memory data plane for multi-process workers
+# --------------------------------------------------
+#
+# Large arrays (sparse similarity inputs, scaled feature matrices) are
+# written once into shared memory or memory-mapped files by the parent.
+# Workers receive small picklable handles and attach read-only numpy
+# views, so N workers do not hold N copies of the data.
+
+BACKENDS = ("shm", "memmap")
+
+# segments attached in this process, kept open until release()
+_ATTACHED = {}
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to an array placed by SharedArena.put()."""
+    name: str  # shm segment name, or file path for memmap
+    shape: tuple
+    dtype: str
+    backend: str = "shm"
+
+
+@dataclass(frozen=True)
+class SharedCSR:
+    """Handle to a scipy CSR matrix (data / indices / indptr)."""
+    data: SharedArray
+    indices: SharedArray
+    indptr: SharedArray
+    shape: tuple
+
+
+class SharedArena:
+    """
+    Owns the shared segments of one parallel job; everything is released
+    (unlinked / deleted) on close().
+
+        with SharedArena() as arena:
+            handle = arena.put(embeddings)
+            pool.map(work, [(handle, start, stop) for ...])
+    """
+
+    def __init__(self, backend: str = "shm", directory: str | None = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.backend = backend
+        self.directory = directory
+        self._owned_dir = None
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def put(self, arr) -> SharedArray:
+        arr = np.ascontiguousarray(arr)
+        if self.backend == "memmap":
+            return self._put_memmap(arr)
+
+        # zero-size segments are not allowed
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        self._segments.append(shm)
+        return SharedArray(shm.name, arr.shape, arr.dtype.str, "shm")
+
+    def _put_memmap(self, arr: np.ndarray) -> SharedArray:
+        if self.directory is None:
+            self._owned_dir = self._owned_dir or tempfile.mkdtemp(prefix="bre-shared-")
+            directory = self._owned_dir
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            directory = self.directory
+
+        path = os.path.join(directory, f"{uuid.uuid4().hex}.npy")
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=arr.dtype, shape=arr.shape)
+        out[...] = arr
+        out.flush()
+        del out
+        self._segments.append(path)
+        return SharedArray(path, arr.shape, arr.dtype.str, "memmap")
+
+    def put_csr(self, x) -> SharedCSR:
+        return SharedCSR(
+            self.put(x.data),
+            self.put(x.indices),
+            self.put(x.indptr),
+            tuple(x.shape),
+        )
+
+    def close(self) -> None:
+        for seg in self._segments:
+            if isinstance(seg, str):
+                if os.path.exists(seg):
+                    os.remove(seg)
+            else:
+                _ATTACHED.pop(seg.name, None)
+                seg.close()
+                seg.unlink()
+        self._segments = []
+        if self._owned_dir is not None:
+            shutil.rmtree(self._owned_dir, ignore_errors=True)
+            self._owned_dir = None
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+def attach(handle: SharedArray) -> np.ndarray:
+    """Read-only zero-copy view of a shared array."""
+    if handle.backend == "memmap":
+        return np.load(handle.name, mmap_mode="r")
+
+    shm = _ATTACHED.get(handle.name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=handle.name)
+        _ATTACHED[handle.name] = shm
+    view = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return view
+
+
+def attach_csr(handle: SharedCSR):
+    import scipy.sparse as sp
+
+    return sp.csr_matrix(
+        (attach(handle.data), attach(handle.indices), attach(handle.indptr)),
+        shape=handle.shape,
+        copy=False,
+    )
+
+
+def resolve(value):
+    """Attach `value` if it is a shared handle, else return it unchanged."""
+    if isinstance(value, SharedArray):
+        return attach(value)
+    if isinstance(value, SharedCSR):
+        return attach_csr(value)
+    return value
+
+
+def release() -> None:
+    """
+    Close every segment attached in this process. Workers call it at the
+    end of each task, once no view of the segments is left; the owner
+    still unlinks them on SharedArena.close().
+    """
+    while _ATTACHED:
+        _, shm = _ATTACHED.popitem()
+        shm.close()
@@ -0,0 +1,81 @@
+import threading
+import time
+# --------------------------------------------------
+# Model warm-up (readiness)
+# --------------------------------------------------
+#
+# Heavy dependencies are imported lazily by the detectors / clusterer. The
+# API warms them up in a background thread after start-up so /api/health
+# answers immediately and /api/ready reports when scoring is fast.
+
+WARMUP_STATE = {
+    "status": "cold",        # cold | warming | ready | failed
+    "components": {},        # name -> {"status", "seconds", "error"}
+    "started_at": None,
+    "finished_at": None,
+}
+
+_lock = threading.Lock()
+
+
+def _import_sklearn(config: dict):
+    import sklearn.cluster  # noqa: F401
+    import sklearn.metrics.pairwise  # noqa: F401
+
+
+def _import_hdbscan(config: dict):
+    import hdbscan  # noqa: F401
+
+
+def _load_sentence_encoder(config: dict):
+    # the encoder(s) the pipeline is configured with, not the default model:
+    # one encode() call loads the model / session into its process cache
+    from engine.encoders.backends import get_encoder
+    for key in ("encoder", "refine_encoder"):
+        if key == "encoder" or config.get(key) is not None:
+            get_encoder(config.get(key)).encode(["warm-up"])
+
+
+COMPONENTS = [
+    ("sklearn", _import_sklearn),
+    ("hdbscan", _import_hdbscan),
+    ("sentence_encoder", _load_sentence_encoder),
+]
+
+
+def warm_up(config: dict | None = None) -> dict:
+    """Load every component for a pipeline `config` (the API's PIPELINE_CONFIG)."""
+    config = config or {}
+    with _lock:
+        if WARMUP_STATE["status"] in ("warming", "ready"):
+            return WARMUP_STATE
+        WARMUP_STATE["status"] = "warming"
+        WARMUP_STATE["started_at"] = time.time()
+
+    failed = False
+    for name, load in COMPONENTS:
+        WARMUP_STATE["components"][name] = {"status": "loading"}
+        t0 = time.perf_counter()
+        try:
+            load(config)
+            WARMUP_STATE["components"][name] = {
+                "status": "ready",
+                "seconds": round(time.perf_counter() - t0, 3),
+            }
+        except Exception as e:
+            failed = True
+            WARMUP_STATE["components"][name] = {
+                "status": "failed",
+                "seconds": round(time.perf_counter() - t0, 3),
+                "error": f"{type(e).__name__}: {e}",
+            }
+
+    WARMUP_STATE["status"] = "failed" if failed else "ready"
+    WARMUP_STATE["finished_at"] = time.time()
+    return WARMUP_STATE
+
+
+def start_background_warmup(config: dict | None = None) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(config,), name="model-warmup", daemon=True)
+    thread.start()
+    return thread
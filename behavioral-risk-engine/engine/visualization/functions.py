@@ -1,66 +1,255 @@
-import matplotlib.pyplot as plt
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 # --------------------------------------------------
 # Visualization helpers (ANALYST UI)
 # --------------------------------------------------
+#
+# Small inputs are drawn as the original per-post scatter. Past
+# `max_points`, the full data is drawn as a log-scaled hexbin density and
+# only a stratified sample (every cluster represented, highest-risk posts
+# always kept) is overlaid in cluster colours, so render time and file
+# size stay flat in the number of posts.
 
-def plot_similarity_vs_coordination(df, path):
-    plt.figure(figsize=(8, 6))
-    sc = plt.scatter(
-        df["sim_mean"],
-        df["coordination_score"],
-        c=df["behavior_cluster"],
-        cmap="tab10",
-        alpha=0.8,
-        edgecolors="k"
-    )
-    plt.axhline(0.5, linestyle="--", alpha=0.4)
-    plt.axvline(0.5, linestyle="--", alpha=0.4)
-    plt.xlabel("Mean content similarity")
-    plt.ylabel("Coordination score")
-    plt.title("Behavior map: Similarity vs Coordination")
-    plt.colorbar(sc, label="Behavior cluster")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(path, dpi=200)
-    plt.close()
-
-
-def plot_cluster_size_vs_account_age(df, path):
-    plt.figure(figsize=(8, 6))
-    sc = plt.scatter(
-        df["cluster_size"],
-        df["account_age_days"],
-        c=df["behavior_cluster"],
-        cmap="tab10",
-        alpha=0.8,
-        edgecolors="k"
-    )
-    plt.xlabel("Copy-paste cluster size")
-    plt.ylabel("Account age (days)")
-    plt.title("Behavior map: Repetition vs Account Age")
-    plt.colorbar(sc, label="Behavior cluster")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(path, dpi=200)
-    plt.close()
-
-
-def plot_similarity_vs_cluster_size(df, path):
-    plt.figure(figsize=(8, 6))
-    sc = plt.scatter(
-        df["sim_mean"],
-        df["cluster_size"],
-        c=df["behavior_cluster"],
+SCATTER_MAX_POINTS = 20_000
+HIGH_RISK_MIN = 50  # posts at or above this risk are kept when sampling
+
+BEHAVIOR_MAPS = {
+    "01_similarity_vs_coordination": {
+        "x": "sim_mean",
+        "y": "coordination_score",
+        "xlabel": "Mean content similarity",
+        "ylabel": "Coordination score",
+        "title": "Behavior map: Similarity vs Coordination",
+        "guides": True,
+    },
+    "02_cluster_size_vs_account_age": {
+        "x": "cluster_size",
+        "y": "account_age_days",
+        "xlabel": "Copy-paste cluster size",
+        "ylabel": "Account age (days)",
+        "title": "Behavior map: Repetition vs Account Age",
+        "guides": False,
+    },
+    "03_similarity_vs_cluster_size": {
+        "x": "sim_mean",
+        "y": "cluster_size",
+        "xlabel": "Mean content similarity",
+        "ylabel": "Cluster size",
+        "title": "Behavior map: Similarity vs Repetition",
+        "guides": False,
+    },
+}
+# bump when the drawing code changes so cached images are redrawn
+PLOT_VERSION = 1
+
+_FIGURES = threading.local()
+
+
+def _figure():
+    """One reusable Agg figure per thread (no pyplot / GUI state)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = getattr(_FIGURES, "fig", None)
+    if fig is None:
+        fig = Figure(figsize=(8, 6))
+        FigureCanvasAgg(fig)
+        _FIGURES.fig = fig
+    fig.clf()
+    return fig
+
+
+def stratified_sample(
+    df: pd.DataFrame,
+    max_points: int,
+    strata: str = "behavior_cluster",
+    risk_col: str = "risk_score",
+    risk_min: float = HIGH_RISK_MIN,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    At most `max_points` rows: high-risk rows first (highest risk if even
+    those exceed half the budget), the rest split evenly across strata so
+    small clusters are not drowned out by large ones.
+    """
+    if len(df) <= max_points:
+        return df
+
+    keep = pd.Index([])
+    if risk_col in df.columns:
+        risky = df[df[risk_col] >= risk_min]
+        keep = risky.nlargest(max_points // 2, risk_col).index
+
+    rest = df.drop(index=keep)
+    budget = max_points - len(keep)
+    groups = rest.groupby(strata, observed=True, sort=False).indices
+    sizes = np.array([len(v) for v in groups.values()])
+
+    # water-filling: equal share per stratum, leftovers go to the larger ones
+    quota = np.zeros(len(sizes), dtype=np.int64)
+    remaining = budget
+    open_ = np.ones(len(sizes), dtype=bool)
+    while remaining > 0 and open_.any():
+        share = max(remaining // int(open_.sum()), 1)
+        take = np.minimum(sizes - quota, share) * open_
+        quota += take
+        remaining -= int(take.sum())
+        open_ &= quota < sizes
+
+    rng = np.random.default_rng(seed)
+    picked = [
+        rng.choice(idx, size=q, replace=False)
+        for idx, q in zip(groups.values(), quota) if q
+    ]
+    positions = np.concatenate(picked) if picked else np.array([], dtype=np.int64)
+    return pd.concat([df.loc[keep], rest.iloc[np.sort(positions)]])
+
+
+def plot_behavior_map(
+    df,
+    path,
+    x,
+    y,
+    xlabel,
+    ylabel,
+    title,
+    guides=False,
+    mode="auto",
+    max_points=SCATTER_MAX_POINTS,
+    dpi=200,
+):
+    """
+    mode: "scatter" (every post), "density" (hexbin + stratified cluster
+    overlay), "sample" (stratified sample only) or "auto" (scatter up to
+    `max_points`, density beyond).
+    """
+    if mode == "auto":
+        mode = "scatter" if len(df) <= max_points else "density"
+    if mode not in ("scatter", "density", "sample"):
+        raise ValueError(f"Unknown plot mode: {mode}")
+
+    fig = _figure()
+    ax = fig.add_subplot()
+
+    if mode == "scatter":
+        points = df
+        style = {"alpha": 0.8, "edgecolors": "k"}
+    else:
+        # a lighter overlay on top of the density keeps the density readable
+        points = stratified_sample(df, max_points if mode == "sample" else max_points // 4)
+        style = {"alpha": 0.6, "s": 6, "linewidths": 0, "rasterized": True}
+    if mode == "density":
+        density = ax.hexbin(
+            df[x].to_numpy(np.float64),
+            df[y].to_numpy(np.float64),
+            gridsize=120,
+            bins="log",
+            cmap="Greys",
+            mincnt=1,
+        )
+        fig.colorbar(density, ax=ax, label="Posts (log)", pad=0.01)
+
+    sc = ax.scatter(
+        points[x],
+        points[y],
+        c=points["behavior_cluster"],
         cmap="tab10",
-        alpha=0.8,
-        edgecolors="k"
+        **style,
     )
-    plt.xlabel("Mean content similarity")
-    plt.ylabel("Cluster size")
-    plt.title("Behavior map: Similarity vs Repetition")
-    plt.colorbar(sc, label="Behavior cluster")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(path, dpi=200)
-    plt.close()
\ No newline at end of file
+    if guides:
+        ax.axhline(0.5, linestyle="--", alpha=0.4)
+        ax.axvline(0.5, linestyle="--", alpha=0.4)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title if mode == "scatter" else f"{title} ({len(df):,} posts)")
+    fig.colorbar(sc, ax=ax, label="Behavior cluster")
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+
+
+def plot_similarity_vs_coordination(df, path, **kwargs):
+    plot_behavior_map(df, path, **BEHAVIOR_MAPS["01_similarity_vs_coordination"], **kwargs)
+
+
+def plot_cluster_size_vs_account_age(df, path, **kwargs):
+    plot_behavior_map(df, path, **BEHAVIOR_MAPS["02_cluster_size_vs_account_age"], **kwargs)
+
+
+def plot_similarity_vs_cluster_size(df, path, **kwargs):
+    plot_behavior_map(df, path, **BEHAVIOR_MAPS["03_similarity_vs_cluster_size"], **kwargs)
+
+
+# --------------------------------------------------
+# All behaviour maps: parallel, cached by result hash
+# --------------------------------------------------
+
+def _plot_columns(df: pd.DataFrame) -> list[str]:
+    wanted = {"behavior_cluster", "risk_score"}
+    wanted |= {spec[axis] for spec in BEHAVIOR_MAPS.values() for axis in ("x", "y")}
+    return [c for c in df.columns if c in wanted]
+
+
+def behavior_maps_key(df: pd.DataFrame, mode: str = "auto", max_points: int = SCATTER_MAX_POINTS) -> str:
+    """Hash of the plotted columns and render settings."""
+    cols = sorted(_plot_columns(df))
+    h = hashlib.sha256(f"{PLOT_VERSION}|{mode}|{max_points}|{cols}".encode())
+    h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def _render_one(name: str, df: pd.DataFrame, path: str, mode: str, max_points: int) -> str:
+    tmp = path + ".tmp.png"
+    plot_behavior_map(df, tmp, **BEHAVIOR_MAPS[name], mode=mode, max_points=max_points)
+    os.replace(tmp, path)
+    return path
+
+
+def render_behavior_maps(
+    df: pd.DataFrame,
+    out_dir: str,
+    mode: str = "auto",
+    max_points: int = SCATTER_MAX_POINTS,
+    workers: int = 3,
+) -> dict[str, str]:
+    """
+    Render every behaviour map into <out_dir>/<result hash>/ and return
+    {name: path}. Images already rendered for the same data and settings
+    are reused; missing ones are drawn in parallel worker processes.
+    """
+    key = behavior_maps_key(df, mode, max_points)
+    folder = os.path.join(out_dir, key)
+    os.makedirs(folder, exist_ok=True)
+
+    paths = {name: os.path.join(folder, f"{name}.png") for name in BEHAVIOR_MAPS}
+    missing = [name for name, p in paths.items() if not os.path.exists(p)]
+    if not missing:
+        return paths
+
+    data = df[_plot_columns(df)]
+
+    if workers <= 1 or len(missing) == 1:
+        for name in missing:
+            _render_one(name, data, paths[name], mode, max_points)
+    else:
+        with ProcessPoolExecutor(min(workers, len(missing))) as pool:
+            futures = [
+                pool.submit(_render_one, name, data, paths[name], mode, max_points)
+                for name in missing
+            ]
+            for future in futures:
+                future.result()
+    return paths
+
+
+_BACKGROUND = ThreadPoolExecutor(max_workers=1, thread_name_prefix="behavior-maps")
+
+
+def submit_behavior_maps(df: pd.DataFrame, out_dir: str, **kwargs) -> Future:
+    """render_behavior_maps off the caller's thread; returns its Future."""
+    return _BACKGROUND.submit(render_behavior_maps, df, out_dir, **kwargs)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from engine.store.account_features import AccountFeatureStore
+
+
+def posts(start, n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "post_id": np.arange(n) + seed * 1000,
+        "account_id": [f"a{i % 4}" for i in range(n)],
+        "timestamp": pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, 7200, n)), unit="s"),
+    })
+
+
+def test_fingerprint_excludes_the_advanced_batch(tmp_path):
+    store = AccountFeatureStore(str(tmp_path / "features.sqlite"))
+    before = store.fingerprint()
+    store.advance(posts("2025-01-01"), set(), set(), batch="b0")
+
+    assert store.fingerprint() != before
+    assert store.fingerprint(exclude="b0") == before
+    store.advance(posts("2025-01-01"), set(), set(), batch="b0")
+    assert store.fingerprint(exclude="b0") == before
+
+    store.advance(posts("2025-01-02", seed=1), set(), set(), batch="b1")
+    assert store.fingerprint(exclude="b0") != before
+
+
+def test_recorded_batch_is_not_folded_in_twice(tmp_path):
+    store = AccountFeatureStore(str(tmp_path / "features.sqlite"))
+    batch = posts("2025-01-01")
+    store.advance(batch, set(), set(), batch="b0")
+    state = store.load(batch["account_id"])
+
+    # same id, even with posts that would otherwise be new
+    later = batch.assign(timestamp=batch["timestamp"] + pd.Timedelta("1D"))
+    store.advance(later, set(), set(), batch="b0")
+    pd.testing.assert_frame_equal(store.load(batch["account_id"]), state)
+    assert store.load(batch["account_id"])["post_count"].sum() == len(batch)
+
+
+def test_writes_without_batch_id_change_fingerprint(tmp_path):
+    store = AccountFeatureStore(str(tmp_path / "features.sqlite"))
+    before = store.fingerprint()
+    store.advance(posts("2025-01-01"), set(), set())
+    assert store.fingerprint() != before
+    assert store.fingerprint()["revision"] == 1
+
+
+def test_incremental_matches_one_pass(tmp_path):
+    both = pd.concat([posts("2025-01-01"), posts("2025-01-01 02:00", seed=1)], ignore_index=True)
+    store = AccountFeatureStore(str(tmp_path / "features.sqlite"))
+    store.advance(both.iloc[:30], set(), set(), batch="b0")
+    features, _ = store.advance(both.iloc[30:], set(), set(), batch="b1")
+
+    one_pass, _ = AccountFeatureStore().advance(both, set(), set())
+    pd.testing.assert_frame_equal(features, one_pass.iloc[30:])
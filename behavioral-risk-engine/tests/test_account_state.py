@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from engine.store.account_state import AccountStateStore
+
+
+def batch(start, n=6, tz=None):
+    ts = pd.date_range(start, periods=n, freq="10min", tz=tz)
+    return pd.DataFrame({
+        "post_id": np.arange(n),
+        "account_id": ["a", "b"] * (n // 2),
+        "timestamp": ts,
+        "risk_score": np.linspace(10, 90, n),
+    })
+
+
+def test_offset_aware_timestamps_match_naive_utc(tmp_path):
+    naive = AccountStateStore(str(tmp_path / "naive.sqlite"))
+    aware = AccountStateStore(str(tmp_path / "aware.sqlite"))
+
+    for start in ("2025-01-01 00:00", "2025-01-01 02:00"):
+        posts_naive, state_naive = naive.advance(batch(start))
+        # same instants, expressed at +02:00
+        shifted = batch(start, tz="UTC")
+        shifted["timestamp"] = shifted["timestamp"].dt.tz_convert("Etc/GMT-2")
+        posts_aware, state_aware = aware.advance(shifted)
+
+        np.testing.assert_allclose(posts_aware["risk_ewma"], posts_naive["risk_ewma"])
+        pd.testing.assert_frame_equal(
+            state_aware.sort_values("account_id", ignore_index=True),
+            state_naive.sort_values("account_id", ignore_index=True),
+        )
+
+
+def test_reupload_is_idempotent(tmp_path):
+    store = AccountStateStore(str(tmp_path / "state.sqlite"))
+    posts = batch("2025-01-01", tz="UTC")
+    _, first = store.advance(posts.copy())
+    _, again = store.advance(posts.copy())
+    pd.testing.assert_frame_equal(
+        again.sort_values("account_id", ignore_index=True),
+        first.sort_values("account_id", ignore_index=True),
+    )
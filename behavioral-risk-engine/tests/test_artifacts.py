@@ -0,0 +1,88 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from engine.store.artifacts import ArtifactStore, frame_digest, stage_key
+
+
+def test_round_trip_through_disk(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    store.put("signals", "k1", {"frame": frame})
+
+    again = ArtifactStore(str(tmp_path))  # fresh process: no memory copy
+    pd.testing.assert_frame_equal(again.get("signals", "k1")["frame"], frame)
+    assert again.get("signals", "missing") is None
+    assert again.get("features", "k1") is None
+
+
+def test_unreadable_file_is_a_miss(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    with open(tmp_path / "signals-bad.pkl", "wb") as f:
+        f.write(b"not a pickle")
+    assert store.get("signals", "bad") is None
+
+
+def test_memory_keeps_most_recent_items(tmp_path):
+    store = ArtifactStore(str(tmp_path), memory_items=2)
+    for key in ("a", "b", "c"):
+        store.put("signals", key, key)
+    store.get("signals", "b")
+    assert list(store._memory) == [("signals", "c"), ("signals", "b")]
+    assert store.get("signals", "a") == "a"  # still on disk
+
+
+def test_prune_removes_least_recently_used_files(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10 ** 9)
+    payload = "x" * 10_000
+    for i, key in enumerate(("old", "read", "new")):
+        store.put("signals", key, payload)
+        os.utime(tmp_path / f"signals-{key}.pkl", (time.time() - 100 + i, time.time() - 100 + i))
+    ArtifactStore(str(tmp_path)).get("signals", "old")  # reading refreshes its mtime
+
+    store.max_bytes = 2 * os.path.getsize(tmp_path / "signals-new.pkl")
+    store.prune()
+    assert sorted(os.listdir(tmp_path)) == ["signals-new.pkl", "signals-old.pkl"]
+
+
+def test_clear(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.put("clusters", "k", 1)
+    store.clear()
+    assert store.get("clusters", "k") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_stage_key_chains_upstream_and_config():
+    signals = stage_key("signals", "input", {"threshold": 0.85})
+    assert signals == stage_key("signals", "input", {"threshold": 0.85})
+    assert signals != stage_key("signals", "other input", {"threshold": 0.85})
+    assert signals != stage_key("signals", "input", {"threshold": 0.9})
+
+    features = stage_key("features", signals)
+    assert features != stage_key("features", stage_key("signals", "input", {"threshold": 0.9}))
+    assert features != stage_key("clusters", signals)
+    with pytest.raises(ValueError):
+        stage_key("unknown", "input")
+
+
+def test_frame_digest_sees_values_index_and_columns():
+    frame = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert frame_digest(frame) == frame_digest(frame.copy())
+    assert frame_digest(frame) != frame_digest(frame.assign(a=[1, 3]))
+    assert frame_digest(frame) != frame_digest(frame.rename(columns={"b": "c"}))
+    assert frame_digest(frame) != frame_digest(frame.set_axis([5, 6]))
+
+
+def test_memory_hit_keeps_file_from_pruning(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.put("signals", "hot", "x" * 10_000)
+    store.put("signals", "cold", "x" * 10_000)
+    os.utime(tmp_path / "signals-hot.pkl", (time.time() - 100, time.time() - 100))
+    store.get("signals", "hot")  # served from memory
+
+    store.max_bytes = os.path.getsize(tmp_path / "signals-hot.pkl")
+    store.prune()
+    assert os.listdir(tmp_path) == ["signals-hot.pkl"]
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from engine.detectors.copy_paste import _detect_with_campaigns
+from engine.pipeline.risk_pipeline import RiskPipeline
+from engine.store.campaigns import CampaignLibrary
+
+
+def batch(seed, n_campaigns=4, per_campaign=12, noise=60, dim=32):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_campaigns, dim))
+    x = np.r_[
+        np.repeat(centers, per_campaign, axis=0) + rng.normal(0, 0.15, (n_campaigns * per_campaign, dim)),
+        rng.normal(size=(noise, dim)),
+    ].astype(np.float32)
+    n = len(x)
+    df = pd.DataFrame({
+        "post_id": np.arange(n) + seed * 1000,
+        "clean_text": [f"post {seed} {i}" for i in range(n)],
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="min"),
+    })
+    return df, x
+
+
+def detect(library, df, x):
+    return _detect_with_campaigns(df.copy(), x, 0.85, library, 0.85, 3)
+
+
+def test_rescoring_a_batch_is_stable(tmp_path):
+    library = CampaignLibrary(str(tmp_path / "campaigns.npz"))
+    df, x = batch(0)
+
+    dup1, stats1, clusters1 = detect(library, df, x)
+    assert len(library) == 4
+    revision = library.revision
+
+    dup2, stats2, clusters2 = detect(library, df, x)
+    assert dup2 == dup1
+    np.testing.assert_array_equal(stats2.row_max, stats1.row_max)
+    pd.testing.assert_frame_equal(clusters2, clusters1)
+    assert library.revision == revision
+
+
+def test_rescoring_ignores_later_batches(tmp_path):
+    library = CampaignLibrary(str(tmp_path / "campaigns.npz"))
+    df, x = batch(0)
+    _, stats1, clusters1 = detect(library, df, x)
+
+    other_df, other_x = batch(0)
+    other_df["post_id"] += 500
+    detect(library, other_df, other_x)  # moves the same centroids
+
+    _, stats2, clusters2 = detect(library, df, x)
+    np.testing.assert_array_equal(stats2.row_max, stats1.row_max)
+    pd.testing.assert_frame_equal(clusters2, clusters1)
+
+
+def test_new_batch_matches_known_campaigns(tmp_path):
+    library = CampaignLibrary(str(tmp_path / "campaigns.npz"))
+    df, x = batch(0)
+    detect(library, df, x)
+
+    again_df, again_x = batch(0)
+    again_df["post_id"] += 500
+    _, _, clusters = detect(library, again_df, again_x)
+    assert (clusters["campaign_id"].to_numpy()[:48] >= 0).all()
+    assert len(library) == 4
+
+
+def test_fingerprint_excludes_the_scored_batch(tmp_path):
+    library = CampaignLibrary(str(tmp_path / "campaigns.npz"))
+    before = library.fingerprint()
+    df, x = batch(0)
+    _detect_with_campaigns(df.copy(), x, 0.85, library, 0.85, 3, batch="b0")
+
+    assert library.fingerprint() != before
+    assert library.fingerprint(exclude="b0") == before
+
+    other_df, other_x = batch(1)
+    _detect_with_campaigns(other_df.copy(), other_x, 0.85, library, 0.85, 3, batch="b1")
+    assert library.fingerprint(exclude="b0") != before
+
+
+def test_first_campaigns_keep_the_signals_key(tmp_path):
+    pipeline = RiskPipeline({
+        "artifact_path": str(tmp_path / "artifacts"),
+        "campaign_path": str(tmp_path / "campaigns.npz"),
+    })
+    df, x = batch(0)
+    posts = df.rename(columns={"clean_text": "text"}).assign(account_id="a", account_age_days=1)
+    key = pipeline.stage_keys(posts)["signals"]
+
+    # the batch creates the library's first campaigns
+    _detect_with_campaigns(df.copy(), x, 0.85, pipeline.campaigns, 0.85, 3, batch=pipeline.batch_digest(posts))
+    assert len(pipeline.campaigns) > 0
+    assert pipeline.stage_keys(posts)["signals"] == key
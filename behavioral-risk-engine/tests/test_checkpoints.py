@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.encoders.backends import ENCODER_BACKENDS, HashedNgramEncoder
+from engine.pipeline.risk_pipeline import RiskPipeline
+
+ENCODER = {"backend": "hashed_ngram", "n_features": 2 ** 12}
+STAGES = ("signals", "features", "clusters")
+
+
+class DenseNgramEncoder(HashedNgramEncoder):
+    """Dense vectors without a model download (the campaign library needs them)."""
+
+    def encode(self, texts):
+        return super().encode(texts).toarray()
+
+
+def make_posts(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = [
+        f"join the rally at square {i % 4} tonight" if i % 3 == 0
+        else f"random musing number {i} about life {rng.integers(1000)}"
+        for i in range(n)
+    ]
+    return pd.DataFrame({
+        "post_id": np.arange(n),
+        "text": texts,
+        "timestamp": pd.Timestamp("2025-01-01")
+        + pd.to_timedelta(np.sort(rng.integers(0, 6 * 3600, n)), unit="s"),
+        "account_id": [f"u{i % 12}" for i in range(n)],
+        "account_age_days": rng.integers(1, 900, n),
+    })
+
+
+def run(config, posts):
+    pipeline = RiskPipeline(config)
+    pipeline.run(posts)
+    return pipeline.stage_status
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        "encoder": ENCODER,
+        "artifact_path": str(tmp_path / "artifacts"),
+        "normalizer_path": str(tmp_path / "feature_sketches.json"),
+    }
+
+
+def test_rerun_with_normalizer_is_cached(config):
+    posts = make_posts()
+    assert run(config, posts) == dict.fromkeys(STAGES, "computed")
+    assert run(config, posts) == dict.fromkeys(STAGES, "cached")
+
+
+def test_new_batch_in_normalizer_recomputes_features(config):
+    posts = make_posts()
+    run(config, posts)
+    run(config, make_posts(seed=1))
+    assert run(config, posts) == {"signals": "cached", "features": "computed", "clusters": "computed"}
+
+
+def test_rerun_with_account_features_is_cached(config, tmp_path):
+    config["account_feature_path"] = str(tmp_path / "account_features.sqlite")
+    posts = make_posts()
+    assert run(config, posts) == dict.fromkeys(STAGES, "computed")
+    assert run(config, posts) == dict.fromkeys(STAGES, "cached")
+
+
+@pytest.fixture
+def api_config(tmp_path, monkeypatch):
+    """Every store the API's PIPELINE_CONFIG configures, under tmp_path."""
+    monkeypatch.setitem(ENCODER_BACKENDS, "dense_ngram", DenseNgramEncoder)
+    return {
+        "encoder": {"backend": "dense_ngram", "n_features": 256},
+        "artifact_path": str(tmp_path / "artifacts"),
+        "normalizer_path": str(tmp_path / "feature_sketches.json"),
+        "campaign_path": str(tmp_path / "campaigns.npz"),
+        "event_store_path": str(tmp_path / "events.sqlite"),
+        "account_feature_path": str(tmp_path / "account_features.sqlite"),
+    }
+
+
+def test_rerun_with_api_stores_is_cached(api_config):
+    posts = make_posts()
+    first = RiskPipeline(api_config)
+    computed = first.run(posts)
+    assert first.stage_status == dict.fromkeys(STAGES, "computed")
+    assert first.campaigns is not None and len(first.campaigns) > 0
+
+    second = RiskPipeline(api_config)
+    cached = second.run(posts)
+    assert second.stage_status == dict.fromkeys(STAGES, "cached")
+    pd.testing.assert_frame_equal(cached["posts"], computed["posts"])
+
+
+def test_weight_change_reruns_only_fusion(api_config):
+    posts = make_posts()
+    run(api_config, posts)
+
+    pipeline = RiskPipeline(api_config)
+    pipeline.weights["sim_max"] = 0.6
+    result = pipeline.run(posts)
+    assert pipeline.stage_status == dict.fromkeys(STAGES, "cached")
+    assert "preprocess" not in pipeline.stage_timings
+    np.testing.assert_allclose(
+        result["posts"]["contrib_sim_max"], (result["posts"]["sim_max"] * 60).round(2)
+    )
+
+
+def test_min_cluster_size_change_reruns_clusters(api_config):
+    posts = make_posts()
+    run(api_config, posts)
+    assert run({**api_config, "min_cluster_size": 8}, posts) == {
+        "signals": "cached", "features": "cached", "clusters": "computed",
+    }
+
+
+def test_edited_post_reruns_every_stage(api_config):
+    posts = make_posts()
+    run(api_config, posts)
+    edited = posts.copy()
+    edited.loc[5, "text"] = "an entirely different post"
+    assert run(api_config, edited) == dict.fromkeys(STAGES, "computed")
+
+
+def test_stage_keys_chain(api_config):
+    posts = make_posts()
+    keys = RiskPipeline(api_config).stage_keys(posts)
+    assert RiskPipeline(api_config).stage_keys(posts) == keys
+
+    clusters_only = RiskPipeline({**api_config, "min_cluster_size": 8}).stage_keys(posts)
+    assert clusters_only["signals"] == keys["signals"]
+    assert clusters_only["features"] == keys["features"]
+    assert clusters_only["clusters"] != keys["clusters"]
+
+    upstream = RiskPipeline({**api_config, "duplicate_threshold": 0.9}).stage_keys(posts)
+    assert all(upstream[stage] != keys[stage] for stage in STAGES)
+
+
+def test_cached_clusters_restore_the_fitted_clusterer(api_config):
+    posts = make_posts()
+    first = RiskPipeline(api_config)
+    first.run(posts)
+
+    second = RiskPipeline(api_config)
+    assert second.clusterer.clusterer is None
+    second.run(posts)
+    assert second.stage_status["clusters"] == "cached"
+    assert second.clusterer.clusterer is not None
+    np.testing.assert_array_equal(second.clusterer.scaler.mean_, first.clusterer.scaler.mean_)
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from engine.detectors.co_activity import detect_coactive_accounts
+
+T0 = pd.Timestamp("2025-01-01 10:00")
+
+
+def posts(rows):
+    """rows: (account, cluster, minutes after T0, or None for no time)"""
+    account, cluster, minutes = zip(*rows)
+    return pd.DataFrame({
+        "account_id": account,
+        "cluster_id": cluster,
+        "timestamp": [T0 + pd.Timedelta(minutes=m) if m is not None else pd.NaT for m in minutes],
+    })
+
+
+def events(accounts, cluster, minutes):
+    return [(a, cluster, minutes) for a in accounts]
+
+
+def groups(result):
+    _, accounts = result
+    members = accounts[accounts["coactivity_group"] >= 0]
+    return sorted(sorted(g) for g in members.groupby("coactivity_group")["account_id"].apply(list))
+
+
+def test_accounts_sharing_events_form_a_group():
+    df = posts(events("ABC", 0, 0) + events("ABC", 1, 90) + events("DE", 0, 0))
+    ids, accounts = detect_coactive_accounts(df)
+    assert ids == {"A", "B", "C"}
+    row = accounts.set_index("account_id").loc["A"]
+    assert row["coactivity_group_size"] == 3
+    assert row["coactive_partners"] == 2
+    assert row["max_shared_events"] == 2
+    assert accounts.set_index("account_id").loc["D", "coactivity_group"] == -1
+
+
+def test_min_shared():
+    df = posts(events("ABC", 0, 0) + events("AB", 1, 0) + events("AB", 2, 0))
+    assert groups(detect_coactive_accounts(df, min_shared=1, min_group_size=2)) == [["A", "B", "C"]]
+    assert groups(detect_coactive_accounts(df, min_shared=2, min_group_size=2)) == [["A", "B"]]
+    assert groups(detect_coactive_accounts(df, min_shared=3, min_group_size=2)) == [["A", "B"]]
+    assert groups(detect_coactive_accounts(df, min_shared=4, min_group_size=2)) == []
+
+
+def test_same_cluster_other_window_is_another_event():
+    df = posts(events("ABC", 0, 0) + events("ABC", 0, 15) + events("ABC", 0, 120))
+    _, accounts = detect_coactive_accounts(df, window="1h", min_shared=2)
+    assert accounts["max_shared_events"].tolist() == [2, 2, 2]
+    _, accounts = detect_coactive_accounts(df, window="10min", min_shared=2)
+    assert accounts["max_shared_events"].tolist() == [3, 3, 3]
+
+
+def test_max_event_accounts_drops_crowded_events():
+    crowd = [f"u{i}" for i in range(10)]
+    df = posts(events(crowd, 0, 0) + events(crowd, 1, 0))
+    assert len(groups(detect_coactive_accounts(df))) == 1
+    ids, accounts = detect_coactive_accounts(df, max_event_accounts=5)
+    assert ids == set()
+    assert (accounts["coactive_partners"] == 0).all()
+
+
+@pytest.mark.parametrize("min_group_size, expected", [
+    (2, [["A", "B"], ["C", "D", "E"]]),
+    (3, [["C", "D", "E"]]),
+    (4, []),
+])
+def test_group_sizes(min_group_size, expected):
+    df = posts(
+        events("AB", 0, 0) + events("AB", 1, 0)
+        + events("CDE", 2, 0) + events("CDE", 3, 0)
+    )
+    result = detect_coactive_accounts(df, min_group_size=min_group_size)
+    assert groups(result) == expected
+    sizes = result[1].set_index("account_id")["coactivity_group_size"]
+    assert sizes["C"] == (3 if min_group_size <= 3 else 0)
+
+
+def test_missing_times_and_clusters_are_in_no_event():
+    df = posts(
+        events("ABC", 0, 0) + events("ABC", 0, 61)
+        # no time: code -1 would alias cluster 0's last bin
+        + events("DEF", 1, None) + events("DEF", 1, None)
+        + events("GHI", None, 0) + events("GHI", None, 61)
+    )
+    ids, _ = detect_coactive_accounts(df, min_shared=1)
+    assert ids == {"A", "B", "C"}
+
+
+def test_timezone_aware_input_matches_naive():
+    df = posts(events("ABC", 0, 0) + events("ABC", 1, 90))
+    aware = df.assign(timestamp=df["timestamp"].dt.tz_localize("UTC").dt.tz_convert("Asia/Kolkata"))
+    pd.testing.assert_frame_equal(detect_coactive_accounts(aware)[1], detect_coactive_accounts(df)[1])
+
+
+def test_requires_columns():
+    with pytest.raises(ValueError):
+        detect_coactive_accounts(pd.DataFrame({"account_id": ["A"]}))
+    ids, accounts = detect_coactive_accounts(posts([("A", 0, 0)]).iloc[:0])
+    assert ids == set() and accounts.empty
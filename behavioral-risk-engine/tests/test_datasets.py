@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from engine.pipeline.risk_pipeline import DataValidationError, RiskPipeline
+from engine.store.datasets import DatasetRegistry, DatasetTooLarge
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return DatasetRegistry(str(tmp_path / "datasets"))
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "posts.csv"
+    pd.DataFrame({"post_id": [1, 2], "text": ["a", "b"]}).to_csv(path, index=False)
+    return str(path)
+
+
+def ok(df):
+    return {"rows": len(df)}
+
+
+def test_transient_error_is_retried(registry, csv_path):
+    dataset_id = registry.register_path(csv_path)
+
+    def offline(df):
+        raise OSError("model download failed")
+
+    with pytest.raises(OSError):
+        registry.views(dataset_id, offline)
+    assert registry.info(dataset_id)["status"] == "uploaded"
+    assert registry.views(dataset_id, ok) == {"rows": 2}
+
+
+def test_data_error_sticks_until_reregistered(registry, csv_path):
+    dataset_id = registry.register_path(csv_path)
+
+    def bad_columns(df):
+        raise DataValidationError("Missing required columns: {'timestamp'}")
+
+    with pytest.raises(ValueError):
+        registry.views(dataset_id, bad_columns)
+    with pytest.raises(ValueError, match="failed to score"):
+        registry.views(dataset_id, ok)
+
+    assert registry.register_path(csv_path) == dataset_id
+    assert registry.info(dataset_id)["error"] is None
+    assert registry.views(dataset_id, ok) == {"rows": 2}
+
+
+def test_reupload_reuses_dataset(registry, csv_path):
+    first = registry.register_path(csv_path)
+    assert registry.register_path(csv_path) == first
+    assert len(registry.entries()) == 1
+
+
+@pytest.mark.parametrize("error", [KeyError("column"), TypeError("bad operand"), ValueError("shape mismatch")])
+def test_other_errors_are_transient(registry, csv_path, error):
+    dataset_id = registry.register_path(csv_path)
+
+    def buggy(df):
+        raise error
+
+    with pytest.raises(type(error)):
+        registry.views(dataset_id, buggy)
+    assert registry.info(dataset_id)["status"] == "uploaded"
+    assert registry.latest() == dataset_id
+    assert registry.views(dataset_id, ok) == {"rows": 2}
+
+
+@pytest.mark.filterwarnings("ignore:Could not infer format")
+def test_pipeline_rejects_invalid_posts():
+    posts = pd.DataFrame({
+        "post_id": [1, 2],
+        "text": ["a", "b"],
+        "timestamp": ["2025-01-01 10:00", "2025-01-01 11:00"],
+        "account_id": ["x", "y"],
+        "account_age_days": [10, 20],
+    })
+    pipeline = RiskPipeline()
+    assert len(pipeline.preprocess_posts(posts)) == 2
+    for bad in (
+        posts.drop(columns="timestamp"),
+        posts.assign(timestamp=["yesterday", "2025-01-01"]),
+        posts.assign(account_age_days=["old", 3]),
+        posts.assign(text=["a", None]),
+    ):
+        with pytest.raises(DataValidationError):
+            pipeline.preprocess_posts(bad)
+
+
+def write_csv(tmp_path, name, rows):
+    path = tmp_path / name
+    pd.DataFrame({"post_id": range(rows), "text": [f"post {i}" for i in range(rows)]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_oversized_upload_is_rejected(tmp_path):
+    registry = DatasetRegistry(str(tmp_path / "datasets"), max_bytes=1000)
+    with pytest.raises(DatasetTooLarge):
+        registry.register_path(write_csv(tmp_path, "big.csv", 5000))
+    assert registry.entries() == []
+    assert registry.register_path(write_csv(tmp_path, "big.csv", 5000), pinned=True)
+
+
+def test_new_upload_is_not_evicted(tmp_path):
+    probe = DatasetRegistry(str(tmp_path / "probe"))
+    size = probe.info(probe.register_path(write_csv(tmp_path, "a.csv", 50)))["bytes"]
+
+    # room for one dataset (plus its views), not two
+    registry = DatasetRegistry(str(tmp_path / "datasets"), max_bytes=int(size * 1.5))
+    first = registry.register_path(write_csv(tmp_path, "a.csv", 50))
+    second = registry.register_path(write_csv(tmp_path, "b.csv", 51))
+    assert [e["dataset_id"] for e in registry.entries()] == [second]
+
+    # scoring it (views add bytes) keeps it too
+    assert registry.views(second, lambda df: {"blob": "x" * size}) == {"blob": "x" * size}
+    assert registry.info(second)["status"] == "ready"
+    with pytest.raises(KeyError):
+        registry.info(first)
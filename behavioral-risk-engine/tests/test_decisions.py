@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from engine.utils.decisions import DecisionPolicy
+from engine.utils.functions import (
+    DECISIONS,
+    RISK_AUTO,
+    CONF_AUTO,
+    RISK_REVIEW,
+    CONF_REVIEW,
+    decision_policy,
+)
+
+
+def reference(risk, confidence):
+    return np.array([decision_policy(r, c) for r, c in zip(risk, confidence)], dtype=object)
+
+
+def boundary_grid():
+    # every tier floor, just below / above it, and missing values
+    eps = 1e-9
+    risks = [0, RISK_REVIEW - eps, RISK_REVIEW, RISK_REVIEW + eps,
+             RISK_AUTO - eps, RISK_AUTO, RISK_AUTO + eps, 100, np.nan]
+    confs = [0, CONF_REVIEW - eps, CONF_REVIEW, CONF_REVIEW + eps,
+             CONF_AUTO - eps, CONF_AUTO, CONF_AUTO + eps, 1, np.nan]
+    risk, conf = np.meshgrid(risks, confs)
+    return risk.ravel(), conf.ravel()
+
+
+def test_decide_matches_scalar_policy_on_boundaries():
+    risk, conf = boundary_grid()
+    np.testing.assert_array_equal(DecisionPolicy().decide(risk, conf), reference(risk, conf))
+
+
+def test_decide_matches_scalar_policy_on_random_scores():
+    rng = np.random.default_rng(0)
+    risk = rng.uniform(0, 100, 10_000).round(1)
+    conf = rng.uniform(0, 1, 10_000).round(2)
+    np.testing.assert_array_equal(DecisionPolicy().decide(risk, conf), reference(risk, conf))
+
+
+def test_decide_codes_index_decisions():
+    risk, conf = boundary_grid()
+    codes = DecisionPolicy().decide_codes(risk, conf)
+    np.testing.assert_array_equal(np.array(DECISIONS, dtype=object)[codes], reference(risk, conf))
+
+
+def test_nan_scores_get_no_action():
+    decided = DecisionPolicy().decide([np.nan, 90, np.nan], [0.9, np.nan, np.nan])
+    assert decided.tolist() == ["NO_ACTION"] * 3
+
+
+def test_unknown_decision_rejected():
+    with pytest.raises(ValueError):
+        DecisionPolicy([{"decision": "BAN", "risk": 90, "confidence": 0.9}])
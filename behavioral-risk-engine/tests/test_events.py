@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.store.events import CoordinationEvents, EventStore
+
+T0 = pd.Timestamp("2025-01-01")
+NARRATIVES = ["election", "health", "finance"]
+
+
+def random_events(seed, n=200):
+    rng = np.random.default_rng(seed)
+    starts = T0 + pd.to_timedelta(rng.integers(0, 48 * 60, n), unit="min")
+    # mostly short bursts, a few long ones (they set the scan bound)
+    lengths = pd.to_timedelta(np.where(rng.random(n) < 0.05, rng.integers(300, 900, n), rng.integers(0, 30, n)), unit="min")
+    records = [
+        {
+            "narrative": NARRATIVES[rng.integers(len(NARRATIVES))],
+            "window_start": start,
+            "window_end": start + length,
+            "num_posts": 3,
+            "post_ids": [f"p{seed}-{i}", f"p{seed}-{i + 1}", f"shared-{i % 7}"],
+        }
+        for i, (start, length) in enumerate(zip(starts, lengths))
+    ]
+    return CoordinationEvents.from_records(records)
+
+
+def brute_force(events, start=None, end=None, narrative=None):
+    ev = events.events
+    keep = np.ones(len(ev), dtype=bool)
+    if start is not None:
+        keep &= (ev["window_end"] > pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (ev["window_start"] < pd.Timestamp(end)).to_numpy()
+    if narrative is not None:
+        keep &= (ev["narrative"] == narrative).to_numpy()
+    return set(ev.loc[keep, "event_id"].tolist())
+
+
+def queries(seed=0, n=60):
+    rng = np.random.default_rng(seed)
+    out = [(None, None, None), (T0 + pd.Timedelta("10h"), None, None), (None, T0 + pd.Timedelta("10h"), "health")]
+    for _ in range(n):
+        start = T0 + pd.Timedelta(minutes=int(rng.integers(-60, 50 * 60)))
+        end = start + pd.Timedelta(minutes=int(rng.integers(1, 600)))
+        narrative = [None, *NARRATIVES][rng.integers(4)]
+        out.append((start, end, narrative))
+    return out
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EventStore(str(tmp_path / "events.sqlite"))
+
+
+@pytest.mark.parametrize("start, end, narrative", queries())
+def test_overlap_paths_match_brute_force(store, start, end, narrative):
+    events = random_events(1)
+    store.record(events, source="s1")
+    expected = brute_force(events, start, end, narrative)
+
+    assert set(events.overlapping(start, end, narrative)["event_id"]) == expected
+    assert set(store.overlapping(start, end, narrative)["event_id"]) == expected
+    assert set(store.overlapping(start, end, narrative, source="s1")["event_id"]) == expected
+
+
+def test_event_spanning_the_query_start():
+    records = [
+        {"narrative": "election", "window_start": T0, "window_end": T0 + pd.Timedelta("6h"), "num_posts": 3, "post_ids": [1, 2, 3]},
+        {"narrative": "election", "window_start": T0 + pd.Timedelta("5h"), "window_end": T0 + pd.Timedelta("5h10min"), "num_posts": 3, "post_ids": [4, 5, 6]},
+        {"narrative": "health", "window_start": T0 + pd.Timedelta("1h"), "window_end": T0 + pd.Timedelta("7h"), "num_posts": 3, "post_ids": [7, 8, 9]},
+    ]
+    events = CoordinationEvents.from_records(records)
+    start, end = T0 + pd.Timedelta("5h30min"), T0 + pd.Timedelta("8h")
+    # the long events start long before the query but are still running
+    assert set(events.overlapping(start, end)["event_id"]) == {0, 2}
+    assert set(events.overlapping(start, end, narrative="election")["event_id"]) == {0}
+    # an event ending exactly at the query start does not overlap
+    assert set(events.overlapping(T0 + pd.Timedelta("6h"), end, narrative="election")["event_id"]) == set()
+
+
+def test_longest_window_bound_spans_sources(store):
+    short = CoordinationEvents.from_records([
+        {"narrative": "health", "window_start": T0 + pd.Timedelta("9h"), "window_end": T0 + pd.Timedelta("9h5min"), "num_posts": 3, "post_ids": [1, 2, 3]},
+    ])
+    long = CoordinationEvents.from_records([
+        {"narrative": "health", "window_start": T0, "window_end": T0 + pd.Timedelta("12h"), "num_posts": 3, "post_ids": [4, 5, 6]},
+    ])
+    store.record(long, source="long")
+    store.record(short, source="short")
+    found = store.overlapping(T0 + pd.Timedelta("10h"), T0 + pd.Timedelta("11h"))
+    assert found[["source", "event_id"]].values.tolist() == [["long", 0]]
+
+
+def test_containing_matches_brute_force(store):
+    events = random_events(2)
+    store.record(events, source="s2")
+    members = events.posts
+    for post_id in ["p2-0", "p2-5", "shared-3", "missing"]:
+        expected = set(members.loc[members["post_id"] == post_id, "event_id"])
+        assert set(events.containing(post_id)["event_id"]) == expected
+        assert set(store.containing(post_id)["event_id"]) == expected
+        assert set(store.containing(post_id, source="other")["event_id"]) == set()
+
+
+def test_rerecording_a_source_replaces_it(store):
+    events = random_events(3, n=20)
+    store.record(events, source="s")
+    store.record(events, source="s")
+    assert len(store.overlapping()) == 20
+    loaded = store.load("s")
+    pd.testing.assert_frame_equal(loaded.events, events.events, check_dtype=False)
+    assert loaded.posts["post_id"].tolist() == events.posts["post_id"].astype(str).tolist()
+    store.delete("s")
+    assert store.overlapping().empty
+
+
+def test_offset_aware_bounds_agree(store, recwarn):
+    events = random_events(4)
+    store.record(events, source="s4")
+    start = pd.Timestamp("2025-01-01T12:00+02:00")
+    end = pd.Timestamp("2025-01-01T18:00+02:00")
+    expected = brute_force(events, start.tz_convert(None), end.tz_convert(None))
+
+    assert set(events.overlapping(start, end)["event_id"]) == expected
+    assert set(store.overlapping(start, end)["event_id"]) == expected
+    assert not [w for w in recwarn if issubclass(w.category, UserWarning)]
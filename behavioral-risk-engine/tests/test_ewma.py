@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.utils.functions import (
+    compute_account_ewma,
+    compute_account_ewma_fast,
+    grouped_ewma,
+)
+
+
+def reference_ewma(values, groups, alpha, initial=None):
+    """Per-group pandas EWMA, optionally continued from a seed value."""
+    out = np.empty(len(values))
+    for g in pd.unique(groups):
+        rows = np.flatnonzero(groups == g)
+        x = values[rows]
+        seed = np.nan if initial is None else initial[rows[0]]
+        if not np.isnan(seed):
+            out[rows] = pd.Series(np.r_[seed, x]).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+        else:
+            out[rows] = pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def posts(n=3000, accounts=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "post_id": np.arange(n),
+        "account_id": [f"user_{i:03d}" for i in rng.integers(0, accounts, n)],
+        # unique timestamps, shuffled so the input is not in time order
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.permutation(n) * 7, unit="s"),
+        "risk_score": rng.uniform(0, 100, n).round(2),
+    })
+
+
+def test_fast_matches_reference_on_unsorted_input():
+    df = posts()
+    slow = compute_account_ewma(df.copy(), alpha=0.3).sort_index()
+    fast = compute_account_ewma_fast(df.copy(), alpha=0.3).sort_index()
+    np.testing.assert_allclose(fast["risk_ewma"], slow["risk_ewma"], rtol=1e-9)
+
+
+def test_fast_keeps_time_order():
+    df = posts(n=500)
+    slow = compute_account_ewma(df.copy())
+    fast = compute_account_ewma_fast(df.copy())
+    assert fast["timestamp"].is_monotonic_increasing
+    assert sorted(fast.index) == sorted(slow.index)
+
+
+@pytest.mark.parametrize("alpha", [0.05, 0.3, 0.9])
+def test_groups_crossing_block_boundaries(alpha):
+    rng = np.random.default_rng(1)
+    # interleaved groups, most much longer than the block
+    groups = rng.integers(0, 5, 5000)
+    values = rng.uniform(0, 100, 5000)
+    expected = reference_ewma(values, groups, alpha)
+    for block in (7, 64, 1024):
+        np.testing.assert_allclose(
+            grouped_ewma(values, groups, alpha=alpha, block=block), expected, rtol=1e-9
+        )
+
+
+def test_seeded_initial_continues_groups():
+    rng = np.random.default_rng(2)
+    groups = rng.integers(0, 6, 2000)
+    values = rng.uniform(0, 100, 2000)
+    # a previous EWMA value on every row of half the groups, NaN for the rest
+    seeds = np.where(groups % 2 == 0, groups * 10.0 + 5.0, np.nan)
+    expected = reference_ewma(values, groups, 0.3, initial=seeds)
+    for block in (16, 1024):
+        np.testing.assert_allclose(
+            grouped_ewma(values, groups, alpha=0.3, initial=seeds, block=block), expected, rtol=1e-9
+        )
+
+
+def test_empty_and_alpha_one():
+    assert len(grouped_ewma([], [], alpha=0.3)) == 0
+    values = np.array([1.0, 5.0, 3.0])
+    np.testing.assert_array_equal(grouped_ewma(values, [0, 0, 1], alpha=1.0), values)
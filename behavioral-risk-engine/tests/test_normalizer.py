@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from engine.features.normalizer import FeatureNormalizer
+
+
+def raw(seed, n=500):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "post_id": np.arange(n) + seed * 10_000,
+        "cluster_size": rng.integers(1, 40, n),
+        "burst_size": rng.integers(0, 10, n),
+        "account_age_days": rng.integers(1, 3000, n),
+        "posts_1h": rng.integers(0, 20, n),
+    })
+
+
+def test_refolding_a_batch_is_a_no_op():
+    normalizer = FeatureNormalizer()
+    df = raw(0)
+    assert normalizer.update(df)
+    refs = normalizer.references()
+    fingerprint = normalizer.fingerprint()
+
+    assert not normalizer.update(df)
+    assert not normalizer.update(df.copy(), batch=None)
+    assert normalizer.references() == refs
+    assert normalizer.fingerprint() == fingerprint
+    assert normalizer.sketches["cluster_size"].n == len(df)
+
+
+def test_batch_id_overrides_content_digest():
+    normalizer = FeatureNormalizer()
+    assert normalizer.update(raw(0), batch="input-1")
+    # same input id: not folded again even though the raw features differ
+    assert not normalizer.update(raw(1), batch="input-1")
+    assert normalizer.update(raw(1), batch="input-2")
+
+
+def test_fingerprint_excludes_the_scaled_batch():
+    normalizer = FeatureNormalizer()
+    normalizer.update(raw(0), batch="a")
+    before = normalizer.fingerprint(exclude="b")
+
+    normalizer.update(raw(1), batch="b")
+    assert normalizer.fingerprint() != before
+    assert normalizer.fingerprint(exclude="b") == before
+    normalizer.update(raw(1), batch="b")
+    assert normalizer.fingerprint(exclude="b") == before
+
+
+def test_merge_matches_a_single_normalizer():
+    batches = [raw(seed) for seed in range(4)]
+    single = FeatureNormalizer()
+    for df in batches:
+        single.update(df)
+
+    left, right = FeatureNormalizer(), FeatureNormalizer()
+    for df in batches[:2]:
+        left.update(df)
+    for df in batches[2:]:
+        right.update(df)
+    left.merge(right)
+
+    assert sorted(left.digests) == sorted(single.digests)
+    assert left.fingerprint() == single.fingerprint()
+    for feature, sketch in single.sketches.items():
+        assert left.sketches[feature].n == sketch.n
+    assert left.references() == single.references()
+
+
+def test_shards_saving_the_same_batch_count_it_once(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    df = raw(0)
+    first, second = FeatureNormalizer(path), FeatureNormalizer(path)
+    first.update(df)
+    second.update(df)
+    second.update(raw(1))
+    first.save()
+    second.save()
+
+    reloaded = FeatureNormalizer(path)
+    assert reloaded.sketches["cluster_size"].n == 2 * len(df)
+    assert len(reloaded.digests) == 2
+    assert not reloaded.update(df)
+
+
+def test_frozen_only_reads(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    seeded = FeatureNormalizer(path)
+    seeded.update(raw(0))
+    seeded.save()
+
+    frozen = FeatureNormalizer(path, frozen=True)
+    refs = frozen.references()
+    assert not frozen.update(raw(1))
+    assert frozen.references() == refs
+
+
+def test_scale_against_reference():
+    normalizer = FeatureNormalizer(quantile=0.5)
+    normalizer.update(pd.DataFrame({"post_id": range(5), "cluster_size": [1, 2, 3, 4, 100]}))
+    assert normalizer.reference("cluster_size") == 3
+    scaled = normalizer.scale("cluster_size", pd.Series([0.0, 1.5, 3.0, 100.0]))
+    assert scaled.tolist() == [0.0, 0.5, 1.0, 1.0]
+    age = normalizer.scale("account_age_days", pd.Series([10.0, 20.0]))
+    assert age.tolist() == [0.5, 0.0]  # no reference yet: batch max, inverted
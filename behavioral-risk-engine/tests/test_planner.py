@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from engine.pipeline import planner
+from engine.pipeline.planner import DEFAULT_BUDGET_MB, ExecutionPlanner
+from engine.pipeline.risk_pipeline import RiskPipeline
+
+
+def test_default_budget_ignores_free_memory(monkeypatch):
+    plans = []
+    for free_mb in (512, 64_000):
+        monkeypatch.setattr(planner, "available_memory", lambda: free_mb * 1024 ** 2)
+        plans.append(ExecutionPlanner().plan(200_000, 384))
+    assert plans[0] == plans[1]
+    assert plans[0]["budget_mb"] == DEFAULT_BUDGET_MB
+
+
+def test_auto_budget_follows_free_memory(monkeypatch):
+    monkeypatch.setattr(planner, "available_memory", lambda: 1000 * 1024 ** 2)
+    assert ExecutionPlanner("auto", fraction=0.5).budget() == 500 * 1024 ** 2
+
+
+@pytest.mark.parametrize("budget", [0, -5, "lots"])
+def test_invalid_budget(budget):
+    with pytest.raises(ValueError):
+        ExecutionPlanner(budget)
+
+
+def test_duplicate_plan_is_part_of_signals_key(tmp_path):
+    posts = pd.DataFrame({
+        "post_id": range(3000),
+        "text": ["same text"] * 3000,
+        "timestamp": pd.Timestamp("2025-01-01"),
+        "account_id": "a",
+    })
+
+    def keys(budget_mb):
+        pipeline = RiskPipeline({"artifact_path": str(tmp_path), "memory_budget_mb": budget_mb})
+        return pipeline.plan_execution(posts)["duplicates"]["strategy"], pipeline.stage_keys(posts)["signals"]
+
+    dense, dense_key = keys(4096)
+    blocked, blocked_key = keys(100)
+    assert (dense, blocked) == ("dense", "blocked")
+    assert dense_key != blocked_key
+    assert keys(4096)[1] == dense_key
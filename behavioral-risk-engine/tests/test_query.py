@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.utils.query import filter_frame, page_frame
+
+
+def reference(df, sort, descending, offset, limit):
+    return df.sort_values(sort, ascending=not descending, kind="stable").iloc[offset:offset + limit]
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "int16", "float32", "float64"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_match_stable_sort(dtype, descending):
+    rng = np.random.default_rng(0)
+    # few distinct values: most page boundaries fall inside a run of ties
+    df = pd.DataFrame({"score": rng.integers(0, 6, 500).astype(dtype), "id": np.arange(500)})
+    for offset in range(0, 500, 37):
+        page = page_frame(df, "score", descending, offset, 37)
+        pd.testing.assert_frame_equal(page, reference(df, "score", descending, offset, 37))
+
+
+def test_pages_cover_every_row_once():
+    df = pd.DataFrame({"score": np.repeat([3.0, 1.0, 2.0], 100), "id": np.arange(300)})
+    seen = pd.concat([page_frame(df, "score", True, o, 25) for o in range(0, 300, 25)])
+    assert sorted(seen["id"]) == list(range(300))
+
+
+def test_nan_sorts_last_descending():
+    df = pd.DataFrame({"score": [np.nan, 2.0, np.nan, 5.0, 1.0]})
+    assert page_frame(df, "score", True, 0, 3)["score"].tolist() == [5.0, 2.0, 1.0]
+
+
+def test_filter_on_string_form():
+    df = pd.DataFrame({"decision": ["AUTO_ACTION", "NO_ACTION"], "cluster": [1, 2]})
+    assert filter_frame(df, {"cluster": ["2"], "decision": None})["decision"].tolist() == ["NO_ACTION"]
+    with pytest.raises(ValueError):
+        filter_frame(df, {"missing": ["x"]})
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from engine.detectors.copy_paste import sparse_neighbours
+from engine.utils import shared
+from engine.utils.shared import SharedArena, attach, attach_csr, release
+
+
+def test_round_trip_and_release():
+    x = np.arange(12, dtype=np.float32).reshape(3, 4)
+    with SharedArena() as arena:
+        handle = arena.put(x)
+        view = attach(handle)
+        np.testing.assert_array_equal(view, x)
+        assert not view.flags.writeable
+        del view
+        release()
+        assert not shared._ATTACHED
+    assert not os.path.exists(f"/dev/shm/{handle.name}")
+
+
+def test_memmap_csr_round_trip(tmp_path):
+    x = sp.random(50, 40, density=0.1, format="csr", dtype=np.float32, random_state=0)
+    with SharedArena("memmap", str(tmp_path)) as arena:
+        y = attach_csr(arena.put_csr(x))
+        assert (y != x).nnz == 0
+        del y
+    assert not os.listdir(tmp_path)
+
+
+def test_parallel_neighbours_match_serial():
+    rng = np.random.default_rng(0)
+    base = sp.random(20, 300, density=0.05, format="csr", dtype=np.float32, random_state=1)
+    x = base[rng.integers(0, 20, 400)] + sp.random(400, 300, density=0.002, format="csr", dtype=np.float32, random_state=2)
+    x = sp.csr_matrix(x / np.maximum(sp.linalg.norm(x, axis=1), 1e-12)[:, None])
+
+    serial_graph, serial_max = sparse_neighbours(x, 0.8, block_rows=64, workers=1)
+    graph, row_max = sparse_neighbours(x, 0.8, block_rows=64, workers=2)
+    assert (graph != serial_graph).nnz == 0
+    np.testing.assert_array_equal(row_max, serial_max)
+    assert not shared._ATTACHED
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from engine.utils.sketch import QuantileSketch
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(sketch, values):
+    """Largest gap between the sketch's and the exact rank of its quantiles."""
+    exact = np.sort(values)
+    ranks = np.searchsorted(exact, sketch.quantiles(QS), side="right") / len(exact)
+    return np.abs(ranks - QS).max()
+
+
+@pytest.mark.parametrize("k", [64, 256, 1024])
+def test_rank_error_within_bound(k):
+    values = np.random.default_rng(k).lognormal(size=200_000)
+    sketch = QuantileSketch(k).update(values)
+    assert rank_error(sketch, values) <= 3 / k
+    assert sketch.n == len(values)
+
+
+def test_streaming_updates_within_bound():
+    values = np.random.default_rng(1).normal(size=100_000)
+    sketch = QuantileSketch(256)
+    for chunk in np.array_split(values, 400):
+        sketch.update(chunk)
+    assert rank_error(sketch, values) <= 3 / 256
+
+
+def test_small_inputs_are_exact():
+    values = np.random.default_rng(2).integers(0, 50, 500).astype(float)
+    sketch = QuantileSketch(1024).update(values)
+    np.testing.assert_array_equal(
+        sketch.quantiles(QS), np.quantile(values, QS, method="inverted_cdf")
+    )
+
+
+def test_merge_matches_a_single_sketch():
+    values = np.random.default_rng(3).exponential(size=120_000)
+    shards = [QuantileSketch(256).update(part) for part in np.array_split(values, 6)]
+    merged = QuantileSketch(256)
+    for shard in shards:
+        merged.merge(shard)
+    single = QuantileSketch(256).update(values)
+
+    assert (merged.n, merged.min, merged.max) == (single.n, single.min, single.max)
+    assert rank_error(merged, values) <= 3 / 256
+    assert rank_error(single, values) <= 3 / 256
+
+
+def test_merge_rejects_other_k():
+    with pytest.raises(ValueError):
+        QuantileSketch(64).merge(QuantileSketch(128))
+
+
+def test_ignores_non_finite_and_round_trips():
+    sketch = QuantileSketch(64).update([1.0, np.nan, np.inf, 3.0, 2.0])
+    assert sketch.n == 3
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(restored.quantiles(QS), sketch.quantiles(QS))
+    assert np.isnan(QuantileSketch(64).quantile(0.5))
@@ -0,0 +1,99 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.detectors.synchrony import detect_synchronous_pairs
+
+T0 = pd.Timestamp("2025-01-01")
+
+
+def posts(rows):
+    """rows: (account, group, seconds after T0)"""
+    account, group, seconds = zip(*rows)
+    return pd.DataFrame({
+        "account_id": account,
+        "cluster_id": group,
+        "timestamp": T0 + pd.to_timedelta(seconds, unit="s"),
+    })
+
+
+def pair_counts(pairs):
+    return {tuple(sorted(p[:2])): p[2] for p in pairs.itertuples(index=False)}
+
+
+def test_burst_across_slot_boundary_is_one_occasion():
+    df = posts([("C", 1, 0), ("A", 0, 29), ("A", 0, 31), ("B", 0, 45)])
+    ids, accounts, pairs = detect_synchronous_pairs(df)
+    assert ids == set()
+    assert pairs.empty
+    _, _, pairs = detect_synchronous_pairs(df, min_repeats=1)
+    assert pair_counts(pairs) == {("A", "B"): 1}
+
+
+def test_chained_burst_is_one_occasion():
+    # every gap is within max_lag, so the whole run is one occasion
+    df = posts([("A", 0, 0), ("B", 0, 20), ("A", 0, 40), ("B", 0, 60), ("A", 0, 80)])
+    _, _, pairs = detect_synchronous_pairs(df, min_repeats=1)
+    assert pair_counts(pairs) == {("A", "B"): 1}
+
+
+def test_repeats_across_occasions_and_groups():
+    df = posts([
+        ("A", 0, 0), ("B", 0, 10),          # occasion 1
+        ("A", 0, 600), ("B", 0, 605),       # same group, later: occasion 2
+        ("A", 1, 1000), ("B", 1, 1001),     # other group: occasion 3
+        ("A", 2, 2000), ("C", 2, 2100),     # C is more than max_lag behind
+    ])
+    ids, accounts, pairs = detect_synchronous_pairs(df)
+    assert ids == {"A", "B"}
+    assert pair_counts(pairs) == {("A", "B"): 3}
+    assert accounts.set_index("account_id").loc["A", "total_syncs"] == 3
+
+
+@pytest.mark.parametrize("min_repeats, expected", [(1, {"A", "B"}), (2, {"A", "B"}), (3, set())])
+def test_min_repeats_threshold(min_repeats, expected):
+    df = posts([("A", 0, 0), ("B", 0, 5), ("A", 0, 500), ("B", 0, 505)])
+    ids, _, pairs = detect_synchronous_pairs(df, min_repeats=min_repeats)
+    assert ids == expected
+    assert pairs["sync_count"].tolist() == ([2] if expected else [])
+
+
+def test_max_partners_caps_pairs_per_post():
+    # one burst: A then ten others within a few seconds, twice
+    rows = []
+    for start in (0, 1000):
+        rows.append(("A", 0, start))
+        rows += [(f"x{i}", 0, start + 1 + i) for i in range(10)]
+    df = posts(rows)
+
+    _, _, pairs = detect_synchronous_pairs(df)
+    assert sum("A" in pair for pair in pair_counts(pairs)) == 10
+    _, _, capped = detect_synchronous_pairs(df, max_partners=3)
+    assert set(p for p in pair_counts(capped) if "A" in p) == {("A", "x0"), ("A", "x1"), ("A", "x2")}
+
+
+def test_timezone_aware_input_matches_naive():
+    df = posts([("A", 0, 0), ("B", 0, 5), ("A", 0, 500), ("B", 0, 505)])
+    aware = df.assign(timestamp=df["timestamp"].dt.tz_localize("UTC").dt.tz_convert("Europe/Berlin"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = detect_synchronous_pairs(aware)
+    pd.testing.assert_frame_equal(result[2], detect_synchronous_pairs(df)[2])
+
+
+def test_missing_groups_and_times_do_not_pair():
+    df = posts([("A", 0, 0), ("B", 0, 5), ("A", 0, 500), ("B", 0, 505)])
+    df["cluster_id"] = df["cluster_id"].astype(float)
+    df.loc[1, "cluster_id"] = np.nan
+    df.loc[3, "timestamp"] = pd.NaT
+    ids, accounts, pairs = detect_synchronous_pairs(df, min_repeats=1)
+    assert ids == set() and pairs.empty and accounts.empty
+
+
+def test_requires_columns_and_positive_lag():
+    with pytest.raises(ValueError):
+        detect_synchronous_pairs(pd.DataFrame({"account_id": [1]}))
+    with pytest.raises(ValueError):
+        detect_synchronous_pairs(posts([("A", 0, 0)]), max_lag="0s")
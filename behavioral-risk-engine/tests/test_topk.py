@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.analysis.topk import TopKIndex
+from engine.store.topk import TopKStore
+from engine.utils.query import filter_frame, page_frame
+
+
+def posts(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "post_id": np.arange(n),
+        "risk_score": rng.integers(0, 50, n) * 2.0,  # heavy ties
+        "narrative": rng.choice(["BTC", "ETH", "DOGE"], n),
+        "decision": rng.choice(["AUTO_ACTION", "QUEUE_REVIEW", "NO_ACTION"], n),
+    })
+
+
+def test_pages_match_page_frame():
+    df = posts()
+    index = TopKIndex(["risk_score"], ["narrative", "decision"], k=300).update(df)
+    for filters in ({}, {"narrative": ["ETH"]}, {"decision": ["NO_ACTION"]}):
+        for offset in (0, 50, 250):
+            total, page = index.lookup(filters, "risk_score", True, offset, 50)
+            expected = filter_frame(df, filters)
+            assert total == len(expected)
+            pd.testing.assert_frame_equal(
+                page.reset_index(drop=True),
+                page_frame(expected, "risk_score", True, offset, 50).reset_index(drop=True),
+            )
+
+
+def test_lookup_declines_what_it_cannot_answer():
+    index = TopKIndex(["risk_score"], ["narrative"], k=100).update(posts())
+    assert index.lookup({}, "risk_score", False, 0, 10) is None
+    assert index.lookup({}, "risk_score", True, 95, 10) is None
+    assert index.lookup({"narrative": ["BTC", "ETH"]}, "risk_score", True, 0, 10) is None
+    assert index.lookup({"decision": ["NO_ACTION"]}, "risk_score", True, 0, 10) is None
+    with pytest.raises(ValueError):
+        index.page("risk_score", 95, 10)
+
+
+def test_incremental_max_merge_equals_recompute():
+    df = posts(seed=1).rename(columns={"post_id": "account_id"})
+    df["account_id"] %= 700
+    index = TopKIndex(["risk_score"], key="account_id", k=50, combine={"risk_score": "max"})
+    for start in range(0, len(df), 700):
+        index.update(df.iloc[start:start + 700])
+    best = df.groupby("account_id")["risk_score"].max().sort_values(ascending=False, kind="stable")
+    np.testing.assert_array_equal(index.page("risk_score", 0, 50)["risk_score"], best.iloc[:50].to_numpy())
+
+
+def test_composite_key_keeps_batches_apart(tmp_path):
+    store = TopKStore(str(tmp_path / "topk.pkl"))
+    spec = {"posts": {"metrics": ["risk_score"], "key": ["dataset_id", "post_id"]}}
+    first = posts(16, seed=2).assign(dataset_id="a")
+    second = posts(16, seed=3).assign(dataset_id="b")  # same post ids, other upload
+    store.record({"posts": first}, spec, k=100)
+    store.record({"posts": second}, spec, k=100)
+    store.record({"posts": second}, spec, k=100)  # re-scored: replaces, not added
+
+    rows = store.load()["posts"].frame()
+    assert len(rows) == 32
+    assert rows.groupby("dataset_id").size().to_dict() == {"a": 16, "b": 16}
@@ -0,0 +1,20 @@
+import pytest
+
+from engine.encoders import backends
+from engine.utils import warmup
+
+
+@pytest.fixture
+def no_sentence_model(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("default SentenceTransformer loaded")
+    monkeypatch.setattr(backends, "load_encoder", refuse)
+
+
+def test_warms_configured_encoder_only(no_sentence_model):
+    warmup._load_sentence_encoder({"encoder": {"backend": "hashed_ngram"}})
+
+
+def test_default_config_warms_sentence_model(no_sentence_model):
+    with pytest.raises(AssertionError):
+        warmup._load_sentence_encoder({})
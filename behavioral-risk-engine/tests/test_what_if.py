@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.analysis.what_if import WhatIfScorer, thresholds_to_tiers
+from engine.utils.decisions import DEFAULT_DECISION_TIERS, DecisionPolicy
+
+WEIGHTS = {"sim_max": 0.5, "burst_norm": 0.3, "bot_norm": 0.2}
+CUSTOM_TIERS = [
+    {"decision": "AUTO_ACTION", "risk": 60, "confidence": 0.6},
+    {"decision": "QUEUE_REVIEW", "risk": 30, "confidence": 0.3},
+]
+
+
+def scored_posts(tiers, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({f: rng.uniform(0, 1, n) for f in WEIGHTS})
+    raw = sum(df[f] * w for f, w in WEIGHTS.items())
+    df["risk_score"] = (np.clip(raw, 0, 1) * 100).round(2)
+    df["confidence"] = rng.uniform(0, 1, n).round(2)
+    df["decision"] = DecisionPolicy(tiers).apply(df)
+    return df
+
+
+def test_empty_request_reproduces_custom_tier_decisions():
+    scorer = WhatIfScorer(scored_posts(CUSTOM_TIERS), WEIGHTS, CUSTOM_TIERS)
+    result = scorer.score()
+    assert result["changed"] == 0
+    assert result["delta"] == {d: 0 for d in result["delta"]}
+
+
+def test_default_tiers_when_none_given():
+    scorer = WhatIfScorer(scored_posts(DEFAULT_DECISION_TIERS), WEIGHTS)
+    assert scorer.score()["changed"] == 0
+
+
+def test_thresholds_apply_over_given_tiers():
+    tiers = thresholds_to_tiers({"risk_review": 40}, CUSTOM_TIERS)
+    assert tiers[0] == CUSTOM_TIERS[0]
+    assert tiers[1] == {**CUSTOM_TIERS[1], "risk": 40}
+    assert CUSTOM_TIERS[1]["risk"] == 30  # caller's tiers untouched
+
+
+def test_sweep_defaults_to_scorer_tiers():
+    posts = scored_posts(CUSTOM_TIERS)
+    scorer = WhatIfScorer(posts, WEIGHTS, CUSTOM_TIERS)
+    swept = scorer.sweep({"risk_auto": [60, 70]})
+    assert swept["results"][0]["delta"] == {d: 0 for d in swept["baseline"]}
+    assert swept["results"][1]["counts"] == scorer.score(thresholds={"risk_auto": 70})["counts"]
+
+
+def test_sweep_needs_standard_tiers():
+    tiers = [{"decision": "AUTO_ACTION", "risk": 80, "confidence": 0.8}]
+    scorer = WhatIfScorer(scored_posts(tiers), WEIGHTS, tiers)
+    assert scorer.score()["changed"] == 0
+    with pytest.raises(ValueError):
+        scorer.sweep({"risk_auto": [70]})
+    with pytest.raises(ValueError):
+        scorer.score(thresholds={"risk_review": 40})